@@ -0,0 +1,89 @@
+#!/bin/env python
+
+# 03_analysis: pulling the URLs out of and stemming a long document, joining
+# a large people table onto the cities, and generating the people table
+
+import os
+import re
+
+import pandas as pd
+import pytest
+
+from conftest import DATA
+from generate_tables import Generator
+import tables
+
+N = 100000
+
+
+@pytest.fixture(scope='module')
+def people_csv(tmp_path_factory):
+    fp = str(tmp_path_factory.mktemp('tables') / 'people.csv')
+    Generator().output_people(fp, N)
+    return fp
+
+
+@pytest.fixture(scope='module')
+def people(people_csv):
+    return pd.read_csv(people_csv)
+
+
+@pytest.fixture(scope='module')
+def cities():
+    return pd.read_csv(os.path.join(DATA, '03_cities.csv')).rename(
+        columns={'name' : 'city', 'height' : 'city_height'})
+
+
+@pytest.fixture(scope='module')
+def document():
+    with open(os.path.join(DATA, '03_text.md'), 'r') as f:
+        return f.read() * 1000
+
+
+P_URL = re.compile(r'https?://[^\s)\]>"]+', flags=re.I)
+
+
+def get_urls(document):
+    return [match.group() for match in P_URL.finditer(document)]
+
+
+def bench_get_urls(benchmark, document):
+    urls = benchmark(get_urls, document)
+    assert len(urls) == 28 * 1000
+    assert urls[0] == 'https://github.com'
+
+
+def bench_stemming(benchmark):
+    nltk = pytest.importorskip('nltk')
+    from nltk.stem.snowball import SnowballStemmer
+    with open(os.path.join(DATA, '03_text.md'), 'r') as f:
+        document = f.read() * 20
+    stemmer = SnowballStemmer('english')
+
+    def stem_document():
+        return [stemmer.stem(token) for token in nltk.wordpunct_tokenize(document)]
+
+    assert len(benchmark(stem_document)) > 670 * 20
+
+
+def bench_merge(benchmark, people, cities):
+    merged = benchmark(pd.merge, people, cities, on='city', how='left')
+    assert len(merged) == N
+
+
+def bench_lookup_join(benchmark, people, cities):
+    merged = benchmark(tables.lookup_join, people, cities, on='city', how='left')
+    assert len(merged) == N
+
+
+def bench_height_above_sea(benchmark, people_csv, tmp_path):
+    fp_out = str(tmp_path / 'height_above_sea.csv')
+    n = benchmark(tables.height_above_sea, people_csv,
+                  os.path.join(DATA, '03_cities.csv'), fp_out)
+    assert n == N
+
+
+def bench_output_people(benchmark, tmp_path):
+    fp = str(tmp_path / 'people.csv')
+    benchmark.pedantic(Generator().output_people, args=(fp, N), rounds=3)
+    assert os.path.getsize(fp) > 0
@@ -0,0 +1,32 @@
+#!/bin/env python
+
+# 02_scraping: entities out of many tweets
+
+import json
+import os
+
+import pytest
+
+from conftest import DATA
+
+
+@pytest.fixture(scope='module')
+def tweets():
+    with open(os.path.join(DATA, '02_tweet.json'), 'r') as f:
+        tweet = json.load(f)
+    return [tweet] * 10000
+
+
+def entity_getter(json_object):
+    for key, value in json_object.items():
+        if key == 'entities':
+            yield value
+        elif isinstance(value, dict):
+            yield from entity_getter(value)
+
+
+def bench_entity_getter(benchmark, tweets):
+    def get_all():
+        return [entities for tweet in tweets for entities in entity_getter(tweet)]
+
+    assert len(benchmark(get_all)) == 2 * len(tweets)
@@ -0,0 +1,102 @@
+#!/bin/env python
+
+# 01_structures: list and dict basics, on a million elements
+
+import random
+
+import numpy as np
+import pytest
+
+import distinct
+from key_index import CaseFoldedDict
+import list_stats
+
+N = 1000000
+
+
+@pytest.fixture(scope='module')
+def numbers():
+    rng = random.Random(0)
+    return [rng.randint(-5, 10) for _ in range(N)]
+
+
+@pytest.fixture(scope='module')
+def mapping():
+    rng = random.Random(0)
+    return {'key{}'.format(i) : rng.randint(0, N // 10) for i in range(N)}
+
+
+def list_count_ones(a):
+    return a.count(1)
+
+
+def list_mean(b):
+    return sum(b) / len(b)
+
+
+def list_lt3(c):
+    return len([x for x in c if x < 3])
+
+
+def dict_unique_values(d):
+    return len(set(d.values()))
+
+
+def dict_key_check(k, f):
+    return k.lower() in f
+
+
+def bench_list_count_ones(benchmark, numbers):
+    assert benchmark(list_count_ones, numbers) == numbers.count(1)
+
+
+def bench_list_mean(benchmark, numbers):
+    assert benchmark(list_mean, numbers) == pytest.approx(sum(numbers) / N)
+
+
+def bench_list_lt3(benchmark, numbers):
+    assert benchmark(list_lt3, numbers) == sum(x < 3 for x in numbers)
+
+
+def bench_list_stats_list(benchmark, numbers):
+    stats = benchmark(list_stats.summarize, numbers)
+    assert (stats.equal, stats.less) == (numbers.count(1), sum(x < 3 for x in numbers))
+
+
+def bench_list_stats_array(benchmark, numbers):
+    values = np.array(numbers)
+    stats = benchmark(list_stats.summarize, values)
+    assert stats.mean == pytest.approx(sum(numbers) / N)
+
+
+def bench_dict_unique_values(benchmark, mapping):
+    assert benchmark(dict_unique_values, mapping) <= N // 10 + 1
+
+
+def bench_distinct_exact(benchmark, mapping):
+    count = benchmark(distinct.dict_unique_values, mapping)
+    assert count == dict_unique_values(mapping)
+
+
+def bench_distinct_hyperloglog(benchmark, mapping):
+    count = benchmark(distinct.dict_unique_values, mapping, error=.01)
+    assert count == pytest.approx(dict_unique_values(mapping), rel=.05)
+
+
+def bench_dict_key_check(benchmark, mapping):
+    keys = ['KEY{}'.format(i) for i in range(0, 2 * N, 20)]
+
+    def check_all():
+        return sum(dict_key_check(k, mapping) for k in keys)
+
+    assert benchmark(check_all) == len(keys) // 2
+
+
+def bench_case_folded_dict(benchmark, mapping):
+    folded = CaseFoldedDict({key.title() : value for key, value in mapping.items()})
+    keys = ['KEY{}'.format(i) for i in range(0, 2 * N, 20)]
+
+    def check_all():
+        return sum(k in folded for k in keys)
+
+    assert benchmark(check_all) == len(keys) // 2
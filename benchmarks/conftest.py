@@ -0,0 +1,30 @@
+#!/bin/env python
+
+# Performance baselines for the challenges and the scripts.
+#
+# Run from this directory:
+#
+#     python -m pytest
+#
+# Each benchmark times a reference solution of a challenge, or a function
+# from scripts/, on an input much larger than the one in the challenge.
+# Every run is saved in .benchmarks/<machine>/, named by commit, so the
+# history of a checkout is kept as JSON. Every run is also compared with
+# baseline.json, which is committed, and fails if it is slower (see
+# pytest.ini). Timings only compare on similar machines; to move the
+# baseline, for a faster change or for a new machine, copy a run that
+# passed over it and commit it:
+#
+#     cp .benchmarks/<machine>/<number>_<commit>.json baseline.json
+#
+# To compare against a saved run instead:
+#
+#     python -m pytest --benchmark-compare=0003
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(HERE, '..', 'data')
+
+sys.path.insert(0, os.path.join(HERE, '..', 'scripts'))
@@ -0,0 +1,174 @@
+#!/bin/env python
+
+# Recorded web pages for the scraping tests.
+#
+# The tests in this directory run against responses saved in
+# ../../data/02_recorded_pages.json, so they work offline and always see
+# the same HTML. While a test module is imported and while its tests run,
+# a small HTTP server on localhost replays them, and every `requests`
+# session sends its requests there instead of to the internet. A URL that
+# was never recorded gets a 404 rather than a real download. Requests made
+# anywhere else, outside this directory's tests, are left alone.
+#
+# To record the pages, from a machine that can reach them:
+#
+#     python conftest.py http://isitchristmas.com
+#
+# Until a recording exists, the tests download the pages themselves.
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+RECORDING = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         '..', '..', 'data', '02_recorded_pages.json')
+HEADER = 'X-Recorded-Url'
+
+
+def load(fp=RECORDING):
+    """Recorded responses by (method, url)"""
+    with open(fp, 'r') as f:
+        interactions = json.load(f)['interactions']
+    return {(i['request']['method'], i['request']['url']) : i['response']
+            for i in interactions}
+
+
+def record(urls, fp=RECORDING):
+    """Download `urls`, following redirects, and save every response"""
+    interactions = []
+    for url in urls:
+        response = requests.get(url)
+        for hop in response.history + [response]:
+            headers = {key : value for key, value in hop.headers.items()
+                       if key.lower() in ('content-type', 'location')}
+            interactions.append({
+                'request' : {'method' : hop.request.method, 'url' : hop.request.url},
+                'response' : {'status' : hop.status_code, 'headers' : headers,
+                              'body' : hop.text}})
+    with open(fp, 'w') as f:
+        json.dump({'interactions' : interactions}, f, indent=2)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Answers with the recorded response for the URL in the X-Recorded-Url
+    header"""
+
+    recorded = {}
+
+    def _replay(self):
+        url = self.headers.get(HEADER, '')
+        response = self.recorded.get((self.command, url))
+        if response is None:
+            response = {'status' : 404, 'headers' : {'Content-Type' : 'text/plain'},
+                        'body' : 'No recorded response for {} {}'.format(self.command, url)}
+        body = response['body'].encode('utf-8')
+        self.send_response(response['status'])
+        for key, value in response['headers'].items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_HEAD = _replay
+
+    def log_message(self, *args):
+        pass
+
+
+class ReplayServer(object):
+    """`ReplayHandler` on a free port on localhost, in a background thread"""
+
+    def __init__(self, recorded):
+        handler = type('Handler', (ReplayHandler,), {'recorded' : recorded})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.address = 'http://127.0.0.1:{}/'.format(self.server.server_port)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Sends every request to a `ReplayServer`, and makes the response look
+    like it came from the original URL"""
+
+    def __init__(self, address):
+        super().__init__()
+        self.address = address
+
+    def send(self, request, **kwargs):
+        local = request.copy()
+        local.url = self.address
+        local.headers[HEADER] = request.url
+        # localhost must not go through a proxy from the environment
+        kwargs['proxies'] = {}
+        response = super().send(local, **kwargs)
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def replay(monkeypatch, server):
+    """Mount a `ReplayAdapter` for `server` on every `requests.Session` made
+    while `monkeypatch` is in effect, including the ones behind
+    `requests.get`"""
+    adapter = ReplayAdapter(server.address)
+    session_init = requests.Session.__init__
+
+    def __init__(self, *args, **kwargs):
+        session_init(self, *args, **kwargs)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+    monkeypatch.setattr(requests.Session, '__init__', __init__)
+
+
+_server = []
+
+
+def replay_server():
+    """The `ReplayServer` for this test session, started on first use"""
+    if not _server:
+        _server.append(ReplayServer(load()))
+    return _server[0]
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_make_collect_report(collector):
+    # the challenges download their pages when they are imported, which is
+    # while their test module is collected, before any fixture could run
+    if isinstance(collector, pytest.Module) and os.path.exists(RECORDING):
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            replay(monkeypatch, replay_server())
+            yield
+    else:
+        yield
+
+
+@pytest.fixture(autouse=True)
+def replayed(monkeypatch):
+    """Requests made while a test runs are replayed as well"""
+    if os.path.exists(RECORDING):
+        replay(monkeypatch, replay_server())
+
+
+def pytest_report_header(config):
+    if not os.path.exists(RECORDING):
+        return ['no recording of the scraping pages, so the tests download them']
+
+
+def pytest_unconfigure(config):
+    while _server:
+        _server.pop().close()
+
+
+if __name__ == '__main__':
+    import sys
+    record(sys.argv[1:] or ['http://isitchristmas.com'])
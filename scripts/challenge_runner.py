@@ -0,0 +1,304 @@
+#!/bin/env python
+
+# Run every challenge's tests at once.
+#
+# Each `challenges/*/test_*.py` imports its solution by bare name
+# (`import A_list as A`), so it only works when run from its own directory.
+# Here, every challenge directory gets its own pytest process, started in
+# that directory with a clean environment, and the processes run in
+# parallel. Suites that have already passed are remembered under a hash of
+# the test file and the solution files it imports, so they are only run
+# again when one of those files changes. Before anything is started, all
+# the files are compiled by `precheck`, and suites whose files have syntax
+# errors are reported without running them.
+
+import ast
+from glob import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from xml.etree import ElementTree
+
+from jobs import Job, run_jobs
+import precheck
+
+CACHE = '.challenge_cache.json'
+
+
+def solution_files(test_fp):
+    """Modules next to `test_fp` that it imports by bare name"""
+    directory = os.path.dirname(os.path.abspath(test_fp))
+    try:
+        with open(test_fp, 'rb') as f:
+            tree = ast.parse(f.read(), test_fp)
+    except (OSError, SyntaxError, ValueError):
+        return []
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    found = [os.path.join(directory, name + '.py') for name in sorted(names)]
+    return [fp for fp in found if os.path.isfile(fp)]
+
+
+def fingerprint(fps):
+    """sha256 of the names and contents of `fps` and the Python version"""
+    digest = hashlib.sha256(sys.version.encode('utf-8'))
+    for fp in fps:
+        digest.update(os.path.basename(fp).encode('utf-8') + b'\0')
+        with open(fp, 'rb') as f:
+            digest.update(f.read())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class Suite(object):
+    """One test file and the solution files it depends on"""
+
+    def __init__(self, test_fp):
+        self.test_fp = os.path.abspath(test_fp)
+        self.directory, self.test_file = os.path.split(self.test_fp)
+        self.solutions = solution_files(self.test_fp)
+        # fixtures in conftest.py can change the outcome as well
+        conftest = [fp for fp in [os.path.join(self.directory, 'conftest.py')]
+                    if os.path.isfile(fp)]
+        self.key = fingerprint([self.test_fp] + self.solutions + conftest)
+
+    @property
+    def name(self):
+        return os.path.join(os.path.basename(self.directory), self.test_file)
+
+    def __repr__(self):
+        return "<Suite '{}'>".format(self.name)
+
+
+class SuiteResult(object):
+    """Outcome of a `Suite`
+
+    `status` is one of 'passed', 'failed', 'syntax' (the test file or a
+    solution does not compile), 'error' (the tests could not be collected),
+    'empty', 'timeout' or 'crashed'.
+    """
+
+    def __init__(self, suite, status, tests=0, failures=0, wall=0., cached=False,
+                 message=None):
+        self.suite = suite
+        self.status = status
+        self.tests = tests
+        self.failures = failures
+        self.wall = wall
+        self.cached = cached
+        self.message = message
+
+    @property
+    def ok(self):
+        return self.status == 'passed'
+
+    def __repr__(self):
+        return "<SuiteResult '{}' {} {}/{}{}>".format(
+            self.suite.name, self.status, self.tests - self.failures, self.tests,
+            ' cached' if self.cached else '')
+
+
+class ResultCache(object):
+    """Passed suites, stored as JSON in `fp`"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        try:
+            with open(fp, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, suite):
+        entry = self.entries.get(suite.key)
+        if entry is None:
+            return None
+        return SuiteResult(suite, 'passed', entry['tests'], 0, entry['wall'], cached=True)
+
+    def add(self, result):
+        if result.ok:
+            self.entries[result.suite.key] = {'tests' : result.tests, 'wall' : result.wall}
+
+    def save(self):
+        # write and rename, so a crash never leaves half a cache behind
+        directory = os.path.dirname(os.path.abspath(self.fp))
+        with tempfile.NamedTemporaryFile('w', dir=directory, delete=False) as f:
+            json.dump(self.entries, f)
+        os.replace(f.name, self.fp)
+
+
+def discover(root):
+    """A `Suite` for every `test_*.py` one level below `root`"""
+    return [Suite(fp) for fp in sorted(glob(os.path.join(root, '*', 'test_*.py')))]
+
+
+def _environment():
+    # nothing from the caller's PYTHONPATH leaks into the tests, and no
+    # __pycache__ directories are left in the challenge directories
+    env = {key : value for key, value in os.environ.items()
+           if key not in ('PYTHONPATH', 'PYTHONSTARTUP', 'PYTHONHOME')}
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def pytest_job(directory, test_files, report, timeout=None, args=(), preexec_fn=None):
+    """A `Job` that runs `test_files` from `directory`, writing JUnit XML
+    to `report`"""
+    command = [sys.executable, '-B'] + list(args) + [
+        '-m', 'pytest', '-q', '-p', 'no:cacheprovider',
+        '--continue-on-collection-errors', '--rootdir', directory,
+        '--junitxml', report] + list(test_files)
+    return Job(command, name=directory, cwd=directory, env=_environment(),
+               timeout=timeout, preexec_fn=preexec_fn)
+
+
+def parse_report(fp):
+    """Tests, failures and the first failure message of each test file in a
+    JUnit XML report"""
+    found = {}
+    for case in ElementTree.parse(fp).iter('testcase'):
+        # collection errors are reported with an empty classname and the
+        # module as the name
+        collected = bool(case.get('classname'))
+        module = (case.get('classname') or case.get('name')).split('.')[0]
+        entry = found.setdefault(module + '.py', {'tests' : 0, 'failures' : 0,
+                                                  'error' : False, 'message' : None})
+        problems = case.findall('failure') + case.findall('error')
+        entry['tests'] += collected
+        entry['failures'] += bool(problems) and collected
+        entry['error'] |= not collected
+        if problems and entry['message'] is None:
+            entry['message'] = problems[0].get('message')
+    return found
+
+
+def _results(suites, job_result, found):
+    for suite in suites:
+        entry = found.get(suite.test_file)
+        if job_result.timed_out:
+            yield SuiteResult(suite, 'timeout', wall=job_result.wall)
+        elif entry is None:
+            status = 'crashed' if job_result.returncode not in (0, 1, 5) else 'empty'
+            yield SuiteResult(suite, status, wall=job_result.wall)
+        else:
+            if entry['error']:
+                status = 'error'
+            elif entry['failures']:
+                status = 'failed'
+            else:
+                status = 'passed' if entry['tests'] else 'empty'
+            yield SuiteResult(suite, status, entry['tests'], entry['failures'],
+                              job_result.wall, message=entry['message'])
+
+
+def run_suites(suites, workers=None, cache=None, timeout=60, args=(), preexec_fn=None,
+               check_syntax=True, syntax_cache=None, per_suite=False):
+    """Run `suites`, one pytest process per directory, `workers` at a time
+
+    Parameters
+    ----------
+    suites : list of Suite
+    workers : int, optional
+        defaults to the number of CPUs
+    cache : ResultCache, optional
+        suites found here are not run again, and passed suites are added
+    timeout : float
+        seconds before a pytest process is killed
+    args : list of str
+        extra interpreter options, placed before `-m pytest`
+    preexec_fn : function, optional
+        run in each pytest process before it starts, see `jobs.Job`
+    check_syntax : bool
+        compile the files of each suite first, and don't run the suites
+        that have syntax errors
+    syntax_cache : precheck.SyntaxCache, optional
+    per_suite : bool
+        one pytest process per suite instead, so that a timeout or crash
+        only fails the suite that caused it
+
+    Returns
+    -------
+    list of SuiteResult
+        in the same order as `suites`
+    """
+    results = {}
+    todo = []
+    for suite in suites:
+        hit = cache.get(suite) if cache is not None else None
+        if hit is not None:
+            results[suite.test_fp] = hit
+        else:
+            todo.append(suite)
+
+    problems = {}
+    if check_syntax:
+        fps = sorted({fp for suite in todo for fp in [suite.test_fp] + suite.solutions})
+        problems = precheck.precheck(fps, cache=syntax_cache)
+    pending = {}
+    for suite in todo:
+        broken = [problems[fp] for fp in [suite.test_fp] + suite.solutions
+                  if problems.get(fp) is not None]
+        if broken:
+            results[suite.test_fp] = SuiteResult(suite, 'syntax',
+                                                 message='; '.join(map(str, broken)))
+        else:
+            group = suite.test_fp if per_suite else suite.directory
+            pending.setdefault(group, []).append(suite)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        groups = list(pending.values())
+        reports = [os.path.join(tmp, '{}.xml'.format(i)) for i in range(len(groups))]
+        jobs = [pytest_job(group[0].directory, [s.test_file for s in group],
+                           report, timeout, args, preexec_fn)
+                for group, report in zip(groups, reports)]
+        for group, report, job_result in zip(groups, reports, run_jobs(jobs, workers)):
+            try:
+                found = parse_report(report)
+            except (OSError, ElementTree.ParseError):
+                found = {}
+            for result in _results(group, job_result, found):
+                results[result.suite.test_fp] = result
+                if cache is not None:
+                    cache.add(result)
+
+    if cache is not None:
+        cache.save()
+    return [results[suite.test_fp] for suite in suites]
+
+
+def run_challenges(root='../challenges', workers=None, cache=CACHE, timeout=60):
+    """Discover and run every challenge suite below `root`
+
+    `cache` is a path, relative to `root`, or None to run everything.
+    """
+    suites = discover(root)
+    syntax_cache = None
+    if cache is not None:
+        cache = ResultCache(os.path.join(root, cache))
+        syntax_cache = precheck.SyntaxCache(os.path.join(root, precheck.CACHE))
+    return run_suites(suites, workers, cache, timeout, syntax_cache=syntax_cache)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('root', nargs='?', default='../challenges')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='run every suite, even if it passed before')
+    args = parser.parse_args()
+
+    results = run_challenges(args.root, args.workers, None if args.no_cache else CACHE,
+                             args.timeout)
+    for result in results:
+        print("{:<32} {:<8} {:>3}/{:<3} {:6.2f}s{}".format(
+            result.suite.name, result.status, result.tests - result.failures,
+            result.tests, result.wall, ' (cached)' if result.cached else ''))
+    print("{} of {} suites passed".format(sum(r.ok for r in results), len(results)))
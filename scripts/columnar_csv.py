@@ -0,0 +1,181 @@
+#!/bin/env python
+
+# Columnar reading of large csv files like data/01_roster.csv.
+#
+# day_one computes the mean age by appending `int(row[3])` to a list for
+# every row that `csv.reader` produces. Here, only the requested columns
+# are parsed, by pandas' C parser, straight into typed NumPy buffers, one
+# large block at a time. Aggregates are kept as running totals, so memory
+# does not grow with the file.
+
+import csv
+import time
+
+import numpy as np
+import pandas as pd
+
+from list_stats import block_sum
+
+
+def read_columns(fp, columns, dtypes=None, block_size=1000000):
+    """Yield blocks of the requested columns as NumPy arrays
+
+    Parameters
+    ----------
+    fp : str
+        csv file with a header row
+    columns : list of str
+        columns to parse; all others are skipped by the tokenizer
+    dtypes : dict, optional
+        column -> dtype, e.g. {'age' : np.int32, 'department' : 'category'}
+    block_size : int
+        rows per block
+
+    Yields
+    ------
+    dict
+        column -> array for one block of rows. Columns read as 'category'
+        are yielded as pandas Categoricals, whose codes are a NumPy array.
+    """
+    reader = pd.read_csv(fp, usecols=columns, dtype=dtypes, chunksize=block_size,
+                         engine='c')
+    for block in reader:
+        yield {column : block[column].array if isinstance(block[column].dtype, pd.CategoricalDtype)
+               else block[column].to_numpy() for column in columns}
+
+
+class ColumnSummary(object):
+    """Running count, sum, mean and min/max of numeric columns and value
+    counts of categorical columns
+
+    Parameters
+    ----------
+    numeric : list of str
+    categorical : list of str
+    """
+
+    def __init__(self, numeric=(), categorical=()):
+        self.numeric = list(numeric)
+        self.categorical = list(categorical)
+        self.rows = 0
+        self.count = {column : 0 for column in self.numeric}
+        self.total = {column : 0 for column in self.numeric}
+        self.min = {column : None for column in self.numeric}
+        self.max = {column : None for column in self.numeric}
+        self.counts = {column : {} for column in self.categorical}
+
+    def update(self, block):
+        if self.numeric + self.categorical:
+            self.rows += len(block[(self.numeric + self.categorical)[0]])
+        for column in self.numeric:
+            values = block[column]
+            if values.dtype.kind == 'f':
+                values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            self.count[column] += len(values)
+            self.total[column] += block_sum(values)
+            low, high = values.min().item(), values.max().item()
+            self.min[column] = low if self.min[column] is None else min(self.min[column], low)
+            self.max[column] = high if self.max[column] is None else max(self.max[column], high)
+        for column in self.categorical:
+            values = pd.Categorical(block[column])
+            codes = values.codes
+            counts = np.bincount(codes[codes >= 0], minlength=len(values.categories))
+            totals = self.counts[column]
+            for category, n in zip(values.categories, counts.tolist()):
+                if n:
+                    totals[category] = totals.get(category, 0) + n
+        return self
+
+    def mean(self, column):
+        return self.total[column] / self.count[column] if self.count[column] else float('nan')
+
+    def value_counts(self, column):
+        return pd.Series(self.counts[column], dtype=np.int64).sort_values(ascending=False)
+
+
+def summarize(fp, numeric=(), categorical=(), dtypes=None, block_size=1000000):
+    """Build a `ColumnSummary` of a csv in one pass
+
+    >>> summary = summarize('../data/01_roster.csv', ['age'], ['department', 'level'])
+    >>> round(summary.mean('age'), 2)
+    23.67
+    """
+    dtypes = dict(dtypes or {})
+    for column in categorical:
+        dtypes.setdefault(column, 'category')
+    summary = ColumnSummary(numeric, categorical)
+    for block in read_columns(fp, list(numeric) + list(categorical), dtypes, block_size):
+        summary.update(block)
+    return summary
+
+
+def make_roster(fp, rows, seed=0):
+    """Write a synthetic roster with the same columns as 01_roster.csv"""
+    rng = np.random.default_rng(seed)
+    departments = np.array(['sociology', 'economics', 'physics', 'linguistics', 'engineering',
+                            'environmental science, policy, and management'])
+    levels = np.array(['graduate', 'undergraduate'])
+    sexes = np.array(['m', 'f'])
+    with open(fp, 'w') as f:
+        f.write('id,department,level,age,sex\n')
+        for start in range(0, rows, 1000000):
+            n = min(1000000, rows - start)
+            block = pd.DataFrame({
+                'id' : rng.integers(1000, 10000, n),
+                'department' : departments[rng.integers(0, len(departments), n)],
+                'level' : levels[rng.integers(0, len(levels), n)],
+                'age' : rng.integers(17, 60, n),
+                'sex' : sexes[rng.integers(0, len(sexes), n)],
+            })
+            block.to_csv(f, header=False, index=False)
+
+
+def benchmark(fp):
+    """Time the day_one `csv.reader` loop against `summarize`
+
+    Returns
+    -------
+    dict
+        seconds taken by each approach
+    """
+    start = time.perf_counter()
+    ages = []
+    with open(fp, 'r') as f:
+        next(f)
+        roster = csv.reader(f, delimiter=',', quotechar='"')
+        for student_data in roster:
+            ages.append(int(student_data[3]))
+    ages_mean = sum(ages) / len(ages)
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summary = summarize(fp, ['age'], ['department', 'level'], {'age' : np.int32})
+    columnar = time.perf_counter() - start
+    assert abs(summary.mean('age') - ages_mean) < 1e-9
+    return {'csv.reader' : baseline, 'columnar' : columnar}
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fp', default='../data/01_roster.csv')
+    parser.add_argument('--benchmark', type=int, metavar='ROWS',
+                        help='time a synthetic roster of this many rows, written to a '
+                             'temporary file')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            fp = os.path.join(tmp, 'roster.csv')
+            make_roster(fp, args.benchmark)
+            for name, seconds in benchmark(fp).items():
+                print("{:>10}: {:.2f}s".format(name, seconds))
+    else:
+        summary = summarize(args.fp, ['age'], ['department', 'level'])
+        print('The average age of students in the roster is: %.2f' % summary.mean('age'))
+        for column in summary.categorical:
+            print(summary.value_counts(column).to_string())
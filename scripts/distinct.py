@@ -0,0 +1,286 @@
+#!/bin/env python
+
+# Count distinct values without keeping them.
+#
+# `len(set(d.values()))` holds every distinct value in memory, and fails on
+# values like lists and dicts that can't be hashed. Here, every value is
+# reduced to a 64-bit digest of a canonical encoding, so unhashable values
+# can be counted, and equal numbers (1, 1.0 and True) count once, as they
+# do in a set. Then either
+#
+# - `ExactCounter` keeps the distinct digests in a sorted uint64 array, 8
+#   bytes per distinct value, or
+# - `HyperLogLog` keeps a few kilobytes of registers and estimates the count
+#   to within a chosen relative error (Flajolet et al., 2007), using Ertl's
+#   improved estimator (2017), which is unbiased across the whole range
+#   where the original switches between linear counting and the raw
+#   estimate.
+#
+# Both can be merged, so shards can be counted separately and combined.
+# The digests do not depend on PYTHONHASHSEED, so shards may be counted in
+# different processes.
+
+from hashlib import blake2b
+from itertools import islice
+import math
+
+import numpy as np
+
+BLOCK_SIZE = 1 << 16
+
+
+def encode(value):
+    """Bytes that are equal for equal values"""
+    if isinstance(value, np.generic):
+        # numpy scalars count as the Python numbers, strings and bytes
+        # they equal
+        value = value.item()
+    if isinstance(value, str):
+        return b's' + value.encode('utf-8', 'surrogatepass')
+    if isinstance(value, (bytes, bytearray)):
+        return b'b' + bytes(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int):
+        # bools are ints, and True == 1
+        return b'i' + str(int(value)).encode('ascii')
+    if isinstance(value, float):
+        return b'f' + repr(value).encode('ascii')
+    if value is None:
+        return b'n'
+    if isinstance(value, (tuple, list)):
+        return _encode_items(b't' if isinstance(value, tuple) else b'l', value)
+    if isinstance(value, (set, frozenset)):
+        return _encode_items(b'e', sorted(encode(item) for item in value), encoded=True)
+    if isinstance(value, dict):
+        items = sorted(encode(key) + b'\0' + encode(item) for key, item in value.items())
+        return _encode_items(b'd', items, encoded=True)
+    return b'r' + repr(value).encode('utf-8', 'surrogatepass')
+
+
+def _encode_items(tag, items, encoded=False):
+    parts = [tag]
+    for item in items:
+        item = item if encoded else encode(item)
+        # length prefixes keep ('ab', 'c') apart from ('a', 'bc')
+        parts.append(len(item).to_bytes(8, 'little'))
+        parts.append(item)
+    return b''.join(parts)
+
+
+def digests(values, key=None):
+    """uint64 digests of `values`, or of `key(value)` for each value"""
+    if key is not None:
+        values = map(key, values)
+    return np.fromiter(
+        (int.from_bytes(blake2b(encode(value), digest_size=8).digest(), 'little')
+         for value in values), dtype=np.uint64)
+
+
+def _blocks(values, block_size=BLOCK_SIZE):
+    iterator = iter(values)
+    while True:
+        block = list(islice(iterator, block_size))
+        if not block:
+            return
+        yield block
+
+
+class ExactCounter(object):
+    """Exact number of distinct values
+
+    Values are told apart by their 64-bit digests, so two different values
+    could be counted once. The chance that any two of n distinct values
+    collide is about n ** 2 / 2 ** 65, e.g. 3 in a million for ten million
+    values.
+
+    >>> counter = ExactCounter().update([1, 1.0, True, 'a', [1, 2], [1, 2]])
+    >>> counter.count()
+    3
+    """
+
+    def __init__(self):
+        self._distinct = np.empty(0, dtype=np.uint64)
+        self._pending = []
+        self._pending_size = 0
+
+    def _consolidate(self):
+        if self._pending:
+            self._distinct = np.unique(np.concatenate([self._distinct] + self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def update_digests(self, hashed):
+        """Add uint64 digests, as made by `digests`"""
+        self._pending.append(np.asarray(hashed, dtype=np.uint64))
+        self._pending_size += len(hashed)
+        # deduplicate once the pending digests outgrow the distinct ones (or
+        # 8 MB), so memory stays within a small multiple of the distinct count
+        if self._pending_size > max(len(self._distinct), 1 << 20):
+            self._consolidate()
+        return self
+
+    def update(self, values, key=None):
+        for block in _blocks(values):
+            self.update_digests(digests(block, key))
+        return self
+
+    def merge(self, other):
+        other._consolidate()
+        return self.update_digests(other._distinct)
+
+    def count(self):
+        self._consolidate()
+        return len(self._distinct)
+
+    @property
+    def nbytes(self):
+        return self._distinct.nbytes + sum(block.nbytes for block in self._pending)
+
+
+class HyperLogLog(object):
+    """Approximate number of distinct values
+
+    Parameters
+    ----------
+    error : float
+        standard error of the estimate relative to the true count; memory is
+        about (1.04 / error) ** 2 bytes, e.g. 16 KB for 1%
+    precision : int, optional
+        log2 of the number of registers (4-18); overrides `error`
+
+    >>> hll = HyperLogLog(.01).update(range(100000))
+    >>> abs(hll.count() - 100000) < 3000
+    True
+    """
+
+    def __init__(self, error=.01, precision=None):
+        if precision is None:
+            precision = int(math.ceil(math.log2((1.04 / error) ** 2)))
+        if not 4 <= precision <= 18:
+            raise ValueError('precision must be between 4 and 18, not {}'.format(precision))
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update_digests(self, hashed):
+        """Add uint64 digests, as made by `digests`"""
+        hashed = np.asarray(hashed, dtype=np.uint64)
+        if not len(hashed):
+            return self
+        bits = 64 - self.precision
+        index = (hashed >> np.uint64(bits)).astype(np.intp)
+        rest = hashed & np.uint64((1 << bits) - 1)
+        # rank is the position of the first 1 bit in the remaining bits;
+        # frexp gives the bit length, which can be one too high where the
+        # conversion to float rounds up
+        length = np.frexp(rest.astype(np.float64))[1].astype(np.int64)
+        high = np.left_shift(np.uint64(1), np.maximum(length - 1, 0).astype(np.uint64))
+        length -= (length > 0) & (high > rest)
+        rank = (bits - length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def update(self, values, key=None):
+        for block in _blocks(values):
+            self.update_digests(digests(block, key))
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('cannot merge sketches with precision {} and {}'.format(
+                self.precision, other.precision))
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        # Ertl (2017), "New cardinality estimation algorithms for HyperLogLog
+        # sketches", algorithm 6, from the histogram of the register values
+        m = len(self.registers)
+        q = 64 - self.precision
+        histogram = np.bincount(self.registers, minlength=q + 2)
+        if histogram[0] == m:
+            return 0
+        z = m * _tau(1 - histogram[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + histogram[k])
+        z += m * _sigma(histogram[0] / m)
+        return int(round(m * m / (2 * math.log(2)) / z))
+
+    @property
+    def nbytes(self):
+        return self.registers.nbytes
+
+    def to_bytes(self):
+        return bytes([self.precision]) + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        sketch = cls(precision=data[0])
+        sketch.registers = np.frombuffer(data[1:], dtype=np.uint8).copy()
+        return sketch
+
+
+def _sigma(x):
+    # correction for the registers that are still 0
+    y, z = 1., x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x):
+    # correction for the registers that are at their largest value
+    if x == 0 or x == 1:
+        return 0.
+    y, z = 1., 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+def count_distinct(values, error=None, key=None):
+    """Number of distinct `values`, exactly, or estimated to within a
+    relative standard error of `error`"""
+    counter = ExactCounter() if error is None else HyperLogLog(error)
+    return counter.update(values, key).count()
+
+
+def dict_unique_values(d, error=None):
+    """Number of distinct values in the dict `d`"""
+    return count_distinct(d.values(), error)
+
+
+if __name__ == '__main__':
+    import argparse
+    import random
+    import sys
+    import time
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=1000000, help='number of values')
+    parser.add_argument('--distinct', type=int, default=200000)
+    parser.add_argument('--error', type=float, default=.01)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    d = {i : 'value{}'.format(rng.randrange(args.distinct)) for i in range(args.n)}
+    for name, counter in [('set', None), ('exact', ExactCounter()),
+                          ('hyperloglog', HyperLogLog(args.error))]:
+        start = time.perf_counter()
+        if counter is None:
+            distinct = set(d.values())
+            count, nbytes = len(distinct), (sys.getsizeof(distinct)
+                                            + sum(sys.getsizeof(v) for v in distinct))
+        else:
+            count, nbytes = counter.update(d.values()).count(), counter.nbytes
+        print("{:<12} {:>9} distinct {:>12} bytes {:.3f}s".format(
+            name, count, nbytes, time.perf_counter() - start))
@@ -28,9 +28,10 @@ class Generator(object):
     def output_cities(self, fp_cities):
         pd.DataFrame(self.cities).to_csv(fp_cities, index=False)
 
-    def output_people(self, fp_people):
-        self.people['height'] = list(random.normal(1.5, 0.25, 1000))
-        for i in range(0, 1000):
+    def output_people(self, fp_people, n=1000):
+        self.people = {'name' : [], 'height' : [], 'city' : []}
+        self.people['height'] = list(random.normal(1.5, 0.25, n))
+        for i in range(0, n):
             self.people['city'].append(self.cities['name'][random.randint(0, len(self.cities))])
             self.people['name'].append(''.join([self.alphabet[i] for i in random.randint(0, len(self.alphabet), 6)]).title())
         pd.DataFrame(self.people).to_csv(fp_people, index=False)
@@ -41,6 +42,7 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--fp-cities')
     parser.add_argument('--fp-people')
+    parser.add_argument('--n-people', type=int, default=1000)
     args = parser.parse_args()
 
     generator = Generator()
@@ -48,5 +50,5 @@ if __name__ == '__main__':
         generator.output_cities(args.fp_cities)
         print("Cities written to {}".format(args.fp_cities))
     if args.fp_people:
-        generator.output_people(args.fp_people)
+        generator.output_people(args.fp_people, args.n_people)
         print("People randomized and written to {}".format(args.fp_people))
@@ -0,0 +1,160 @@
+#!/bin/env python
+
+# Grade a whole class at once.
+#
+# `submissions` holds one folder per student, laid out like `challenges/`:
+#
+#     submissions/ada/01_structures/A_list.py
+#     submissions/ada/01_structures/B_dict.py
+#     submissions/grace/00_introduction/B_syntax.py
+#
+# Every student gets a scratch copy of `challenges/` and `data/` with their
+# solution files dropped in, and the official tests are run there with
+# `challenge_runner`, one pytest process per suite. Each process runs under
+# CPU and memory limits and a timeout, so a solution that loops forever or
+# eats all the memory only fails its own suite. Files that do not compile
+# are caught by `precheck` before any process starts.
+#
+# This is not a security boundary: every submission runs as the user
+# running the grader, and can read and write the other sandboxes, the
+# result cache and anything else that user can. Grade code you would run
+# yourself, or run the grader in a container or as a throwaway user.
+
+import os
+import resource
+import shutil
+import tempfile
+
+import pandas as pd
+
+from challenge_runner import CACHE, ResultCache, discover, run_suites
+import precheck
+
+COLUMNS = ['student', 'challenge', 'suite', 'status', 'tests', 'passed', 'wall',
+           'cached', 'message']
+
+
+def limits(cpu=30, memory=2 << 30):
+    """A `preexec_fn` that caps CPU seconds and address space (bytes)"""
+    def apply():
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    return apply
+
+
+def students(submissions):
+    """Names of the folders in `submissions`"""
+    return sorted(name for name in os.listdir(submissions)
+                  if not name.startswith('.')
+                  and os.path.isdir(os.path.join(submissions, name)))
+
+
+def sandbox(submission, challenges, data, root):
+    """Copy `challenges` and `data` into `root` and overwrite the solution
+    files with the ones in `submission`
+
+    Test files and conftest.py in the submission are ignored. Returns the path of the copied
+    challenges.
+    """
+    copied = os.path.join(root, 'challenges')
+    shutil.copytree(challenges, copied,
+                    ignore=shutil.ignore_patterns('__pycache__', '.*'))
+    # the tests read and write ../../data
+    shutil.copytree(data, os.path.join(root, 'data'))
+    for challenge in os.listdir(copied):
+        source = os.path.join(submission, challenge)
+        if not os.path.isdir(source):
+            continue
+        for name in os.listdir(source):
+            if (name.endswith('.py') and not name.startswith('test_')
+                    and name != 'conftest.py'):
+                shutil.copyfile(os.path.join(source, name),
+                                os.path.join(copied, challenge, name))
+    return copied
+
+
+def grade(submissions, challenges='../challenges', data='../data', workers=None,
+          timeout=60, cpu=30, memory=2 << 30, cache=CACHE):
+    """Run the challenge tests against every student's solutions
+
+    Parameters
+    ----------
+    submissions : str
+        directory with one folder per student
+    challenges, data : str
+        the official challenges and the data they use
+    workers : int, optional
+        pytest processes at a time; defaults to the number of CPUs
+    timeout : float
+        wall-clock seconds for one suite
+    cpu : int
+        CPU seconds for one suite
+    memory : int
+        bytes of address space for one suite
+    cache : str or None
+        file, relative to `submissions`, that remembers passed suites; a
+        solution identical to one that already passed is not run again
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per student and suite
+    """
+    syntax_cache = precheck.SyntaxCache()
+    if cache is not None:
+        cache = ResultCache(os.path.join(submissions, cache))
+        syntax_cache = precheck.SyntaxCache(os.path.join(submissions, precheck.CACHE))
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        suites, owners = [], []
+        for student in students(submissions):
+            copied = sandbox(os.path.join(submissions, student), challenges, data,
+                             os.path.join(tmp, student))
+            found = discover(copied)
+            suites.extend(found)
+            owners.extend([student] * len(found))
+        results = run_suites(suites, workers, cache, timeout,
+                             preexec_fn=limits(cpu, memory), syntax_cache=syntax_cache,
+                             per_suite=True)
+    for student, result in zip(owners, results):
+        rows.append({'student' : student,
+                     'challenge' : os.path.basename(result.suite.directory),
+                     'suite' : result.suite.test_file,
+                     'status' : result.status,
+                     'tests' : result.tests,
+                     'passed' : result.tests - result.failures,
+                     'wall' : result.wall,
+                     'cached' : result.cached,
+                     'message' : result.message})
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def save(table, fp):
+    """Write `table` as Parquet if `fp` ends in .parquet, otherwise as csv"""
+    if fp.endswith('.parquet'):
+        table.to_parquet(fp, index=False)
+    else:
+        table.to_csv(fp, index=False)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('submissions', help='directory with one folder per student')
+    parser.add_argument('--out', default='grades.csv', help='.csv or .parquet')
+    parser.add_argument('--challenges', default='../challenges')
+    parser.add_argument('--data', default='../data')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--cpu', type=int, default=30, help='CPU seconds')
+    parser.add_argument('--memory', type=int, default=2048, help='megabytes')
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    table = grade(args.submissions, args.challenges, args.data, args.workers,
+                  args.timeout, args.cpu, args.memory << 20,
+                  None if args.no_cache else CACHE)
+    save(table, args.out)
+    summary = table.assign(ok=table.status == 'passed').groupby('student')['ok'].sum()
+    print(summary.to_string())
+    print("Wrote {} rows to {}".format(len(table), args.out))
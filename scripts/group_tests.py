@@ -0,0 +1,208 @@
+#!/bin/env python
+
+# Group-wise t-tests, ANOVAs and correlations for many outcome columns at
+# once. Instead of slicing the data frame once per group and per test, each
+# grouping is factorized once and the per-group count, sum and sum of
+# squares of every outcome are collected in a single vectorized pass. All
+# of the tests are then computed from those sufficient statistics.
+
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+class GroupSummary(object):
+    """Per-group sufficient statistics for several outcome columns
+
+    Attributes
+    ----------
+    groups : pandas.Index
+        group labels, in order of first appearance
+    outcomes : list of str
+    n, mean, ss : numpy.ndarray
+        arrays of shape (groups, outcomes) holding the count, mean and sum
+        of squared deviations from the group mean of the non-missing values
+    """
+
+    def __init__(self, data, by, outcomes):
+        codes, self.groups = pd.factorize(data[by])
+        self.by = by
+        self.outcomes = list(outcomes)
+        values = data[self.outcomes].to_numpy(np.float64)
+        n_groups, n_outcomes = len(self.groups), len(self.outcomes)
+
+        valid = ~np.isnan(values) & (codes >= 0)[:, None]
+        # shifting by the column means keeps the sums of squares accurate
+        shift = np.nanmean(values, axis=0) if len(values) else np.zeros(n_outcomes)
+        shifted = values - shift
+        # one flat bin per (group, outcome) pair
+        bins = (codes[:, None] * n_outcomes + np.arange(n_outcomes))[valid]
+        size = n_groups * n_outcomes
+        n = np.bincount(bins, minlength=size).reshape(n_groups, n_outcomes)
+        total = np.bincount(bins, shifted[valid], minlength=size).reshape(n_groups, n_outcomes)
+        squares = np.bincount(bins, shifted[valid] ** 2, minlength=size).reshape(n_groups, n_outcomes)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            centered_mean = total / n
+        self.n = n
+        self.mean = centered_mean + shift
+        self.ss = np.where(n > 0, squares - n * np.nan_to_num(centered_mean) ** 2, 0.0)
+
+    @property
+    def var(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.ss / (self.n - 1)
+
+    def ttests(self, pairs=None, equal_var=True):
+        """Independent-samples t-tests between pairs of groups, like
+        `stats.ttest_ind`
+
+        Parameters
+        ----------
+        pairs : list of tuple, optional
+            group labels to compare; defaults to every pair of groups
+        equal_var : bool
+            pooled-variance t-test if True, Welch's t-test otherwise
+
+        Returns
+        -------
+        pandas.DataFrame
+            one row per outcome and pair
+        """
+        if pairs is None:
+            pairs = list(itertools.combinations(self.groups, 2))
+        if not pairs:
+            return pd.DataFrame(columns=['by', 'outcome', 'a', 'b', 'statistic', 'df', 'pvalue'])
+        a = self.groups.get_indexer([pair[0] for pair in pairs])
+        b = self.groups.get_indexer([pair[1] for pair in pairs])
+        if (a < 0).any() or (b < 0).any():
+            raise KeyError("pairs include a group that is not in '{}'".format(self.by))
+        na, nb = self.n[a], self.n[b]
+        va, vb = self.var[a], self.var[b]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if equal_var:
+                df = na + nb - 2.0
+                pooled = (self.ss[a] + self.ss[b]) / df
+                se = np.sqrt(pooled * (1.0 / na + 1.0 / nb))
+            else:
+                ea, eb = va / na, vb / nb
+                se = np.sqrt(ea + eb)
+                df = (ea + eb) ** 2 / (ea ** 2 / (na - 1) + eb ** 2 / (nb - 1))
+            statistic = (self.mean[a] - self.mean[b]) / se
+        pvalue = 2 * stats.t.sf(np.abs(statistic), df)
+        return self._frame({
+            'a' : np.repeat([pair[0] for pair in pairs], len(self.outcomes)),
+            'b' : np.repeat([pair[1] for pair in pairs], len(self.outcomes)),
+            'statistic' : statistic.ravel(),
+            'df' : np.broadcast_to(df, statistic.shape).ravel(),
+            'pvalue' : pvalue.ravel(),
+        }, len(pairs))
+
+    def anova(self, groups=None):
+        """One-way ANOVA across groups, like `stats.f_oneway`
+
+        Returns
+        -------
+        pandas.DataFrame
+            one row per outcome
+        """
+        rows = slice(None) if groups is None else self.groups.get_indexer(groups)
+        n, mean, ss = self.n[rows], self.mean[rows], self.ss[rows]
+        present = n > 0
+        total_n = n.sum(axis=0)
+        k = present.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grand = np.where(present, n * np.nan_to_num(mean), 0).sum(axis=0) / total_n
+            between = np.where(present, n * (np.nan_to_num(mean) - grand) ** 2, 0).sum(axis=0)
+            within = ss.sum(axis=0)
+            df_between = k - 1.0
+            df_within = total_n - k
+            statistic = (between / df_between) / (within / df_within)
+        pvalue = stats.f.sf(statistic, df_between, df_within)
+        return self._frame({
+            'statistic' : statistic,
+            'df_between' : df_between,
+            'df_within' : df_within,
+            'pvalue' : pvalue,
+        }, 1)
+
+    def _frame(self, columns, repeats):
+        frame = pd.DataFrame({
+            'by' : self.by,
+            'outcome' : np.tile(self.outcomes, repeats),
+        })
+        for name, values in columns.items():
+            frame[name] = values
+        return frame
+
+
+def ttests(data, by, outcomes, pairs=None, equal_var=True):
+    """t-tests for every grouping column in `by` and every outcome"""
+    by = [by] if isinstance(by, str) else by
+    return pd.concat([GroupSummary(data, column, outcomes).ttests(pairs, equal_var)
+                      for column in by], ignore_index=True)
+
+
+def anovas(data, by, outcomes):
+    """One-way ANOVAs for every grouping column in `by` and every outcome"""
+    by = [by] if isinstance(by, str) else by
+    return pd.concat([GroupSummary(data, column, outcomes).anova()
+                      for column in by], ignore_index=True)
+
+
+def correlations(data, x, y=None):
+    """Pearson correlations between every column in `x` and every column in
+    `y`, like `stats.pearsonr` on the rows where both are present
+
+    All pairs are computed with a handful of matrix products over the
+    missing-value masks, instead of one `dropna` per pair.
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per pair of columns
+    """
+    y = x if y is None else y
+    xv = data[list(x)].to_numpy(np.float64)
+    yv = data[list(y)].to_numpy(np.float64)
+    xm, ym = ~np.isnan(xv), ~np.isnan(yv)
+    xv = np.where(xm, xv - np.nanmean(xv, axis=0), 0.0)
+    yv = np.where(ym, yv - np.nanmean(yv, axis=0), 0.0)
+    xm, ym = xm.astype(np.float64), ym.astype(np.float64)
+
+    # sums over the rows where both columns of a pair are present
+    n = xm.T @ ym
+    sx, sy = xv.T @ ym, xm.T @ yv
+    sxx, syy = (xv * xv).T @ ym, xm.T @ (yv * yv)
+    sxy = xv.T @ yv
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sy / n
+        r = cov / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+        r = np.clip(r, -1.0, 1.0)
+        df = n - 2
+        t = r * np.sqrt(df / (1 - r * r))
+    pvalue = 2 * stats.t.sf(np.abs(t), df)
+    pvalue[np.abs(r) == 1] = 0.0
+    return pd.DataFrame({
+        'x' : np.repeat(list(x), len(y)),
+        'y' : np.tile(list(y), len(x)),
+        'n' : n.ravel().astype(np.int64),
+        'r' : r.ravel(),
+        'pvalue' : pvalue.ravel(),
+    })
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('fp', help='csv file to test')
+    parser.add_argument('--by', nargs='+', required=True)
+    parser.add_argument('--outcomes', nargs='+', required=True)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.fp)
+    print(ttests(data, args.by, args.outcomes).to_string())
+    print(anovas(data, args.by, args.outcomes).to_string())
+    print(correlations(data, args.outcomes).to_string())
@@ -0,0 +1,202 @@
+#!/bin/env python
+
+# Run many commands at once, with a bounded number of workers.
+#
+# `subprocess.check_output(['python', 'simple.py'])` blocks until the
+# script is finished and holds all of its output in memory. Here, jobs are
+# asyncio subprocesses: at most `workers` run at a time, their stdout and
+# stderr are handed to callbacks line by line as they are written, and a
+# job that runs past its timeout is killed.
+
+import asyncio
+import os
+import sys
+import time
+
+MAX_LINE = 1 << 20
+
+
+class Job(object):
+    """One command to run
+
+    Parameters
+    ----------
+    args : list of str
+        program and its arguments
+    name : str, optional
+        label passed to callbacks; defaults to the command line
+    cwd : str, optional
+    env : dict, optional
+    timeout : float, optional
+        seconds before the job is killed
+    preexec_fn : function, optional
+        called in the child just before the program starts, e.g. to set
+        resource limits (Unix only)
+    """
+
+    def __init__(self, args, name=None, cwd=None, env=None, timeout=None,
+                 preexec_fn=None):
+        self.args = list(args)
+        self.name = name or ' '.join(self.args)
+        self.cwd = cwd
+        self.env = env
+        self.timeout = timeout
+        self.preexec_fn = preexec_fn
+
+    def __repr__(self):
+        return "<Job '{}'>".format(self.name)
+
+
+class JobResult(object):
+    """What happened to a `Job`
+
+    `max_rss` is the peak resident set size in kilobytes, sampled from
+    /proc while the job runs, so it is None on systems without /proc and
+    may miss spikes shorter than the sampling interval.
+    """
+
+    def __init__(self, job, returncode, wall, max_rss, timed_out, error=None):
+        self.job = job
+        self.returncode = returncode
+        self.wall = wall
+        self.max_rss = max_rss
+        self.timed_out = timed_out
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.timed_out and self.error is None
+
+    def __repr__(self):
+        return "<JobResult '{}' returncode={} wall={:.3f}s max_rss={}>".format(
+            self.job.name, self.returncode, self.wall, self.max_rss)
+
+
+def _peak_rss(pid):
+    """VmHWM of a running process in kilobytes, or None"""
+    try:
+        with open('/proc/{}/status'.format(pid), 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+async def _forward(stream, callback, job, max_line=MAX_LINE):
+    # `readline` gives up on lines longer than the stream's buffer limit,
+    # so lines are split out of fixed-size reads instead; a line longer
+    # than `max_line` is passed on in pieces
+    def emit(line):
+        if callback is not None:
+            callback(job, line.decode('utf-8', errors='replace'))
+
+    pending = b''
+    while True:
+        chunk = await stream.read(1 << 16)
+        if not chunk:
+            if pending:
+                emit(pending)
+            return
+        *lines, pending = (pending + chunk).split(b'\n')
+        for line in lines:
+            emit(line)
+        while len(pending) >= max_line:
+            emit(pending[:max_line])
+            pending = pending[max_line:]
+
+
+async def _watch_rss(pid, peak, interval):
+    while True:
+        rss = _peak_rss(pid)
+        if rss is not None:
+            peak[0] = max(peak[0] or 0, rss)
+        await asyncio.sleep(interval)
+
+
+async def _run_one(job, semaphore, on_stdout, on_stderr, rss_interval):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *job.args, cwd=job.cwd, env=job.env, preexec_fn=job.preexec_fn,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE)
+        except OSError as e:
+            return JobResult(job, None, time.perf_counter() - start, None, False, e)
+
+        peak = [None]
+        watcher = asyncio.ensure_future(_watch_rss(process.pid, peak, rss_interval))
+        streams = asyncio.gather(
+            _forward(process.stdout, on_stdout, job),
+            _forward(process.stderr, on_stderr, job),
+            process.wait())
+        timed_out = False
+        error = None
+        try:
+            await asyncio.wait_for(streams, job.timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+        except Exception as e:
+            # e.g. a callback raised; the job fails, the others go on
+            error = e
+            streams.cancel()
+        finally:
+            watcher.cancel()
+            # whatever happened, don't leave the child running or unreaped
+            if process.returncode is None:
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+            await process.wait()
+        return JobResult(job, process.returncode, time.perf_counter() - start,
+                         peak[0], timed_out, error)
+
+
+async def run_jobs_async(jobs, workers=None, on_stdout=None, on_stderr=None,
+                         rss_interval=.05):
+    semaphore = asyncio.Semaphore(workers or os.cpu_count() or 1)
+    return await asyncio.gather(*[
+        _run_one(job, semaphore, on_stdout, on_stderr, rss_interval) for job in jobs])
+
+
+def run_jobs(jobs, workers=None, on_stdout=None, on_stderr=None, rss_interval=.05):
+    """Run every job, at most `workers` at a time
+
+    Parameters
+    ----------
+    jobs : list of Job or list of list of str
+    workers : int, optional
+        defaults to the number of CPUs
+    on_stdout, on_stderr : function, optional
+        called with `(job, line)` for each line the job writes
+    rss_interval : float
+        seconds between memory samples
+
+    Returns
+    -------
+    list of JobResult
+        in the same order as `jobs`
+    """
+    jobs = [job if isinstance(job, Job) else Job(job) for job in jobs]
+    return asyncio.run(run_jobs_async(jobs, workers, on_stdout, on_stderr, rss_interval))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('scripts', nargs='+', help='python scripts to run')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--timeout', type=float)
+    args = parser.parse_args()
+
+    def show(job, line):
+        print("[{}] {}".format(job.name, line))
+
+    jobs = [Job([sys.executable, script], name=script, timeout=args.timeout)
+            for script in args.scripts]
+    for result in run_jobs(jobs, args.workers, show, show):
+        print(result)
@@ -0,0 +1,154 @@
+#!/bin/env python
+
+# Case-insensitive key lookups for large dicts.
+#
+# `k.lower() in f` only works if every key in `f` is already lowercase, and
+# `any(k.lower() == key.lower() for key in f)` looks at every key on every
+# call. A `CaseFoldedDict` wraps a dict and keeps an index from the
+# casefolded form of each key to the key itself, updated as keys are added
+# and removed, so a lookup costs one `casefold()` of the key being looked
+# up and a hash lookup or two.
+#
+# Keys that are already casefolded, like the lowercase keys the challenge
+# promises, are their own index entry, so only the other keys take up
+# room in the index.
+
+from collections.abc import MutableMapping
+
+
+def fold(key):
+    """`key.casefold()` for strings; other keys, like ints and tuples, are
+    matched as they are"""
+    return key.casefold() if isinstance(key, str) else key
+
+
+# found no key; None is a key like any other
+_MISSING = object()
+
+
+class CaseFoldedDict(MutableMapping):
+    """A dict whose lookups ignore case
+
+    Setting, deleting, iterating and `len` work on the exact keys, like a
+    dict. `in`, `[]` and `get` ignore the case of string keys, and prefer an
+    exact match when there is one; other keys must match exactly.
+
+    Parameters
+    ----------
+    data : dict, optional
+        wrapped, not copied; change it through this object from now on, or
+        the index goes stale
+
+    >>> f = CaseFoldedDict({'fl' : 1, 'ca' : 1})
+    >>> 'Ca' in f, 'R' in f
+    (True, False)
+    >>> f['Straße'] = 2
+    >>> f['STRASSE']
+    2
+    """
+
+    def __init__(self, data=None):
+        self.data = {} if data is None else data
+        # casefolded key -> the keys that fold to it but are not folded
+        self._index = {}
+        for key in self.data:
+            self._add(key)
+
+    def _add(self, key):
+        folded = fold(key)
+        if folded != key:
+            self._index.setdefault(folded, []).append(key)
+
+    def _remove(self, key):
+        folded = fold(key)
+        if folded != key:
+            keys = self._index[folded]
+            keys.remove(key)
+            if not keys:
+                del self._index[folded]
+
+    def _find(self, key):
+        if key in self.data:
+            return key
+        folded = fold(key)
+        if folded in self.data:
+            return folded
+        keys = self._index.get(folded)
+        return keys[0] if keys else _MISSING
+
+    def find(self, key):
+        """The key in the dict that matches `key` ignoring case, or None"""
+        found = self._find(key)
+        return None if found is _MISSING else found
+
+    def __contains__(self, key):
+        return self._find(key) is not _MISSING
+
+    def __getitem__(self, key):
+        found = self._find(key)
+        if found is _MISSING:
+            raise KeyError(key)
+        return self.data[found]
+
+    def __setitem__(self, key, value):
+        if key not in self.data:
+            self._add(key)
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self._remove(key)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return 'CaseFoldedDict({!r})'.format(self.data)
+
+
+def dict_key_check(k, f):
+    """Whether `k` is a key of `f`, ignoring case
+
+    A plain dict must have casefolded keys, like the lowercase keys the
+    challenge promises; wrap it in a `CaseFoldedDict` once for keys in any
+    case.
+
+    >>> dict_key_check('FL', {'fl' : 1}), dict_key_check('FL', CaseFoldedDict({'Fl' : 1}))
+    (True, True)
+    >>> dict_key_check(1, {1 : 'one'})
+    True
+    """
+    if isinstance(f, CaseFoldedDict):
+        return k in f
+    return fold(k) in f
+
+
+if __name__ == '__main__':
+    import argparse
+    import random
+    import time
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=1000000, help='number of keys')
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    data = {'Key{}'.format(i) : i for i in range(args.n)}
+    queries = ['KEY{}'.format(rng.randrange(2 * args.n)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    f = CaseFoldedDict(data)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    found = sum(q in f for q in queries)
+    indexed = time.perf_counter() - start
+    start = time.perf_counter()
+    for q in queries[:3]:
+        assert (q.casefold() in {key.casefold() for key in data}) == (q in f)
+    scanned = (time.perf_counter() - start) / 3 * len(queries)
+    print("{} of {} found; index built in {:.3f}s, queries took {:.6f}s "
+          "(about {:.3f}s folding every key on every call)".format(
+              found, len(queries), built, indexed, scanned))
@@ -0,0 +1,139 @@
+#!/bin/env python
+
+# Importing nltk, textblob and gensim takes seconds, which is longer than
+# most of our hourly jobs spend doing actual work. The objects in this
+# module stand in for those libraries and only import them the first time
+# one of their attributes is used, e.g.
+#
+#     from lazy import nltk
+#     nltk.word_tokenize(document)  # nltk is imported here
+
+import importlib
+import os
+import re
+import subprocess
+import sys
+import time
+
+
+class LazyModule(object):
+    """Proxy for a module that is imported on first attribute access
+
+    Double-underscore names are not looked up until the module has been
+    imported, so tools that probe an object for `__wrapped__` or the like,
+    such as doctest and inspect, do not import it.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        if attr.startswith('__') and attr.endswith('__') and not self.loaded:
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return "<lazy module '{}' ({})>".format(self._name, state)
+
+
+def lazy_import(name):
+    """Return the module if it has already been imported, otherwise a proxy
+    that imports it when it is first used"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+nltk = lazy_import('nltk')
+textblob = lazy_import('textblob')
+gensim = lazy_import('gensim')
+
+
+# -X importtime writes lines like
+# import time:       self [us] | cumulative | imported package
+# import time:       1043 |       5521 |   encodings
+P_IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def parse_importtime(stderr):
+    """Collect the cumulative import cost of each top-level import
+
+    Returns
+    -------
+    list of tuple
+        (module name, cumulative microseconds), slowest first
+    """
+    top = []
+    for line in stderr.split('\n'):
+        match = P_IMPORTTIME.match(line)
+        # nested imports are indented by two spaces per level
+        if match and len(match.group(3)) == 1:
+            top.append((match.group(4), int(match.group(2))))
+    return sorted(top, key=lambda x: x[1], reverse=True)
+
+
+def measure(entry_point, python=sys.executable):
+    """Run an entry point in a fresh interpreter and report its startup cost
+
+    Parameters
+    ----------
+    entry_point : str
+        path to a script, or the name of a module to import
+
+    Returns
+    -------
+    dict
+        wall time in seconds, total import time in seconds, and the
+        top-level imports ordered by cost
+    """
+    if os.path.isfile(entry_point):
+        directory, script = os.path.split(os.path.abspath(entry_point))
+        command = [python, '-X', 'importtime', script]
+    else:
+        directory = None
+        command = [python, '-X', 'importtime', '-c', 'import ' + entry_point]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=directory, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    wall = time.perf_counter() - start
+    imports = parse_importtime(result.stderr)
+    return {
+        'entry_point' : entry_point,
+        'returncode' : result.returncode,
+        'wall' : wall,
+        'imports' : sum(us for _, us in imports) / 1e6,
+        'slowest' : imports,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('entry_points', nargs='+',
+                        help='scripts to run or modules to import')
+    parser.add_argument('--top', type=int, default=5,
+                        help='number of slowest imports to show')
+    args = parser.parse_args()
+
+    for entry_point in args.entry_points:
+        report = measure(entry_point)
+        print("{entry_point}: {wall:.3f}s wall, {imports:.3f}s importing".format(**report))
+        for name, us in report['slowest'][:args.top]:
+            print("    {:>10.1f} ms  {}".format(us / 1000, name))
@@ -0,0 +1,137 @@
+#!/bin/env python
+
+# Random access to the lines of very large text files.
+#
+# `f.read().split('\n')` decodes and copies the whole file to answer
+# `len(lines)` or `lines[0:10]`. A `LineIndex` scans the file once for
+# newlines and saves their offsets next to it, then reads individual lines
+# out of a memory map on demand. The saved index is rebuilt automatically
+# when the file's size or modification time changes, and is kept in memory
+# instead when the file's directory cannot be written to.
+
+import mmap
+import os
+
+import numpy as np
+
+SUFFIX = '.lineidx.npy'
+
+
+def scan(fp, block_size=1 << 26):
+    """Offsets of every newline in a file, found one block at a time"""
+    size = os.path.getsize(fp)
+    if not size:
+        return np.empty(0, dtype=np.int64)
+    found = []
+    with open(fp, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        for start in range(0, size, block_size):
+            block = np.frombuffer(m, dtype=np.uint8, count=min(block_size, size - start),
+                                  offset=start)
+            found.append(np.flatnonzero(block == ord('\n')) + start)
+            del block
+    return np.concatenate(found).astype(np.int64)
+
+
+class LineIndex(object):
+    """Sequence of the lines of a file, like `f.read().split('\\n')`
+
+    As when a file is read in text mode, the '\\r' of a '\\r\\n' line ending
+    is not part of the line. Unlike text mode, a '\\r' on its own does not
+    end a line.
+
+    Parameters
+    ----------
+    fp : str
+        text file to index
+    encoding : str
+        used to decode each line as it is read
+    persist : bool
+        save the index as `fp + '.lineidx.npy'` and reuse it while the file
+        is unchanged; the saved index is read through a memory map as well
+
+    >>> lines = LineIndex('../data/01_lorem-ipsum.txt', persist=False)
+    >>> len(lines) == len(open('../data/01_lorem-ipsum.txt').read().split('\\n'))
+    True
+    """
+
+    def __init__(self, fp, encoding='utf-8', persist=True):
+        self.fp = fp
+        self.encoding = encoding
+        self.index_fp = fp + SUFFIX
+        stat = os.stat(fp)
+        self.size = stat.st_size
+        self.stamp = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        self.newlines = self._load() if persist else None
+        if self.newlines is None:
+            self.newlines = scan(fp)
+            if persist:
+                try:
+                    np.save(self.index_fp, np.concatenate([self.stamp, self.newlines]))
+                except OSError:
+                    # e.g. a read-only directory; keep the index in memory
+                    pass
+                else:
+                    # and read it back through a memory map
+                    saved = self._load()
+                    if saved is not None:
+                        self.newlines = saved
+        self._file = open(fp, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+    def _load(self):
+        try:
+            saved = np.load(self.index_fp, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if len(saved) < 2 or not (saved[:2] == self.stamp).all():
+            return None
+        return saved[2:]
+
+    def __len__(self):
+        return len(self.newlines) + 1
+
+    def _line(self, i):
+        # line i runs from just after newline i - 1 up to newline i
+        start = int(self.newlines[i - 1]) + 1 if i else 0
+        end = int(self.newlines[i]) if i < len(self.newlines) else self.size
+        if end > start and self._map[end - 1] == ord('\r'):
+            end -= 1
+        return self._map[start:end].decode(self.encoding)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._line(i) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError('line index out of range')
+        return self._line(key)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._line(i)
+
+    def close(self):
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('fp', help='text file to index')
+    parser.add_argument('start', type=int, nargs='?', default=0)
+    parser.add_argument('stop', type=int, nargs='?', default=10)
+    args = parser.parse_args()
+
+    with LineIndex(args.fp) as lines:
+        print("{} lines".format(len(lines)))
+        for line in lines[args.start:args.stop]:
+            print(line)
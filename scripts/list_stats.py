@@ -0,0 +1,179 @@
+#!/bin/env python
+
+# The list challenges, for lists with millions of elements.
+#
+# `a.count(1)`, `sum(b) / len(b)` and `len([x for x in c if x < 3])` each
+# walk the list once in the interpreter. Here, the values are taken in
+# blocks of NumPy arrays, and all three statistics are computed from each
+# block while it is in cache. NumPy arrays and `array.array`s are used
+# without copying, which is where the speedup is. Lists are converted a
+# block at a time, which costs about as much as the plain expressions save,
+# so they are only marginally faster. Generators are consumed once, a block
+# at a time, so they are never held in memory, and each block is summarized
+# with the plain expressions, since converting it would not pay off.
+#
+# Integer sums are exact: each block is summed as int64 when that cannot
+# overflow, and as Python integers when it could.
+
+import array
+from itertools import islice
+
+import numpy as np
+
+BLOCK_SIZE = 1 << 16
+
+
+def _as_array(values):
+    if isinstance(values, np.ndarray):
+        return values.ravel()
+    if isinstance(values, array.array):
+        return np.frombuffer(values, dtype=values.typecode)
+    # integers too large for int64 become an object array of Python ints
+    return np.array(values)
+
+
+def blocks(values, block_size=BLOCK_SIZE):
+    """Yield `values` as one-dimensional arrays of at most `block_size`
+    elements"""
+    if isinstance(values, (np.ndarray, array.array)):
+        values = _as_array(values)
+    if isinstance(values, (np.ndarray, list, tuple)):
+        for start in range(0, len(values), block_size):
+            yield _as_array(values[start:start + block_size])
+        return
+    iterator = iter(values)
+    while True:
+        chunk = list(islice(iterator, block_size))
+        if not chunk:
+            return
+        yield _as_array(chunk)
+
+
+def block_sum(block):
+    """Exact sum of a numpy block, as a Python int for integer blocks, even
+    where it would overflow int64"""
+    if block.dtype.kind == 'f':
+        return float(block.sum(dtype=np.float64))
+    if block.dtype.kind in 'iub':
+        if block.dtype.itemsize > 4:
+            # int64 or uint64: the sum may not fit in int64
+            largest = max(abs(int(block.min())), abs(int(block.max())))
+            if largest * len(block) >= 1 << 63:
+                return sum(block.tolist())
+        return int(block.sum(dtype=np.int64))
+    return block.sum()
+
+
+class ListStats(object):
+    """Count, total and threshold counts of a stream of numbers
+
+    Parameters
+    ----------
+    value : number
+        `equal` counts the elements equal to this
+    threshold : number
+        `less` counts the elements smaller than this
+
+    >>> stats = summarize([1, 8, 6, 7, 5, 3, 0, 9, 1])
+    >>> stats.n, stats.equal, stats.less, stats.mean
+    (9, 2, 3, 4.444444444444445)
+    """
+
+    def __init__(self, value=1, threshold=3):
+        self.value = value
+        self.threshold = threshold
+        self.n = 0
+        self.equal = 0
+        self.less = 0
+        self.total = 0
+
+    def update(self, block):
+        """Add the numbers in the array `block`"""
+        if not len(block):
+            return self
+        self.n += len(block)
+        self.equal += int(np.count_nonzero(block == self.value))
+        self.less += int(np.count_nonzero(block < self.threshold))
+        self.total += block_sum(block)
+        return self
+
+    def update_list(self, values):
+        """Add the numbers in the Python list `values`, without NumPy"""
+        self.n += len(values)
+        self.equal += values.count(self.value)
+        self.less += len([x for x in values if x < self.threshold])
+        self.total += sum(values)
+        return self
+
+    def merge(self, other):
+        """Combine with the stats of another stream, in place"""
+        self.n += other.n
+        self.equal += other.equal
+        self.less += other.less
+        self.total += other.total
+        return self
+
+    @property
+    def mean(self):
+        """Mean of the numbers, or nan if there were none"""
+        if not self.n:
+            return float('nan')
+        # true division of Python ints is correctly rounded
+        return self.total / self.n
+
+    def __repr__(self):
+        return "<ListStats n={} equal={} less={} mean={}>".format(
+            self.n, self.equal, self.less, self.mean)
+
+
+def summarize(values, value=1, threshold=3, block_size=BLOCK_SIZE):
+    """`ListStats` of an iterable, NumPy array or `array.array` of numbers"""
+    stats = ListStats(value, threshold)
+    if isinstance(values, (np.ndarray, array.array, list, tuple)):
+        for block in blocks(values, block_size):
+            stats.update(block)
+        return stats
+    iterator = iter(values)
+    while True:
+        chunk = list(islice(iterator, block_size))
+        if not chunk:
+            return stats
+        stats.update_list(chunk)
+
+
+def count_equal(values, value=1):
+    """Number of elements equal to `value`, like `list.count`"""
+    return summarize(values, value=value).equal
+
+
+def mean(values):
+    """Mean of the elements, or nan if there are none"""
+    return summarize(values).mean
+
+
+def count_less(values, threshold=3):
+    """Number of elements smaller than `threshold`"""
+    return summarize(values, threshold=threshold).less
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=10000000,
+                        help='number of random integers to summarize')
+    args = parser.parse_args()
+
+    values = np.random.default_rng(0).integers(-5, 10, args.n)
+    as_list = values.tolist()
+    start = time.perf_counter()
+    expected = (as_list.count(1), sum(as_list) / len(as_list),
+                len([x for x in as_list if x < 3]))
+    python = time.perf_counter() - start
+    for name, data in [('ndarray', values), ('list', as_list),
+                       ('generator', (x for x in as_list))]:
+        start = time.perf_counter()
+        stats = summarize(data)
+        assert (stats.equal, stats.mean, stats.less) == expected
+        print("{:<10} {:.3f}s (python: {:.3f}s)".format(
+            name, time.perf_counter() - start, python))
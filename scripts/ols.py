@@ -0,0 +1,533 @@
+#!/bin/env python
+
+# Ordinary least squares from sufficient statistics.
+#
+# `smf.ols(formula, data).fit()` builds a fresh design matrix for every
+# model. Here, the design columns of every model we want are encoded once
+# and their cross products Z'Z are accumulated in a single pass over the
+# data, one chunk at a time. Each model is then solved from the rows and
+# columns of Z'Z that it uses, so fitting many nested or alternative models
+# costs about one pass over the data. Rows are accumulated separately for
+# each pattern of missing variables, and each model only uses the rows
+# where its own variables are present, as it would when fit on its own.
+# Heteroskedasticity-consistent covariances need each model's residuals,
+# so they take a second pass over the data once the coefficients are known.
+#
+# Formulas support `+`, `:`, `*` and `- 1`. Categorical variables are
+# treatment coded against their first level, with the same column names as
+# patsy, e.g. `gender[T.Male/Man]` and `outside_barriers:gender[T.Male/Man]`.
+# Like patsy, a formula without an intercept codes its first categorical
+# main effect with one column per level instead, e.g. `gender[Male/Man]`.
+
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+INTERCEPT = 'Intercept'
+
+
+def parse_formula(formula):
+    """Split a formula into its outcome and a list of terms
+
+    Each term is a tuple of variable names; the intercept is the empty
+    tuple.
+
+    >>> parse_formula('y ~ x * g')
+    ('y', [(), ('x',), ('g',), ('x', 'g')])
+    """
+    outcome, _, rhs = formula.partition('~')
+    outcome = outcome.strip()
+    if not outcome or not rhs.strip():
+        raise ValueError("formula must look like 'outcome ~ terms', not '{}'".format(formula))
+    terms = [()]
+    for piece in rhs.replace('-', '+-').split('+'):
+        piece = piece.replace(' ', '')
+        if not piece or piece == '1':
+            continue
+        if piece in ('-1', '0', '-0'):
+            if () in terms:
+                terms.remove(())
+            continue
+        factors = [factor.strip() for factor in piece.split('*')]
+        for size in range(1, len(factors) + 1):
+            for combination in itertools.combinations(factors, size):
+                term = tuple(name.strip() for part in combination for name in part.split(':'))
+                if term not in terms:
+                    terms.append(term)
+    return outcome, terms
+
+
+class Design(object):
+    """Encodes chunks of a data frame into the design columns of a set of
+    formulas
+
+    Parameters
+    ----------
+    formulas : list of str
+    levels : dict, optional
+        variable -> list of levels for every categorical variable; the
+        first level is the reference. Values outside the list are treated
+        as missing.
+    """
+
+    def __init__(self, formulas, levels=None):
+        self.levels = {name : list(values) for name, values in (levels or {}).items()}
+        self.models = {}
+        self.model_variables = {}
+        self.columns = [INTERCEPT]
+        self.variables = []
+        for formula in formulas:
+            outcome, terms = parse_formula(formula)
+            full = None
+            if () not in terms:
+                full = next((term for term in terms
+                             if len(term) == 1 and term[0] in self.levels), None)
+            names = []
+            for term in terms:
+                names.extend(self.term_columns(term, full=term == full))
+            self.models[formula] = (outcome, names)
+            for name in names + [outcome]:
+                if name not in self.columns:
+                    self.columns.append(name)
+            variables = [outcome] + [v for term in terms for v in term]
+            self.model_variables[formula] = frozenset(variables)
+            for variable in variables:
+                if variable not in self.variables:
+                    self.variables.append(variable)
+        self.positions = {name : i for i, name in enumerate(self.columns)}
+
+    def factor_columns(self, variable, full=False):
+        if variable not in self.levels:
+            return [variable]
+        if full:
+            return ['{}[{}]'.format(variable, level) for level in self.levels[variable]]
+        return ['{}[T.{}]'.format(variable, level) for level in self.levels[variable][1:]]
+
+    def term_columns(self, term, full=False):
+        if not term:
+            return [INTERCEPT]
+        return [':'.join(parts) for parts in
+                itertools.product(*[self.factor_columns(v, full) for v in term])]
+
+    def encode(self, frame):
+        """Return the design matrix of `frame`, with one column per entry in
+        `self.columns`, and a boolean array of which of `self.variables`
+        are missing in each row
+
+        Missing values are encoded as 0, so the columns that use them are
+        meaningless in those rows.
+        """
+        factors = {}
+        missing = np.zeros((len(frame), len(self.variables)), dtype=bool)
+        for i, variable in enumerate(self.variables):
+            if variable in self.levels:
+                codes = pd.Categorical(frame[variable], categories=self.levels[variable]).codes
+                missing[:, i] = codes < 0
+                for j, name in enumerate(self.factor_columns(variable, full=True)):
+                    factors[name] = (codes == j).astype(np.float64)
+                for j, name in enumerate(self.factor_columns(variable), 1):
+                    factors[name] = factors[name.replace('[T.', '[', 1)]
+            else:
+                values = pd.to_numeric(frame[variable], errors='coerce').to_numpy(np.float64)
+                missing[:, i] = np.isnan(values)
+                factors[variable] = np.where(missing[:, i], 0., values)
+        design = np.empty((len(frame), len(self.columns)), dtype=np.float64)
+        for i, name in enumerate(self.columns):
+            column = np.ones(len(frame))
+            if name != INTERCEPT:
+                for part in name.split(':'):
+                    column = column * factors[part]
+            design[:, i] = column
+        return design, missing
+
+    def patterns(self, frame):
+        """Yield the set of missing variables and the design matrix of the
+        rows with that set, for each set found in `frame`"""
+        design, missing = self.encode(frame)
+        found, inverse = np.unique(missing, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        variables = np.array(self.variables, dtype=object)
+        for i, pattern in enumerate(found):
+            yield frozenset(variables[pattern]), design[inverse == i]
+
+
+class CrossProducts(object):
+    """Running Z'Z over chunks of a design matrix"""
+
+    def __init__(self, width):
+        self.n = 0
+        self.width = width
+        self.zz = np.zeros((width, width))
+
+    def update(self, design):
+        self.n += len(design)
+        self.zz += design.T @ design
+        return self
+
+    def merge(self, other):
+        self.n += other.n
+        self.zz += other.zz
+        return self
+
+    def gram(self, rows, columns=None):
+        columns = rows if columns is None else columns
+        return self.zz[np.ix_(rows, columns)]
+
+    def solve(self, x, y):
+        """Coefficients of column `y` on columns `x`, the pseudo-inverse of
+        X'X, the sum of squared residuals and the rank of X"""
+        xtx_pinv = np.linalg.pinv(self.gram(x))
+        xty = self.gram(x, [y])[:, 0]
+        params = xtx_pinv @ xty
+        ssr = self.gram([y])[0, 0] - params @ xty
+        return params, xtx_pinv, ssr, self.rank(x)
+
+    def rank(self, columns):
+        return np.linalg.matrix_rank(self.gram(columns))
+
+    def tss(self, y, intercept=None):
+        """Sum of squares of column `y`, about its mean if the column of
+        ones `intercept` is given"""
+        yty = self.gram([y])[0, 0]
+        if intercept is None:
+            return yty
+        sum_y = self.gram([intercept], [y])[0, 0]
+        return yty - sum_y * sum_y / self.n
+
+
+class QRProducts(CrossProducts):
+    """Running R factor of the QR decomposition of a design matrix
+
+    Each chunk is stacked under the current R and factored again, so only
+    a (width x width) triangle is kept. Solving from R avoids squaring the
+    condition number the way the normal equations do.
+    """
+
+    def __init__(self, width):
+        self.n = 0
+        self.width = width
+        self.r = np.zeros((0, width))
+
+    def update(self, design):
+        self.n += len(design)
+        self.r = np.linalg.qr(np.vstack([self.r, design]), mode='r')
+        return self
+
+    def merge(self, other):
+        self.n += other.n
+        self.r = np.linalg.qr(np.vstack([self.r, other.r]), mode='r')
+        return self
+
+    def gram(self, rows, columns=None):
+        columns = rows if columns is None else columns
+        return self.r[:, rows].T @ self.r[:, columns]
+
+    def solve(self, x, y):
+        # [X y] = Q R, so the R factor of [X y] is the R factor of R[:, x + y].
+        # The residuals are what the first k rows of R leave unexplained
+        # (nothing, unless X is rank deficient) plus the last diagonal entry
+        r = np.linalg.qr(self.r[:, list(x) + [y]], mode='r')
+        k = len(x)
+        rx_pinv = np.linalg.pinv(r[:k, :k])
+        params = rx_pinv @ r[:k, k]
+        left = r[:k, k] - r[:k, :k] @ params
+        ssr = left @ left + (r[k, k] ** 2 if len(r) > k else 0.)
+        return params, rx_pinv @ rx_pinv.T, ssr, np.linalg.matrix_rank(r[:k, :k])
+
+    def rank(self, columns):
+        # R[:, columns] has the singular values of the design columns
+        return np.linalg.matrix_rank(self.r[:, columns])
+
+    def tss(self, y, intercept=None):
+        if intercept is None:
+            return float(self.r[:, y] @ self.r[:, y])
+        r = np.linalg.qr(self.r[:, [intercept, y]], mode='r')
+        return r[1, 1] ** 2 if len(r) > 1 else 0.
+
+
+class OLSResult(object):
+    """The parts of a statsmodels `RegressionResults` that can be computed
+    from cross products"""
+
+    def __init__(self, formula, outcome, names, params, cov_params, nobs,
+                 rank, ssr, tss, has_constant, cov_type):
+        self.formula = formula
+        self.outcome = outcome
+        self.params = pd.Series(params, index=names)
+        self.cov_params = pd.DataFrame(cov_params, index=names, columns=names)
+        self.nobs = nobs
+        self.df_model = rank - has_constant
+        self.df_resid = nobs - rank
+        self.ssr = ssr
+        self.tss = tss
+        self.has_constant = has_constant
+        self.cov_type = cov_type
+        self.bse = pd.Series(np.sqrt(np.diag(cov_params)), index=names)
+        self.tvalues = self.params / self.bse
+        self.pvalues = pd.Series(2 * stats.t.sf(np.abs(self.tvalues), self.df_resid), index=names)
+
+    @property
+    def rsquared(self):
+        """Centered if the model has an explicit or implicit constant,
+        uncentered otherwise"""
+        return 1 - self.ssr / self.tss
+
+    @property
+    def rsquared_adj(self):
+        return 1 - (self.nobs - self.has_constant) / self.df_resid * (1 - self.rsquared)
+
+    def summary_frame(self):
+        return pd.DataFrame({
+            'coef' : self.params,
+            'std err' : self.bse,
+            't' : self.tvalues,
+            'P>|t|' : self.pvalues,
+        })
+
+    def __repr__(self):
+        return "<OLSResult '{}' nobs={} R2={:.4f}>".format(self.formula, self.nobs, self.rsquared)
+
+
+class MomentOLS(object):
+    """Fit many OLS formulas from one pass over the data
+
+    Each formula is fit on the rows where none of its own variables are
+    missing, like statsmodels, so its results do not depend on the other
+    formulas fit with it.
+
+    HC0/HC1 covariances need a second pass over the same data with
+    `update_meat`, after every `update`, which sums x x' e**2 over the
+    residuals e of each formula.
+
+    Parameters
+    ----------
+    formulas : list of str
+    levels : dict, optional
+        see `Design`
+    method : {'normal', 'qr'}
+        accumulate the normal equations, or a QR factorization
+    """
+
+    def __init__(self, formulas, levels=None, method='normal'):
+        if method not in ('normal', 'qr'):
+            raise ValueError("method must be 'normal' or 'qr', not '{}'".format(method))
+        self.design = Design(formulas, levels)
+        self.accumulator = QRProducts if method == 'qr' else CrossProducts
+        # set of missing variables -> moments of the rows with that set
+        self.moments = {}
+        # formula -> sum(x x' e**2), once the second pass has started
+        self.meats = None
+        self._coefficients = {}
+
+    def _new_moments(self):
+        return self.accumulator(len(self.design.columns))
+
+    def _columns(self, formula):
+        outcome, names = self.design.models[formula]
+        positions = self.design.positions
+        return [positions[name] for name in names], positions[outcome]
+
+    def update(self, frame):
+        if self.meats is not None:
+            raise ValueError('update() after update_meat(): the coefficients are already fixed')
+        usable = self.design.model_variables.values()
+        for pattern, design in self.design.patterns(frame):
+            if any(pattern.isdisjoint(variables) for variables in usable):
+                if pattern not in self.moments:
+                    self.moments[pattern] = self._new_moments()
+                self.moments[pattern].update(design)
+        return self
+
+    def merge(self, other):
+        if self.meats is not None or other.meats is not None:
+            raise ValueError('engines can only be merged before update_meat()')
+        for pattern, moments in other.moments.items():
+            if pattern in self.moments:
+                self.moments[pattern].merge(moments)
+            else:
+                self.moments[pattern] = moments
+        return self
+
+    def complete(self, formula):
+        """Moments of the rows where none of the variables of `formula` are
+        missing"""
+        variables = self.design.model_variables[formula]
+        moments = self._new_moments()
+        for pattern, found in self.moments.items():
+            if pattern.isdisjoint(variables):
+                moments.merge(found)
+        return moments
+
+    def update_meat(self, frame):
+        """Second pass: add the rows of `frame` to sum(x x' e**2) of each
+        formula, where e are its residuals
+
+        The coefficients are fixed by the first call, from what `update`
+        has seen until then.
+        """
+        if self.meats is None:
+            self.meats = {}
+            for formula in self.design.models:
+                params = self._coefficients[formula] = self._solve(formula)[0]
+                self.meats[formula] = np.zeros((len(params), len(params)))
+        design, missing = self.design.encode(frame)
+        variables = {v : i for i, v in enumerate(self.design.variables)}
+        for formula, meat in self.meats.items():
+            used = [variables[v] for v in self.design.model_variables[formula]]
+            rows = design[~missing[:, used].any(axis=1)]
+            x, y = self._columns(formula)
+            weighted = rows[:, x] * (rows[:, y] - rows[:, x] @ self._coefficients[formula])[:, None]
+            meat += weighted.T @ weighted
+        return self
+
+    def _solve(self, formula):
+        x, y = self._columns(formula)
+        moments = self.complete(formula)
+        if not moments.n:
+            raise ValueError("no rows without missing values for '{}'".format(formula))
+        return moments.solve(x, y) + (moments,)
+
+    def fit(self, formula, cov_type='nonrobust'):
+        """Solve one of the formulas
+
+        Parameters
+        ----------
+        formula : str
+        cov_type : {'nonrobust', 'HC0', 'HC1'}
+            HC1 is what `get_robustcov_results()` uses by default. HC2 and
+            HC3 need per-row leverages, which cross products do not keep.
+        """
+        if cov_type not in ('nonrobust', 'HC0', 'HC1'):
+            raise ValueError("cov_type must be 'nonrobust', 'HC0' or 'HC1', not '{}'".format(cov_type))
+        if cov_type != 'nonrobust' and self.meats is None:
+            raise ValueError("robust covariances need a second pass over the data with update_meat()")
+        outcome, names = self.design.models[formula]
+        x, y = self._columns(formula)
+        params, xtx_pinv, ssr, rank, moments = self._solve(formula)
+        n = moments.n
+        # a model has an implicit constant when adding one does not add rank
+        intercept = self.design.positions[INTERCEPT]
+        has_constant = intercept in x or moments.rank([intercept] + x) == rank
+        tss = moments.tss(y, intercept if has_constant else None)
+
+        if cov_type == 'nonrobust':
+            cov_params = xtx_pinv * ssr / (n - rank)
+        else:
+            cov_params = xtx_pinv @ self.meats[formula] @ xtx_pinv
+            if cov_type == 'HC1':
+                cov_params *= n / (n - rank)
+        return OLSResult(formula, outcome, names, params, cov_params, n, rank,
+                         ssr, tss, int(has_constant), cov_type)
+
+    def fit_all(self, cov_type='nonrobust'):
+        return {formula : self.fit(formula, cov_type) for formula in self.design.models}
+
+
+def _predictors(formulas):
+    variables = []
+    for formula in formulas:
+        outcome, terms = parse_formula(formula)
+        for variable in [v for term in terms for v in term]:
+            if variable not in variables:
+                variables.append(variable)
+    return variables
+
+
+def levels_of(frame, formulas):
+    """Sorted levels of the non-numeric variables used in `formulas`, which
+    is how patsy picks them"""
+    return {v : sorted(frame[v].dropna().unique()) for v in _predictors(formulas)
+            if not pd.api.types.is_numeric_dtype(frame[v])}
+
+
+def fit_formulas(data, formulas, cov_type='nonrobust', chunksize=100000):
+    """Fit every formula on an in-memory data frame in one pass"""
+    engine = MomentOLS(formulas, levels_of(data, formulas))
+    for start in range(0, len(data), chunksize):
+        engine.update(data.iloc[start:start + chunksize])
+    if cov_type != 'nonrobust':
+        for start in range(0, len(data), chunksize):
+            engine.update_meat(data.iloc[start:start + chunksize])
+    return engine.fit_all(cov_type)
+
+
+def _variables(formulas):
+    variables = _predictors(formulas)
+    for formula in formulas:
+        outcome = parse_formula(formula)[0]
+        if outcome not in variables:
+            variables.append(outcome)
+    return variables
+
+
+def csv_levels(fp, formulas, chunksize=1000000, **kwargs):
+    """Find the levels of the non-numeric predictors in a csv with a pass
+    that reads only those columns"""
+    predictors = _predictors(formulas)
+    sample = pd.read_csv(fp, usecols=predictors, nrows=chunksize, **kwargs)
+    categorical = [v for v in predictors if not pd.api.types.is_numeric_dtype(sample[v])]
+    levels = {v : set() for v in categorical}
+    if categorical:
+        for chunk in pd.read_csv(fp, usecols=categorical, chunksize=chunksize, **kwargs):
+            for v in categorical:
+                levels[v].update(chunk[v].dropna().unique())
+    return {v : sorted(values) for v, values in levels.items()}
+
+
+def ols_csv(fp, formulas, levels=None, cov_type='nonrobust', method='qr',
+            chunksize=1000000, **kwargs):
+    """Fit every formula on a csv that does not fit in memory
+
+    Parameters
+    ----------
+    fp : str
+        csv with the variables
+    formulas : list of str
+    levels : dict, optional
+        variable -> list of levels for the categorical predictors, with
+        the reference level first; found with an extra pass over the
+        categorical columns when not given
+    cov_type : {'nonrobust', 'HC0', 'HC1'}
+        the robust covariances read the file a second time
+    method : {'qr', 'normal'}
+        see `MomentOLS`
+    chunksize : int
+        number of rows to hold in memory at once
+    **kwargs
+        passed to `pd.read_csv`
+
+    Returns
+    -------
+    dict
+        formula -> `OLSResult`
+    """
+    if isinstance(formulas, str):
+        formulas = [formulas]
+    if levels is None:
+        levels = csv_levels(fp, formulas, chunksize, **kwargs)
+    engine = MomentOLS(formulas, levels, method=method)
+    for chunk in pd.read_csv(fp, usecols=_variables(formulas), chunksize=chunksize, **kwargs):
+        engine.update(chunk)
+    if cov_type != 'nonrobust':
+        for chunk in pd.read_csv(fp, usecols=_variables(formulas), chunksize=chunksize, **kwargs):
+            engine.update_meat(chunk)
+    return engine.fit_all(cov_type)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('fp', help='csv file with the variables')
+    parser.add_argument('formulas', nargs='+')
+    parser.add_argument('--cov-type', default='nonrobust')
+    parser.add_argument('--method', default='qr')
+    parser.add_argument('--chunksize', type=int, default=1000000)
+    args = parser.parse_args()
+
+    results = ols_csv(args.fp, args.formulas, cov_type=args.cov_type,
+                      method=args.method, chunksize=args.chunksize)
+    for formula, result in results.items():
+        print(result)
+        print(result.summary_frame().to_string())
@@ -0,0 +1,174 @@
+#!/bin/env python
+
+# Find syntax errors without running anything.
+#
+# A solution that does not compile still costs a pytest process, an
+# import and a screenful of traceback to find out. `precheck` compiles
+# every file instead, in parallel, and reports the exact line and column of
+# each syntax error. Results are remembered by a hash of the file's
+# contents, so the same broken stub handed in by a whole class is only
+# compiled once.
+
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+CACHE = '.precheck_cache.json'
+
+
+class SyntaxProblem(object):
+    """Where and why a file does not compile"""
+
+    def __init__(self, fp, lineno, offset, message, text=None):
+        self.fp = fp
+        self.lineno = lineno
+        self.offset = offset
+        self.message = message
+        self.text = text
+
+    def to_dict(self):
+        return {'lineno' : self.lineno, 'offset' : self.offset,
+                'message' : self.message, 'text' : self.text}
+
+    def __str__(self):
+        if self.lineno is None:
+            return "{}: {}".format(os.path.basename(self.fp), self.message)
+        return "{}:{}:{}: {}".format(os.path.basename(self.fp), self.lineno,
+                                     self.offset, self.message)
+
+    def __repr__(self):
+        return "<SyntaxProblem '{}'>".format(self)
+
+
+def check_source(source, fp='<string>'):
+    """The `SyntaxProblem` in `source` (bytes or str), or None
+
+    >>> print(check_source('def f()\\n    pass\\n', 'f.py'))
+    f.py:1:8: expected ':'
+    """
+    try:
+        compile(source, fp, 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        return SyntaxProblem(fp, e.lineno, e.offset, e.msg, (e.text or '').rstrip() or None)
+    except ValueError as e:
+        # e.g. null bytes in the source
+        return SyntaxProblem(fp, None, None, str(e))
+    except (MemoryError, RecursionError) as e:
+        # pathological nesting, e.g. thousands of unary minuses, exhausts the
+        # parser; the file will not import either
+        return SyntaxProblem(fp, None, None, 'too deeply nested to compile ({})'.format(
+            type(e).__name__))
+    return None
+
+
+def _check(item):
+    return check_source(*item)
+
+
+def digest(source):
+    """Cache key of `source`; the grammar depends on the Python version"""
+    return hashlib.sha256(sys.version.encode('utf-8') + b'\0' + source).hexdigest()
+
+
+class SyntaxCache(object):
+    """Precheck results by `digest`, stored as JSON in `fp` (or only in
+    memory if `fp` is None)"""
+
+    def __init__(self, fp=None):
+        self.fp = fp
+        self.entries = {}
+        if fp is not None:
+            try:
+                with open(fp, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, fp):
+        entry = self.entries[key]
+        return None if entry is None else SyntaxProblem(fp, **entry)
+
+    def add(self, key, problem):
+        self.entries[key] = None if problem is None else problem.to_dict()
+
+    def save(self):
+        if self.fp is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.fp))
+        with tempfile.NamedTemporaryFile('w', dir=directory, delete=False) as f:
+            json.dump(self.entries, f)
+        os.replace(f.name, self.fp)
+
+
+def precheck(fps, processes=None, cache=None, pool_threshold=64):
+    """Compile every file in `fps`
+
+    Parameters
+    ----------
+    fps : list of str
+    processes : int, optional
+        worker processes; defaults to the number of CPUs
+    cache : SyntaxCache, optional
+        files whose contents are found here are not compiled again
+    pool_threshold : int
+        fewer files than this are compiled in this process, since starting
+        workers costs more than compiling a handful of files
+
+    Returns
+    -------
+    dict
+        the `SyntaxProblem`, or None, of each file
+    """
+    cache = cache if cache is not None else SyntaxCache()
+    keys = {}
+    todo = {}
+    for fp in fps:
+        with open(fp, 'rb') as f:
+            source = f.read()
+        keys[fp] = digest(source)
+        if keys[fp] not in cache:
+            todo.setdefault(keys[fp], (source, fp))
+
+    items = list(todo.values())
+    processes = processes or os.cpu_count() or 1
+    if processes > 1 and len(items) >= pool_threshold:
+        with ProcessPoolExecutor(processes) as pool:
+            problems = list(pool.map(_check, items,
+                                     chunksize=max(1, len(items) // (4 * processes))))
+    else:
+        problems = [_check(item) for item in items]
+    for key, problem in zip(todo, problems):
+        cache.add(key, problem)
+    cache.save()
+    return {fp : cache.get(key, fp) for fp, key in keys.items()}
+
+
+if __name__ == '__main__':
+    import argparse
+    from walk import scan
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='+', help='python files or directories')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--cache', help='file to remember results in')
+    args = parser.parse_args()
+
+    fps = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            fps.extend(sorted(entry.path for entry in scan(path, include='*.py')))
+        else:
+            fps.append(path)
+    problems = precheck(fps, args.processes, SyntaxCache(args.cache))
+    for fp in fps:
+        problem = problems[fp]
+        if problem is not None:
+            where = fp if problem.lineno is None else '{}:{}:{}'.format(
+                fp, problem.lineno, problem.offset)
+            print("{}: {}".format(where, problem.message))
+    sys.exit(1 if any(problem is not None for problem in problems.values()) else 0)
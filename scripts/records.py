@@ -0,0 +1,221 @@
+#!/bin/env python
+
+# Millions of small nested records, without millions of dicts.
+#
+# A record like {'zero' : 0, 'one' : 1, 'two' : {'deep' : 2}} costs two
+# dicts, and each dict carries its own hash table of keys. When every
+# record has the same keys, the keys only need to be stored once. A
+# `RecordStore` keeps one shared table of keys (the `Schema`) and one
+# column per leaf value: an `array.array` of 8-byte numbers while the
+# values are ints or floats, a list otherwise. Reading `store[i]` returns
+# a small view that looks like the original dict, so `store[i]['two']['deep']`
+# works as before.
+
+import array
+from collections.abc import Mapping
+import sys
+
+
+class Schema(object):
+    """Shared key table for records with the same nested keys
+
+    `tree` maps each key to the index of its column, or to the tree of a
+    nested dict; `paths` lists the keys leading to each column.
+
+    >>> schema = Schema.from_record({'zero' : 0, 'one' : 1, 'two' : {'deep' : 2}})
+    >>> schema.paths
+    [('zero',), ('one',), ('two', 'deep')]
+    """
+
+    def __init__(self, tree, paths):
+        self.tree = tree
+        self.paths = paths
+
+    @classmethod
+    def from_record(cls, record):
+        paths = []
+
+        def build(node, prefix):
+            tree = {}
+            for key, value in node.items():
+                if isinstance(value, dict):
+                    tree[key] = build(value, prefix + (key,))
+                else:
+                    tree[key] = len(paths)
+                    paths.append(prefix + (key,))
+            return tree
+
+        return cls(build(record, ()), paths)
+
+    def flatten(self, record):
+        """Leaf values of `record` in column order"""
+        values = [None] * len(self.paths)
+
+        def visit(tree, node, prefix):
+            if not isinstance(node, dict) or len(node) != len(tree):
+                raise ValueError('record does not match the schema at {}'.format(
+                    '/'.join(map(str, prefix)) or 'the top level'))
+            for key, value in node.items():
+                if key not in tree:
+                    raise ValueError('unexpected key {!r} at {}'.format(
+                        key, '/'.join(map(str, prefix)) or 'the top level'))
+                target = tree[key]
+                if isinstance(target, dict):
+                    visit(target, value, prefix + (key,))
+                elif isinstance(value, dict):
+                    raise ValueError('record does not match the schema at {}'.format(
+                        '/'.join(map(str, prefix + (key,)))))
+                else:
+                    values[target] = value
+
+        visit(self.tree, record, ())
+        return values
+
+
+class RecordView(Mapping):
+    """Read-only, dict-like view of one record (or of a dict nested in it)"""
+
+    __slots__ = ('_store', '_row', '_tree')
+
+    def __init__(self, store, row, tree):
+        self._store = store
+        self._row = row
+        self._tree = tree
+
+    def __getitem__(self, key):
+        target = self._tree[key]
+        if isinstance(target, dict):
+            return RecordView(self._store, self._row, target)
+        return self._store.columns[target][self._row]
+
+    def __iter__(self):
+        return iter(self._tree)
+
+    def __len__(self):
+        return len(self._tree)
+
+    def to_dict(self):
+        """The record as plain nested dicts"""
+        return {key : value.to_dict() if isinstance(value, RecordView) else value
+                for key, value in self.items()}
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+_TYPECODES = {float : 'd', int : 'q'}
+
+
+def _column(value):
+    if type(value) in _TYPECODES:
+        return array.array(_TYPECODES[type(value)])
+    return []
+
+
+class RecordStore(object):
+    """Column store of nested records that share a schema
+
+    Parameters
+    ----------
+    records : iterable of dict, optional
+    schema : Schema, optional
+        taken from the first record if not given
+
+    >>> store = RecordStore([{'zero' : 0, 'one' : 1, 'two' : {'deep' : i}}
+    ...                      for i in range(3)])
+    >>> store[2]['two']['deep'], len(store)
+    (2, 3)
+    """
+
+    def __init__(self, records=(), schema=None):
+        self.schema = schema
+        self.columns = None
+        # kept apart from the columns, since a schema may have no leaves
+        self.rows = 0
+        self.extend(records)
+
+    def append(self, record):
+        if self.schema is None:
+            self.schema = Schema.from_record(record)
+        values = self.schema.flatten(record)
+        if self.columns is None:
+            self.columns = [_column(value) for value in values]
+        for i, value in enumerate(values):
+            column = self.columns[i]
+            if isinstance(column, array.array):
+                # an array would turn True into 1 and 1 into 1.0, and can't
+                # hold big ints; such columns become lists
+                if _TYPECODES.get(type(value)) != column.typecode:
+                    column = self.columns[i] = list(column)
+                elif type(value) is int and not -(1 << 63) <= value < (1 << 63):
+                    column = self.columns[i] = list(column)
+            column.append(value)
+        self.rows += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('record index out of range')
+        return RecordView(self, row, self.schema.tree)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield RecordView(self, row, self.schema.tree)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns, not counting objects stored in lists"""
+        return sum(sys.getsizeof(column) for column in self.columns or [])
+
+
+def _dict_bytes(record):
+    return sys.getsizeof(record) + sum(
+        _dict_bytes(value) for value in record.values() if isinstance(value, dict))
+
+
+def _cached(value):
+    # CPython shares the objects for small ints
+    return type(value) is int and -5 <= value <= 256
+
+
+def memory_report(records):
+    """Bytes per record as plain dicts and in a `RecordStore`
+
+    Numbers that the store keeps in arrays count for the dicts, where each
+    one is an object of its own; values kept as objects by both, like
+    strings, count for neither.
+    """
+    records = list(records)
+    store = RecordStore(records)
+    inline = [i for i, column in enumerate(store.columns or [])
+              if isinstance(column, array.array)]
+    as_dicts = 0
+    for record in records:
+        values = store.schema.flatten(record)
+        as_dicts += _dict_bytes(record) + sum(
+            sys.getsizeof(values[i]) for i in inline if not _cached(values[i]))
+    n = max(len(records), 1)
+    return {'dict' : as_dicts / n, 'store' : store.nbytes / n}
+
+
+if __name__ == '__main__':
+    import argparse
+    import random
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=1000000, help='number of records')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    records = [{'zero' : 0, 'one' : 1, 'two' : {'deep' : rng.random()}}
+               for _ in range(args.n)]
+    report = memory_report(records)
+    print("{:.1f} bytes per record as dicts, {:.1f} in a RecordStore".format(
+        report['dict'], report['store']))
@@ -0,0 +1,204 @@
+#!/bin/env python
+
+# Bootstrap confidence intervals and permutation tests, e.g. for comparing
+# inside and outside barriers in 03_feedback.csv without assuming normality.
+#
+# Resamples are drawn in batches: each batch is one 2D array of resample
+# indices, and statistics are reduced along its rows. Batches can be
+# spread over a process pool. Every batch draws from its own child of one
+# `SeedSequence`, so results depend on the seed and not on how many
+# processes were used.
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def mean(a):
+    return a.mean(axis=-1)
+
+
+def median(a):
+    return np.median(a, axis=-1)
+
+
+def mean_difference(a, b):
+    return a.mean(axis=-1) - b.mean(axis=-1)
+
+
+def median_difference(a, b):
+    return np.median(a, axis=-1) - np.median(b, axis=-1)
+
+
+class BootstrapResult(object):
+
+    def __init__(self, statistic, distribution, confidence_level):
+        self.statistic = statistic
+        self.distribution = distribution
+        self.confidence_level = confidence_level
+        alpha = (1 - confidence_level) / 2
+        self.confidence_interval = tuple(np.quantile(distribution, [alpha, 1 - alpha]))
+        self.standard_error = distribution.std(ddof=1)
+
+    def __repr__(self):
+        low, high = self.confidence_interval
+        return "<BootstrapResult statistic={:.4g} {:g}% CI=({:.4g}, {:.4g})>".format(
+            self.statistic, 100 * self.confidence_level, low, high)
+
+
+class PermutationResult(object):
+
+    def __init__(self, statistic, null_distribution, pvalue):
+        self.statistic = statistic
+        self.null_distribution = null_distribution
+        self.pvalue = pvalue
+
+    def __repr__(self):
+        return "<PermutationResult statistic={:.4g} pvalue={:.4g}>".format(
+            self.statistic, self.pvalue)
+
+
+def _bootstrap_batch(samples, statistic, seed, size):
+    rng = np.random.default_rng(seed)
+    resampled = [np.take(x, rng.integers(0, len(x), size=(size, len(x)))) for x in samples]
+    return statistic(*resampled)
+
+
+def _permutation_batch(samples, statistic, seed, size):
+    rng = np.random.default_rng(seed)
+    pooled = np.concatenate(samples)
+    shuffled = rng.permuted(np.broadcast_to(pooled, (size, len(pooled))), axis=1)
+    splits = np.cumsum([len(x) for x in samples])[:-1]
+    return statistic(*np.split(shuffled, splits, axis=1))
+
+
+_worker_samples = None
+
+
+def _init_worker(samples):
+    global _worker_samples
+    _worker_samples = samples
+
+
+def _worker_batch(job):
+    batch, statistic, seed, size = job
+    return batch(_worker_samples, statistic, seed, size)
+
+
+def _run_batches(batch, samples, statistic, n_resamples, batch_size, processes, seed):
+    if batch_size is None:
+        # about 32MB of float64 per batch
+        batch_size = max(1, 2 ** 22 // sum(len(x) for x in samples))
+    sizes = [batch_size] * (n_resamples // batch_size)
+    if n_resamples % batch_size:
+        sizes.append(n_resamples % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if not processes or processes == 1:
+        results = [batch(samples, statistic, s, size) for s, size in zip(seeds, sizes)]
+    else:
+        jobs = [(batch, statistic, s, size) for s, size in zip(seeds, sizes)]
+        with ProcessPoolExecutor(processes, initializer=_init_worker,
+                                 initargs=(samples,)) as pool:
+            results = list(pool.map(_worker_batch, jobs))
+    return np.concatenate(results)
+
+
+def bootstrap(samples, statistic=mean, n_resamples=100000, confidence_level=.95,
+              batch_size=None, processes=None, seed=None):
+    """Percentile bootstrap confidence interval
+
+    Parameters
+    ----------
+    samples : array or tuple of arrays
+        each array is resampled independently
+    statistic : function
+        takes one 2D array per sample, with one resample per row, and
+        returns one value per row; must be defined at module level to be
+        used with `processes`
+    n_resamples : int
+    confidence_level : float
+    batch_size : int, optional
+        resamples drawn at once; defaults to about 32MB worth
+    processes : int, optional
+        spread batches over this many worker processes
+    seed : int, optional
+
+    Returns
+    -------
+    BootstrapResult
+    """
+    samples = _as_samples(samples)
+    observed = float(statistic(*samples))
+    distribution = _run_batches(_bootstrap_batch, samples, statistic, n_resamples,
+                                batch_size, processes, seed)
+    return BootstrapResult(observed, distribution, confidence_level)
+
+
+def permutation_test(samples, statistic=mean_difference, n_resamples=100000,
+                     alternative='two-sided', batch_size=None, processes=None,
+                     seed=None):
+    """Permutation test of the null hypothesis that all samples come from
+    the same distribution
+
+    Parameters
+    ----------
+    samples : tuple of arrays
+    statistic : function
+        as in `bootstrap`
+    alternative : {'two-sided', 'greater', 'less'}
+    n_resamples, batch_size, processes, seed
+        as in `bootstrap`
+
+    Returns
+    -------
+    PermutationResult
+    """
+    if alternative not in ('two-sided', 'greater', 'less'):
+        raise ValueError("alternative must be 'two-sided', 'greater' or 'less', not '{}'".format(alternative))
+    samples = _as_samples(samples)
+    observed = float(statistic(*samples))
+    null = _run_batches(_permutation_batch, samples, statistic, n_resamples,
+                        batch_size, processes, seed)
+    if alternative == 'greater':
+        extreme = null >= observed
+    elif alternative == 'less':
+        extreme = null <= observed
+    else:
+        extreme = np.abs(null) >= abs(observed)
+    # counting the observed arrangement keeps the p-value above zero
+    pvalue = (extreme.sum() + 1) / (n_resamples + 1)
+    return PermutationResult(observed, null, float(pvalue))
+
+
+def _as_samples(samples):
+    if np.ndim(samples[0]) == 0:
+        samples = (samples,)
+    samples = tuple(np.asarray(x, dtype=np.float64) for x in samples)
+    samples = tuple(x[~np.isnan(x)] for x in samples)
+    if any(len(x) == 0 for x in samples):
+        raise ValueError("every sample needs at least one non-missing value")
+    return samples
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fp', default='../data/03_feedback.csv')
+    parser.add_argument('--a', default='inside_barriers')
+    parser.add_argument('--b', default='outside_barriers')
+    parser.add_argument('--n-resamples', type=int, default=100000)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.fp)
+    samples = (data[args.a].to_numpy(), data[args.b].to_numpy())
+    for test in [bootstrap, permutation_test]:
+        start = time.perf_counter()
+        result = test(samples, mean_difference, args.n_resamples,
+                      processes=args.processes, seed=args.seed)
+        print(result, "in {:.2f}s".format(time.perf_counter() - start))
@@ -0,0 +1,452 @@
+#!/bin/env python
+
+# An in-process replacement for the cron examples in etc/.
+#
+# System cron starts a cold process for every job and has no idea whether
+# the previous run is still going. This scheduler parses the same
+# schedules (`@hourly`, `00 08 * * 1`), keeps the next run of every job in
+# a heap, and hands due jobs to a thread or process pool. Each job has an
+# overlap policy, optional jitter, and a history of its runs. All time
+# comes from a clock object, so a `FakeClock` can drive it in tests.
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import datetime
+import heapq
+import itertools
+import os
+import pwd
+import random
+import subprocess
+import threading
+import time
+
+ALIASES = {
+    '@yearly' : '0 0 1 1 *',
+    '@annually' : '0 0 1 1 *',
+    '@monthly' : '0 0 1 * *',
+    '@weekly' : '0 0 * * 0',
+    '@daily' : '0 0 * * *',
+    '@midnight' : '0 0 * * *',
+    '@hourly' : '0 * * * *',
+}
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+          'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+DAYS = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+POLICIES = ('allow', 'skip', 'queue')
+
+
+def _parse_value(token, low, names):
+    if names and token in names:
+        return names.index(token) + low
+    return int(token)
+
+
+def _parse_field(field, low, high, names=None):
+    """Set of the values a cron field allows"""
+    values = set()
+    for part in field.lower().split(','):
+        part, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if part == '*':
+            start, stop = low, high
+        else:
+            start, _, stop = part.partition('-')
+            start = _parse_value(start, low, names)
+            if stop:
+                stop = _parse_value(stop, low, names)
+            else:
+                stop = high if step > 1 else start
+        if step < 1 or start < low or stop > high or start > stop:
+            raise ValueError("'{}' is not a valid cron field".format(field))
+        values.update(range(start, stop + 1, step))
+    return values
+
+
+class CronSchedule(object):
+    """A cron expression, e.g. '@hourly' or '00 08 * * 1'
+
+    >>> schedule = CronSchedule('00 08 * * 1')
+    >>> schedule.next_after(datetime.datetime(2016, 6, 1, 12, 30))
+    datetime.datetime(2016, 6, 6, 8, 0)
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError("'{}' does not have five fields".format(expression))
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12, MONTHS)
+        # 7 is another name for Sunday
+        weekdays = _parse_field(fields[4], 0, 7, DAYS)
+        self.weekdays = {day % 7 for day in weekdays}
+        # when both day fields are restricted, cron runs on either; like
+        # vixie cron, a field starting with '*' (e.g. '*/2') is unrestricted
+        self.any_day = not fields[2].startswith('*') and not fields[4].startswith('*')
+
+    def _day_matches(self, moment):
+        weekday = (moment.weekday() + 1) % 7
+        in_days = moment.day in self.days
+        in_weekdays = weekday in self.weekdays
+        return in_days or in_weekdays if self.any_day else in_days and in_weekdays
+
+    def next_after(self, moment):
+        """First time strictly after `moment` that the schedule matches"""
+        moment = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        # four years covers every valid combination, including 29 February
+        limit = moment + datetime.timedelta(days=366 * 4 + 1)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(year=moment.year + year, month=month + 1, day=1,
+                                        hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + datetime.timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError("'{}' never matches".format(self.expression))
+
+    def __repr__(self):
+        return "CronSchedule('{}')".format(self.expression)
+
+
+def parse_crontab(text, system=False):
+    """Jobs and environment variables in crontab-formatted text
+
+    Parameters
+    ----------
+    text : str
+    system : bool
+        whether lines have a user field after the schedule, as in the files
+        under /etc/cron.d/ (see etc/crond_example)
+
+    Returns
+    -------
+    list of tuple, dict
+        (schedule, user, command) for each job, and the variables set
+    """
+    jobs, env = [], {}
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        first = line.split(None, 1)[0]
+        if '=' in first and not first.startswith('@'):
+            name, _, value = line.partition('=')
+            env[name.strip()] = value.strip()
+            continue
+        n_fields = 1 if first.startswith('@') else 5
+        parts = line.split(None, n_fields + (1 if system else 0))
+        schedule = ' '.join(parts[:n_fields])
+        user = parts[n_fields] if system else None
+        jobs.append((CronSchedule(schedule), user, parts[-1]))
+    return jobs, env
+
+
+class SystemClock(object):
+
+    def now(self):
+        return datetime.datetime.now()
+
+    def sleep(self, seconds):
+        time.sleep(max(0, seconds))
+
+
+class FakeClock(object):
+    """A clock that only moves when told to, for tests
+
+    >>> clock = FakeClock(datetime.datetime(2016, 6, 6, 7, 59))
+    >>> scheduler = Scheduler(clock=clock, executor=ImmediateExecutor())
+    >>> job = scheduler.add('report', CronSchedule('00 08 * * 1'), print, 'ran')
+    >>> scheduler.run_pending()
+    0
+    >>> clock.advance(60)
+    >>> scheduler.run_pending()
+    ran
+    1
+    >>> job.runs, job.history[-1].latency
+    (1, 0.0)
+    """
+
+    def __init__(self, start=None):
+        self.moment = start or datetime.datetime(2000, 1, 1)
+
+    def now(self):
+        return self.moment
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        self.moment += datetime.timedelta(seconds=max(0, seconds))
+
+
+class ImmediateExecutor(object):
+    """Runs submitted work right away in the calling thread, for tests"""
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def _timed(func, args, kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def cron_environment(variables=None, user=None):
+    """The environment cron gives a job: ours, with HOME, LOGNAME, USER and
+    SHELL set for `user` (by default, the user we run as), and then the
+    variables set in the crontab"""
+    try:
+        entry = pwd.getpwnam(user) if user else pwd.getpwuid(os.getuid())
+    except KeyError:
+        raise ValueError("no such user '{}'".format(user))
+    env = dict(os.environ)
+    env.update({'HOME' : entry.pw_dir, 'LOGNAME' : entry.pw_name,
+                'USER' : entry.pw_name, 'SHELL' : '/bin/sh'})
+    env.update(variables or {})
+    return env
+
+
+def run_command(command, env=None, user=None):
+    """Run a shell command like cron would, as `user` if given, raising if
+    it fails"""
+    if user is not None and user == pwd.getpwuid(os.getuid()).pw_name:
+        user = None
+    return subprocess.run(command, shell=True, env=env, check=True, user=user,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+class Run(object):
+    """One run of a job; `latency` is the seconds between the scheduled and
+    the actual start"""
+
+    def __init__(self, scheduled, started):
+        self.scheduled = scheduled
+        self.started = started
+        self.latency = (started - scheduled).total_seconds()
+        self.duration = None
+        self.ok = None
+        self.error = None
+
+
+class Job(object):
+
+    def __init__(self, name, schedule, func, args, kwargs, overlap, jitter, history):
+        if overlap not in POLICIES:
+            raise ValueError("overlap must be one of {}, not '{}'".format(POLICIES, overlap))
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.overlap = overlap
+        self.jitter = jitter
+        self.history = deque(maxlen=history)
+        self.running = 0
+        self.queued = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def __repr__(self):
+        return "<Job '{}' {}>".format(self.name, self.schedule)
+
+
+class Scheduler(object):
+    """Run jobs on cron schedules from inside one Python process
+
+    Parameters
+    ----------
+    clock : SystemClock or FakeClock
+    executor : concurrent.futures.Executor, optional
+        where jobs run; defaults to a pool of 4 threads. Jobs sent to a
+        `ProcessPoolExecutor` must be picklable.
+    seed : int, optional
+        seed for jitter
+    """
+
+    def __init__(self, clock=None, executor=None, seed=None):
+        self.clock = clock or SystemClock()
+        self.executor = executor or ThreadPoolExecutor(4)
+        self.random = random.Random(seed)
+        self.jobs = {}
+        self.queue = []
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def add(self, name, schedule, func, *args, overlap='skip', jitter=0, history=100,
+            **kwargs):
+        """Schedule `func(*args, **kwargs)`
+
+        Parameters
+        ----------
+        name : str
+        schedule : CronSchedule or str
+        func : function
+        overlap : {'skip', 'allow', 'queue'}
+            what to do when a run is due while the previous one is still
+            going: drop it, start it anyway, or start it when the previous
+            one finishes
+        jitter : float
+            up to this many seconds are added at random to every start, so
+            that jobs on the same schedule do not all start at once; never
+            as much as the time to the next scheduled run, which would then
+            be skipped
+        history : int
+            number of past runs to keep
+        """
+        if not isinstance(schedule, CronSchedule):
+            schedule = CronSchedule(schedule)
+        job = Job(name, schedule, func, args, kwargs, overlap, jitter, history)
+        self.jobs[name] = job
+        self._push(job, self.clock.now())
+        return job
+
+    def add_crontab(self, text, system=False, **kwargs):
+        """Schedule every command in a crontab, e.g. etc/crontab_example
+
+        Commands get the environment from `cron_environment`. With
+        `system=True` each runs as the user on its line, which needs root
+        unless that is the user we run as.
+        """
+        jobs, variables = parse_crontab(text, system)
+        return [self.add(command, schedule, run_command, command,
+                         env=cron_environment(variables, user), user=user, **kwargs)
+                for schedule, user, command in jobs]
+
+    def _push(self, job, after):
+        due = job.schedule.next_after(after)
+        if job.jitter:
+            # the next run is pushed from this one's start, so a start at or
+            # past the following scheduled time would skip that run
+            period = (job.schedule.next_after(due) - due).total_seconds()
+            jitter = min(job.jitter, period - 1)
+            due += datetime.timedelta(seconds=self.random.uniform(0, jitter))
+        heapq.heappush(self.queue, (due, next(self.counter), job))
+
+    def next_due(self):
+        return self.queue[0][0] if self.queue else None
+
+    def run_pending(self):
+        """Dispatch every job that is due; returns how many were started"""
+        now = self.clock.now()
+        started = 0
+        while self.queue and self.queue[0][0] <= now:
+            due, _, job = heapq.heappop(self.queue)
+            # like cron, runs missed while we were not running (or were
+            # late) become this one run, and the next is the first after now
+            self._push(job, max(due, now).replace(second=0, microsecond=0))
+            with self.lock:
+                busy = job.running and job.overlap != 'allow'
+                if busy and job.overlap == 'skip':
+                    job.skipped += 1
+                    continue
+                if busy and job.overlap == 'queue':
+                    job.queued = due
+                    continue
+            self._dispatch(job, due)
+            started += 1
+        return started
+
+    def _dispatch(self, job, due):
+        run = Run(due, self.clock.now())
+        with self.lock:
+            job.running += 1
+            job.runs += 1
+            job.history.append(run)
+        future = self.executor.submit(_timed, job.func, job.args, job.kwargs)
+        future.add_done_callback(lambda f: self._finished(job, run, f))
+
+    def _finished(self, job, run, future):
+        error = future.exception()
+        with self.lock:
+            job.running -= 1
+            if error is None:
+                run.duration = future.result()[0]
+                run.ok = True
+            else:
+                run.ok = False
+                run.error = error
+                job.failures += 1
+            queued, job.queued = job.queued, None
+        if queued is not None and not self.stopped.is_set():
+            self._dispatch(job, queued)
+
+    def run(self, until=None):
+        """Dispatch jobs as they come due, until `stop()` is called or the
+        clock passes `until`"""
+        while not self.stopped.is_set():
+            self.run_pending()
+            now = self.clock.now()
+            if until is not None and now >= until:
+                return
+            due = self.next_due()
+            if due is None:
+                return
+            if until is not None:
+                due = min(due, until)
+            self.clock.sleep(min((due - now).total_seconds(), 60))
+
+    def stop(self, wait=True):
+        self.stopped.set()
+        self.executor.shutdown(wait=wait)
+
+    def metrics(self):
+        """Run counts and latency/duration summaries for every job"""
+        report = {}
+        with self.lock:
+            for name, job in self.jobs.items():
+                latencies = [run.latency for run in job.history]
+                durations = [run.duration for run in job.history if run.duration is not None]
+                report[name] = {
+                    'runs' : job.runs,
+                    'failures' : job.failures,
+                    'skipped' : job.skipped,
+                    'running' : job.running,
+                    'mean_latency' : sum(latencies) / len(latencies) if latencies else None,
+                    'max_latency' : max(latencies) if latencies else None,
+                    'mean_duration' : sum(durations) / len(durations) if durations else None,
+                    'last_error' : next((repr(run.error) for run in reversed(job.history)
+                                         if run.error is not None), None),
+                }
+        return report
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('crontab', help='file in crontab format, e.g. ../etc/crontab_example')
+    parser.add_argument('--system', action='store_true',
+                        help='lines have a user field, as in /etc/cron.d/')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with open(args.crontab, 'r') as f:
+        text = f.read()
+    scheduler = Scheduler(executor=ThreadPoolExecutor(args.workers))
+    for job in scheduler.add_crontab(text, args.system):
+        print("Scheduled {} at {}".format(job.name, job.schedule))
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop(wait=False)
+        for name, report in scheduler.metrics().items():
+            print(name, report)
@@ -0,0 +1,329 @@
+#!/bin/env python
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import re
+import time
+
+import numpy as np
+
+# words the way TextBlob's tokenizer splits them: "don't" is "do n ' t"
+P_WORD = re.compile(r"\w+?(?=n't\b)|\w+(?:[-.]\w+)*|'|!")
+P_SPACE = re.compile(r'\s+')
+# as in TextBlob's pattern analyzer
+NEGATIONS = ('no', 'not', "n't", 'never')
+
+
+def normalize(sentence):
+    """Fold case and whitespace so that repeated sentences share a cache key"""
+    return P_SPACE.sub(' ', str(sentence)).strip().casefold()
+
+
+def load_lexicon():
+    """Read word polarities out of the lexicon that TextBlob's default
+    analyzer uses
+
+    Returns
+    -------
+    dict
+        mapping of word to (polarity in [-1, 1], intensity, whether the
+        word is an adverb that modifies the next one)
+    """
+    from textblob.en import sentiment as pattern_sentiment
+    pattern_sentiment.load()
+    lexicon = {}
+    for word, senses in pattern_sentiment.items():
+        # the None key holds the average over all parts of speech
+        sense = senses.get(None) or next(iter(senses.values()))
+        lexicon[word.casefold()] = (float(sense[0]), float(sense[2]), 'RB' in senses)
+    return lexicon
+
+
+def _unknown_id(word):
+    # unknown words are told apart only by the lengths that decide whether
+    # a negation or modifier carries over them, see `Lexicon.assess`
+    return (len(word.strip("'")) > 1) + 2 * (len(word) > 2)
+
+
+def _unknown_words():
+    # a word for each of the ids made by `_unknown_id`
+    return ['', 'ab', "'a'", 'abc']
+
+
+class Lexicon(object):
+    """Dense, integer-indexed version of a word -> polarity mapping
+
+    Ids 0-3 are reserved for words that are not in the lexicon, so that
+    every token can be looked up with a single `np.take`.
+
+    Parameters
+    ----------
+    lexicon : dict
+        word -> polarity, or word -> (polarity, intensity, modifier) as
+        returned by `load_lexicon`
+    """
+
+    def __init__(self, lexicon, negations=NEGATIONS):
+        self.ids = {}
+        self.words = _unknown_words()
+        polarity, intensity, modifier = [0.0] * 4, [1.0] * 4, [False] * 4
+        for word, value in lexicon.items():
+            if not isinstance(value, tuple):
+                value = (value, 1.0, False)
+            self.ids[word] = len(polarity)
+            self.words.append(word)
+            polarity.append(float(value[0]))
+            intensity.append(float(value[1]) or 1.0)
+            modifier.append(bool(value[2]))
+        self.known = np.ones(len(polarity), dtype=bool)
+        self.known[:4] = False
+        # negations and exclamation marks get ids whether or not they are known
+        for word in list(negations) + ['!']:
+            if word not in self.ids:
+                self.ids[word] = len(polarity)
+                self.words.append(word)
+                polarity.append(0.0)
+                intensity.append(1.0)
+                modifier.append(False)
+                self.known = np.append(self.known, False)
+        self.polarity = np.array(polarity, dtype=np.float64)
+        self.intensity = np.array(intensity, dtype=np.float64)
+        self.modifier = np.array(modifier, dtype=bool)
+        self.negation = np.zeros(len(polarity), dtype=bool)
+        self.negation[[self.ids[word] for word in negations]] = True
+        # whether a negation or a modifier stops at the word, see `assess`
+        self.ends_negation = np.array([len(word.strip("'")) > 1 for word in self.words])
+        self.ends_modifier = np.array([len(word) > 2 for word in self.words])
+        self.bang = self.ids['!']
+        # tokens that make a sentence more than the mean of its known words
+        self.special = self.modifier | self.negation
+        self.special[self.bang] = True
+
+    def encode(self, sentences):
+        """Turn normalized sentences into one flat array of token ids plus
+        the offset at which each sentence starts"""
+        ids = self.ids
+        tokens = []
+        offsets = np.empty(len(sentences), dtype=np.int64)
+        for i, sentence in enumerate(sentences):
+            offsets[i] = len(tokens)
+            for word in P_WORD.findall(sentence):
+                found = ids.get(word)
+                tokens.append(_unknown_id(word) if found is None else found)
+        return np.array(tokens, dtype=np.int64), offsets
+
+    def assess(self, tokens):
+        """Polarity of one sentence of token ids, following the rules of
+        TextBlob's pattern analyzer: a modifier ("very good") scales the
+        next known word by its intensity, a negation ("not good") turns a
+        known word's polarity into -0.5 times itself, and "!" boosts the
+        word before it. Unlike TextBlob, emoticons are not scored."""
+        scores = []
+        modifier = negation = None
+        for token in tokens:
+            if self.known[token]:
+                polarity, intensity = self.polarity[token], self.intensity[token]
+                if modifier is None:
+                    scores.append([polarity, intensity, False])
+                else:
+                    last = scores[-1]
+                    last[0] = max(-1.0, min(polarity * last[1], 1.0))
+                    last[1] = intensity
+                if negation is not None:
+                    scores[-1][1] = 1.0 / scores[-1][1]
+                    scores[-1][2] = True
+                modifier = token if self.modifier[token] else None
+                negation = token if self.negation[token] else None
+            else:
+                if self.negation[token]:
+                    negation = token
+                elif negation is not None and self.ends_negation[token]:
+                    negation = None
+                if (negation is not None and modifier is not None
+                        and self.words[modifier].endswith('ly')):
+                    scores[-1][2] = True
+                    negation = None
+                elif modifier is not None and self.ends_modifier[token]:
+                    modifier = None
+                if token == self.bang and scores:
+                    scores[-1][0] = max(-1.0, min(scores[-1][0] * 1.25, 1.0))
+        if not scores:
+            return 0.0
+        return sum(-0.5 * p if negated else p for p, _, negated in scores) / len(scores)
+
+    def score(self, sentences):
+        """Polarity of each sentence, or 0.0 for sentences without any
+        lexicon words
+
+        Sentences without negations, modifiers or exclamation marks are
+        the mean polarity of their lexicon words, computed for all of them
+        at once; the others go through `assess`.
+        """
+        out = np.zeros(len(sentences), dtype=np.float64)
+        if not len(sentences):
+            return out
+        tokens, offsets = self.encode(sentences)
+        if not len(tokens):
+            return out
+        # reduceat misbehaves on empty segments, so score only sentences
+        # that have at least one token and leave the rest at zero
+        lengths = np.diff(np.append(offsets, len(tokens)))
+        nonempty = lengths > 0
+        starts = offsets[nonempty]
+        totals = np.add.reduceat(np.take(self.polarity, tokens), starts)
+        counts = np.add.reduceat(np.take(self.known, tokens).astype(np.int64), starts)
+        out[nonempty] = np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+        special = np.zeros(len(sentences), dtype=bool)
+        special[nonempty] = np.add.reduceat(np.take(self.special, tokens).astype(np.int64),
+                                            starts) > 0
+        for i in np.flatnonzero(special):
+            out[i] = self.assess(tokens[offsets[i]:offsets[i] + lengths[i]].tolist())
+        return out
+
+
+_worker_lexicon = None
+
+
+def _init_worker(lexicon):
+    global _worker_lexicon
+    _worker_lexicon = Lexicon(lexicon)
+
+
+def _score_chunk(sentences):
+    return _worker_lexicon.score(sentences)
+
+
+class SentimentScorer(object):
+    """Score many sentences at once, with an LRU cache in front of a
+    vectorized lexicon lookup
+
+    Parameters
+    ----------
+    lexicon : dict, optional
+        word -> polarity; defaults to TextBlob's pattern lexicon
+    cache_size : int
+        number of normalized sentences to remember
+    processes : int, optional
+        worker processes to use for batches larger than `pool_threshold`
+    pool_threshold : int
+        smallest number of uncached sentences worth sending to a pool
+    chunk_size : int
+        sentences per task when scoring in a pool
+    """
+
+    def __init__(self, lexicon=None, cache_size=100000, processes=None,
+                 pool_threshold=50000, chunk_size=10000):
+        if lexicon is None:
+            lexicon = load_lexicon()
+        self.lexicon = dict(lexicon)
+        self.encoded = Lexicon(self.lexicon)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.processes = processes
+        self.pool_threshold = pool_threshold
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+
+    def score(self, sentences):
+        """Return an array with the polarity of each sentence
+
+        `sentences` can be any sequence of strings or objects with a
+        string representation, like TextBlob's `Sentence`.
+        """
+        keys = [normalize(sentence) for sentence in sentences]
+        out = np.empty(len(keys), dtype=np.float64)
+        missing = OrderedDict()
+        for i, key in enumerate(keys):
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                out[i] = self.cache[key]
+                self.hits += 1
+            else:
+                missing.setdefault(key, []).append(i)
+        self.misses += len(missing)
+        if missing:
+            todo = list(missing)
+            for key, value in zip(todo, self._score_uncached(todo)):
+                out[missing[key]] = value
+                self._remember(key, value)
+        return out
+
+    def score_one(self, sentence):
+        return float(self.score([sentence])[0])
+
+    def _remember(self, key, value):
+        if self.cache_size <= 0:
+            return
+        self.cache[key] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _score_uncached(self, sentences):
+        if self.processes == 1 or len(sentences) < self.pool_threshold:
+            return self.encoded.score(sentences)
+        chunks = [sentences[i:i + self.chunk_size]
+                  for i in range(0, len(sentences), self.chunk_size)]
+        with ProcessPoolExecutor(self.processes, initializer=_init_worker,
+                                 initargs=(self.lexicon,)) as pool:
+            return np.concatenate(list(pool.map(_score_chunk, chunks)))
+
+
+def benchmark(sentences, scorer=None):
+    """Compare sentences/sec of `SentimentScorer` against TextBlob's
+    one-sentence-at-a-time loop, and check that they agree
+
+    Returns
+    -------
+    dict
+        rate for each approach, in sentences per second, and `agreement`,
+        the fraction of sentences that get the same polarity from both
+    """
+    from textblob import TextBlob
+    sentences = [str(sentence) for sentence in sentences]
+    if scorer is None:
+        scorer = SentimentScorer()
+
+    start = time.perf_counter()
+    expected = [TextBlob(sentence).sentiment.polarity for sentence in sentences]
+    baseline = time.perf_counter() - start
+
+    scorer.cache.clear()
+    start = time.perf_counter()
+    found = scorer.score(sentences)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scorer.score(sentences)
+    warm = time.perf_counter() - start
+
+    n = len(sentences)
+    return {
+        'textblob' : n / baseline,
+        'batched' : n / cold,
+        'cached' : n / warm,
+        'agreement' : float(np.isclose(found, expected).mean()) if n else 1.0,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('fp', help='text file with one sentence per line')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--benchmark', action='store_true')
+    args = parser.parse_args()
+
+    with open(args.fp, 'r') as f:
+        sentences = [line for line in f.read().split('\n') if line.strip()]
+
+    scorer = SentimentScorer(processes=args.processes)
+    if args.benchmark:
+        report = benchmark(sentences, scorer)
+        agreement = report.pop('agreement')
+        for name, rate in report.items():
+            print("{:>10}: {:,.0f} sentences/sec".format(name, rate))
+        print("{:.1%} of sentences get the same polarity as TextBlob".format(agreement))
+    else:
+        for polarity, sentence in zip(scorer.score(sentences), sentences):
+            print(polarity, sentence)
@@ -0,0 +1,292 @@
+#!/bin/env python
+
+# One-pass descriptive statistics for columns that are too big to load.
+# Every accumulator here can be updated with a block of values and merged
+# with another accumulator, so blocks can be summarized in separate
+# processes (or on separate machines) and combined afterwards.
+
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+
+from tables import map_blocks
+
+
+class Moments(object):
+    """Count, mean and the 2nd-4th central moment sums of a stream
+
+    Blocks are combined with the pairwise update formulas from Pébay
+    (2008), which reduce to Welford's algorithm for blocks of one value.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+
+    @classmethod
+    def from_values(cls, values):
+        moments = cls()
+        values = np.asarray(values, dtype=np.float64)
+        if len(values):
+            moments.n = len(values)
+            moments.mean = float(values.mean())
+            deviations = values - moments.mean
+            squared = deviations * deviations
+            moments.m2 = float(squared.sum())
+            moments.m3 = float((squared * deviations).sum())
+            moments.m4 = float((squared * squared).sum())
+        return moments
+
+    def update(self, values):
+        self.merge(Moments.from_values(values))
+        return self
+
+    def merge(self, other):
+        if not other.n:
+            return self
+        if not self.n:
+            self.__dict__.update(other.__dict__)
+            return self
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        delta_n = delta / n
+        m2 = self.m2 + other.m2 + delta * delta_n * na * nb
+        m3 = (self.m3 + other.m3
+              + delta * delta_n * delta_n * na * nb * (na - nb)
+              + 3 * delta_n * (na * other.m2 - nb * self.m2))
+        m4 = (self.m4 + other.m4
+              + delta * delta_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+              + 6 * delta_n * delta_n * (na * na * other.m2 + nb * nb * self.m2)
+              + 4 * delta_n * (na * other.m3 - nb * self.m3))
+        self.n = n
+        self.mean += delta_n * nb
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        return self
+
+    @property
+    def var(self):
+        """Sample variance, like `Series.var()`"""
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+    @property
+    def skew(self):
+        """Adjusted Fisher-Pearson skewness, like `Series.skew()`"""
+        n = self.n
+        if n < 3 or not self.m2:
+            return math.nan
+        g1 = math.sqrt(n) * self.m3 / self.m2 ** 1.5
+        return g1 * math.sqrt(n * (n - 1)) / (n - 2)
+
+    @property
+    def kurtosis(self):
+        """Unbiased excess kurtosis, like `Series.kurtosis()`"""
+        n = self.n
+        if n < 4 or not self.m2:
+            return math.nan
+        g2 = n * self.m4 / (self.m2 * self.m2) - 3
+        return ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+
+
+class KLL(object):
+    """Mergeable quantile sketch from Karnin, Lang and Liberty (2016)
+
+    Items live in a stack of compactors; an item at level h stands for
+    2**h values. Memory is O(k) and rank error is roughly 1.7 / k.
+
+    Parameters
+    ----------
+    k : int
+        size of the top compactor
+    seed : int, optional
+        seed for the coin flips used when compacting
+    """
+
+    c = 2 / 3
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.levels = [np.empty(0)]
+        self.n = 0
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * self.c ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # an odd item out stays behind at this level
+                keep = items[:len(items) % 2]
+                pairs = items[len(keep):]
+                promoted = pairs[self.rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q):
+        """Approximate value at quantile `q`, or at each of a list of them"""
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else math.nan
+        weights = np.concatenate([np.full(len(items), 2 ** level)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(q, dtype=np.float64) * cumulative[-1]
+        positions = np.minimum(np.searchsorted(cumulative, ranks), len(items) - 1)
+        result = items[order][positions]
+        return result if np.ndim(q) else float(result)
+
+
+class ColumnStats(object):
+    """Everything `describe()` reports for one numeric column, plus skew and
+    kurtosis, built from blocks of values"""
+
+    def __init__(self, k=200, seed=None):
+        self.moments = Moments()
+        self.sketch = KLL(k, seed)
+        self.min = math.inf
+        self.max = -math.inf
+        self.missing = 0
+        # values that are there but are not numbers
+        self.text = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        isnan = np.isnan(values)
+        self.missing += int(isnan.sum())
+        values = values[~isnan]
+        if len(values):
+            self.moments.update(values)
+            self.sketch.update(values)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+        return self
+
+    def update_column(self, column):
+        """Add a pandas Series; values that aren't numbers count as `text`"""
+        values = pd.to_numeric(column, errors='coerce')
+        text = values.isnull().to_numpy() & column.notnull().to_numpy()
+        self.text += int(text.sum())
+        return self.update(values.to_numpy(np.float64)[~text])
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.missing += other.missing
+        self.text += other.text
+        return self
+
+    def describe(self, percentiles=(.25, .5, .75)):
+        n = self.moments.n
+        summary = {
+            'count' : float(n),
+            'mean' : self.moments.mean if n else math.nan,
+            'std' : self.moments.std if n > 1 else math.nan,
+            'min' : self.min if n else math.nan,
+        }
+        for p, value in zip(percentiles, self.sketch.quantile(list(percentiles))):
+            summary['{:g}%'.format(100 * p)] = float(value)
+        summary['max'] = self.max if n else math.nan
+        summary['skew'] = self.moments.skew
+        summary['kurtosis'] = self.moments.kurtosis
+        return pd.Series(summary)
+
+
+def _summarize_block(block, k):
+    return {column : ColumnStats(k).update_column(block[column])
+            for column in block.columns}
+
+
+def describe_csv(fp, columns=None, chunksize=1000000, k=200, processes=None,
+                 **kwargs):
+    """`describe()` for the numeric columns of a csv, in one pass over it
+
+    Parameters
+    ----------
+    fp : str
+        csv to summarize
+    columns : list of str, optional
+        columns to summarize, where values that aren't numbers are left
+        out; defaults to the columns that are numeric in the first chunk
+        and have no text in the others
+    chunksize : int
+        number of rows to hold in memory at once
+    k : int
+        size of the quantile sketches
+    processes : int, optional
+        summarize chunks in this many worker processes
+    **kwargs
+        passed to `pd.read_csv`
+
+    Returns
+    -------
+    pandas.DataFrame
+        one column per csv column, one row per statistic
+    """
+    inferred = columns is None
+    if inferred:
+        # the first chunk decides which columns look numeric, and is then
+        # summarized with the rest; a column with no values in it looks
+        # numeric too
+        reader = pd.read_csv(fp, chunksize=chunksize, **kwargs)
+        first = next(reader, None)
+        if first is None:
+            return pd.DataFrame()
+        columns = list(first.select_dtypes('number').columns)
+        reader = (block[columns] for block in itertools.chain([first], reader))
+    else:
+        reader = pd.read_csv(fp, usecols=columns, chunksize=chunksize, **kwargs)
+    totals = {column : ColumnStats(k) for column in columns}
+    for block_stats in map_blocks(_summarize_block, reader, (k,), processes):
+        for column, stats in block_stats.items():
+            totals[column].merge(stats)
+    if inferred:
+        columns = [column for column in columns if not totals[column].text]
+    return pd.DataFrame({column : totals[column].describe() for column in columns})
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('fp', help='csv file to describe')
+    parser.add_argument('--columns', nargs='+')
+    parser.add_argument('--chunksize', type=int, default=1000000)
+    parser.add_argument('--processes', type=int)
+    args = parser.parse_args()
+
+    print(describe_csv(args.fp, args.columns, args.chunksize, processes=args.processes))
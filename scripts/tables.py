@@ -0,0 +1,332 @@
+#!/bin/env python
+
+# Production versions of the table operations in challenges/03_analysis
+# and the day_three notebook. These stream their inputs in chunks, so the
+# tables can be much larger than memory.
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class DimensionTable(object):
+    """A small right-hand table prepared for repeated joins
+
+    The key column is hashed once, when the table is built. Each join then
+    only has to factorize the distinct keys of the left table and gather
+    the dimension columns with `np.take`, instead of hashing every row the
+    way `pd.merge` does.
+
+    Parameters
+    ----------
+    table : pandas.DataFrame
+        dimension table; its keys must be unique
+    on : str
+        name of the key column
+    suffixes : tuple of str
+        added to overlapping column names, like `pd.merge`
+    """
+
+    def __init__(self, table, on, suffixes=('_x', '_y')):
+        if not table[on].is_unique:
+            raise ValueError("keys in column '{}' are not unique".format(on))
+        self.table = table.reset_index(drop=True)
+        self.on = on
+        self.suffixes = suffixes
+        self.index = pd.Index(self.table[on])
+        self.columns = [c for c in self.table.columns if c != on]
+
+    def __len__(self):
+        return len(self.table)
+
+    def codes(self, keys):
+        """Row number in the dimension table of each key, or -1 if absent"""
+        keys = pd.Series(keys)
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            codes = keys.cat.codes.to_numpy()
+            uniques = keys.cat.categories
+        else:
+            codes, uniques = pd.factorize(keys)
+        # the trailing -1 is what missing values (code -1) look up
+        lookup = np.append(self.index.get_indexer(uniques), -1)
+        return np.take(lookup, codes)
+
+    def join(self, left, how='inner'):
+        """Join the dimension columns onto `left`
+
+        Behaves like `left.merge(table, on=on, how=how)` for `how` in
+        inner, left and outer.
+        """
+        if how not in ('inner', 'left', 'outer'):
+            raise ValueError("how must be 'inner', 'left' or 'outer', not '{}'".format(how))
+        codes = self.codes(left[self.on])
+        matched = codes >= 0
+        if how == 'inner' and not matched.all():
+            left = left[matched]
+            codes = codes[matched]
+        out = left.reset_index(drop=True)
+        overlap = set(out.columns) & set(self.columns)
+        if overlap:
+            out = out.rename(columns={c : c + self.suffixes[0] for c in overlap})
+        for column in self.columns:
+            values = self.table[column].to_numpy()
+            if matched.all() or how == 'inner':
+                gathered = np.take(values, codes)
+            else:
+                gathered = pd.api.extensions.take(values, codes, allow_fill=True)
+            name = column + self.suffixes[1] if column in overlap else column
+            out[name] = gathered
+        if how == 'outer':
+            unmatched = np.setdiff1d(np.arange(len(self.table)), codes)
+            if len(unmatched):
+                extra = self.table.take(unmatched).rename(columns={
+                    c : c + self.suffixes[1] for c in overlap})
+                out = pd.concat([out, extra], ignore_index=True)
+            out = out.sort_values(self.on, kind='stable', ignore_index=True)
+        return out
+
+
+def lookup_join(left, right, on, how='inner', max_right=10000, **kwargs):
+    """Join `right` onto `left`, using a `DimensionTable` when `right` is
+    small and has unique keys, and `pd.merge` otherwise"""
+    if len(right) <= max_right and right[on].is_unique:
+        return DimensionTable(right, on, **kwargs).join(left, how=how)
+    return left.merge(right, on=on, how=how, **kwargs)
+
+
+def read_cities(fp_cities):
+    """Read the cities table as a `DimensionTable` of city heights keyed on
+    city"""
+    cities = pd.read_csv(fp_cities, dtype={'name' : str, 'height' : np.float32})
+    cities = cities.drop_duplicates('name').rename(
+        columns={'name' : 'city', 'height' : 'city_height'})
+    return DimensionTable(cities, on='city')
+
+
+def height_above_sea(fp_people, fp_cities, fp_out, chunksize=1000000):
+    """Add each person's city height to their own height, one chunk at a time
+
+    Parameters
+    ----------
+    fp_people : str
+        csv with columns city, height, name
+    fp_cities : str
+        csv with columns height, name
+    fp_out : str
+        where to write the people table with a new `height_above_sea` column
+    chunksize : int
+        number of people to hold in memory at once
+
+    Returns
+    -------
+    int
+        number of rows written
+    """
+    cities = read_cities(fp_cities)
+    # each chunk finds its own categories, so cities missing from the
+    # cities table keep their names, as they do in a left merge
+    dtypes = {'city' : 'category', 'height' : np.float32, 'name' : str}
+    reader = pd.read_csv(fp_people, dtype=dtypes, chunksize=chunksize)
+    n = 0
+    with open(fp_out, 'w', newline='') as f:
+        for i, chunk in enumerate(reader):
+            chunk = cities.join(chunk, how='left')
+            chunk['height_above_sea'] = chunk.pop('city_height') + chunk['height']
+            chunk.to_csv(f, header=(i == 0), index=False)
+            n += len(chunk)
+    return n
+
+
+def _as_list(names):
+    if names is None or pd.api.types.is_list_like(names):
+        return names
+    return [names]
+
+
+def _melt_block(block, id_vars, value_vars, var_name, value_name, value_dtype):
+    long_block = pd.melt(block, id_vars=id_vars, value_vars=value_vars,
+                         var_name=var_name, value_name=value_name)
+    # parquet needs one type per column in every row group, and a melted
+    # mix of text and numbers is an object column
+    values = long_block[value_name]
+    if value_dtype is str:
+        long_block[value_name] = values.where(values.isnull(), values.astype(str))
+    else:
+        try:
+            long_block[value_name] = values.astype(value_dtype)
+        except (TypeError, ValueError) as e:
+            raise ValueError("values in this block are not {}: {}; pass value_dtype=str "
+                             "to keep them as text".format(np.dtype(value_dtype), e))
+    return long_block
+
+
+def map_blocks(func, blocks, args=(), processes=None):
+    """Apply `func` to each block, in order, keeping at most `processes`
+    blocks in flight so that memory stays bounded by the block size"""
+    if not processes or processes == 1:
+        for block in blocks:
+            yield func(block, *args)
+        return
+    with ProcessPoolExecutor(processes) as pool:
+        pending = deque()
+        for block in blocks:
+            pending.append(pool.submit(func, block, *args))
+            if len(pending) >= processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class _ParquetAppender(object):
+    """Write data frames as consecutive row groups of one parquet file,
+    with the schema fixed by the first frame"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.writer = None
+        self.rows = 0
+
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            self.writer = pq.ParquetWriter(self.fp, table.schema)
+        else:
+            table = pa.Table.from_pandas(frame, schema=self.writer.schema,
+                                         preserve_index=False)
+        self.writer.write_table(table)
+        self.rows += len(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def melt_csv(fp_in, fp_out, id_vars, value_vars=None, var_name='variable',
+             value_name='value', value_dtype=None, blocksize=100000, processes=None,
+             **kwargs):
+    """Stream `pd.melt` over a wide csv and write the long table to parquet
+
+    Each block of `blocksize` wide rows becomes one row group, so all of
+    the long rows for an id end up in the same row group, which is what
+    `pivot_parquet` relies on.
+
+    Parameters
+    ----------
+    fp_in : str
+        wide csv
+    fp_out : str
+        parquet file to write
+    id_vars, value_vars, var_name, value_name
+        as in `pd.melt`
+    value_dtype : type, optional
+        type of the value column, e.g. `str` or `np.float64`; when not
+        given, float64 if the value columns of the first block are all
+        numeric and `str` otherwise
+    blocksize : int
+        number of wide rows to hold in memory at once
+    processes : int, optional
+        melt blocks in this many worker processes
+    **kwargs
+        passed to `pd.read_csv`, e.g. `dtype`
+
+    Returns
+    -------
+    int
+        number of long rows written
+    """
+    reader = pd.read_csv(fp_in, chunksize=blocksize, **kwargs)
+    first = next(reader, None)
+    if first is None:
+        return 0
+    id_vars, value_vars = _as_list(id_vars), _as_list(value_vars)
+    if value_vars is None:
+        value_vars = [c for c in first.columns if c not in id_vars]
+    if value_dtype is None:
+        # a later block may have missing values, which integers can't hold
+        numeric = all(pd.api.types.is_numeric_dtype(first[c]) for c in value_vars)
+        value_dtype = np.float64 if numeric else str
+
+    def blocks():
+        yield first
+        for block in reader:
+            yield block
+
+    args = (id_vars, value_vars, var_name, value_name, value_dtype)
+    appender = _ParquetAppender(fp_out)
+    try:
+        for long_block in map_blocks(_melt_block, blocks(), args, processes):
+            appender.write(long_block)
+    finally:
+        appender.close()
+    return appender.rows
+
+
+def _pivot_block(block, index, columns, values, order):
+    wide = block.pivot(index=index, columns=columns, values=values)
+    return wide.reindex(columns=order).rename_axis(columns=None).reset_index()
+
+
+def pivot_parquet(fp_in, fp_out, index, columns='variable', values='value',
+                  order=None, processes=None):
+    """Stream `DataFrame.pivot` over the row groups of a long parquet file
+
+    Every row for a given `index` value must be in the same row group, as
+    in the output of `melt_csv`.
+
+    Parameters
+    ----------
+    fp_in : str
+        long parquet file
+    fp_out : str
+        parquet file to write
+    index, columns, values
+        as in `DataFrame.pivot`
+    order : list, optional
+        the wide columns to produce; found with an extra pass over the
+        `columns` column when not given
+    processes : int, optional
+        pivot row groups in this many worker processes
+
+    Returns
+    -------
+    int
+        number of wide rows written
+    """
+    import pyarrow.parquet as pq
+    source = pq.ParquetFile(fp_in)
+    groups = range(source.num_row_groups)
+    if order is None:
+        order = pd.unique(np.concatenate([
+            source.read_row_group(i, columns=[columns]).column(0).to_numpy(zero_copy_only=False)
+            for i in groups])) if len(groups) else []
+    order = list(order)
+
+    def blocks():
+        for i in groups:
+            yield source.read_row_group(i).to_pandas()
+
+    appender = _ParquetAppender(fp_out)
+    try:
+        for wide_block in map_blocks(_pivot_block, blocks(),
+                                    (index, columns, values, order), processes):
+            appender.write(wide_block)
+    finally:
+        appender.close()
+    return appender.rows
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fp-people', default='../data/03_people.csv')
+    parser.add_argument('--fp-cities', default='../data/03_cities.csv')
+    parser.add_argument('--fp-out', default='../data/height_above_sea.csv')
+    parser.add_argument('--chunksize', type=int, default=1000000)
+    args = parser.parse_args()
+
+    n = height_above_sea(args.fp_people, args.fp_cities, args.fp_out, args.chunksize)
+    print("{} rows written to {}".format(n, args.fp_out))
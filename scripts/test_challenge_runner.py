@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from challenge_runner import (ResultCache, Suite, SuiteResult, discover, parse_report,
+                              run_suites, solution_files)
+
+REPORT = '''<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" errors="1" failures="1" tests="4">
+<testcase classname="test_A" name="test_one" time="0.001"/>
+<testcase classname="test_A" name="test_two" time="0.001">
+  <failure message="assert 2 == 3">details</failure></testcase>
+<testcase classname="test_B" name="test_three" time="0.001"/>
+<testcase classname="" name="test_C" time="0.000">
+  <error message="collection failure">ImportError</error></testcase>
+</testsuite></testsuites>
+'''
+
+
+@pytest.fixture
+def challenges(tmp_path):
+    folder = tmp_path / '01_structures'
+    folder.mkdir()
+    (folder / 'A_list.py').write_text('def total(x):\n    return sum(x)\n')
+    (folder / 'B_dict.py').write_text('def keys(d):\n    return []\n')
+    (folder / 'helper.txt').write_text('not a module')
+    (folder / 'test_A.py').write_text(
+        'import A_list as A\nimport os\n\n'
+        'def test_total():\n    assert A.total([1, 2]) == 3\n')
+    (folder / 'test_B.py').write_text(
+        'from B_dict import keys\n\ndef test_keys():\n    assert keys({1 : 2}) == [1]\n')
+    (folder / 'test_C.py').write_text('import missing_module\n')
+    return tmp_path
+
+
+def test_parse_report(tmp_path):
+    fp = tmp_path / 'report.xml'
+    fp.write_text(REPORT)
+    found = parse_report(str(fp))
+    assert found['test_A.py'] == {'tests' : 2, 'failures' : 1, 'error' : False,
+                                  'message' : 'assert 2 == 3'}
+    assert found['test_B.py'] == {'tests' : 1, 'failures' : 0, 'error' : False,
+                                  'message' : None}
+    assert found['test_C.py']['error'] and found['test_C.py']['tests'] == 0
+
+
+def test_solution_files(challenges):
+    folder = challenges / '01_structures'
+    assert solution_files(str(folder / 'test_A.py')) == [str(folder / 'A_list.py')]
+    assert solution_files(str(folder / 'test_B.py')) == [str(folder / 'B_dict.py')]
+    assert solution_files(str(folder / 'test_C.py')) == []
+
+
+def test_suite_key_follows_the_solution(challenges):
+    folder = challenges / '01_structures'
+    before = Suite(str(folder / 'test_A.py')).key
+    assert Suite(str(folder / 'test_A.py')).key == before
+    # a file the test doesn't import does not matter
+    (folder / 'B_dict.py').write_text('def keys(d):\n    return list(d)\n')
+    assert Suite(str(folder / 'test_A.py')).key == before
+    (folder / 'A_list.py').write_text('def total(x):\n    return 0 + sum(x)\n')
+    assert Suite(str(folder / 'test_A.py')).key != before
+    # fixtures can change the outcome too
+    before = Suite(str(folder / 'test_B.py')).key
+    (folder / 'conftest.py').write_text('')
+    assert Suite(str(folder / 'test_B.py')).key != before
+
+
+def test_cache_keeps_only_passed_suites(challenges, tmp_path):
+    suites = discover(str(challenges))
+    cache = ResultCache(str(tmp_path / 'cache.json'))
+    cache.add(SuiteResult(suites[0], 'passed', tests=3, wall=.5))
+    cache.add(SuiteResult(suites[1], 'failed', tests=1, failures=1))
+    cache.save()
+    reloaded = ResultCache(str(tmp_path / 'cache.json'))
+    hit = reloaded.get(suites[0])
+    assert hit.cached and hit.ok and hit.tests == 3
+    assert reloaded.get(suites[1]) is None
+    # a broken cache file is an empty cache
+    (tmp_path / 'cache.json').write_text('{')
+    assert ResultCache(str(tmp_path / 'cache.json')).entries == {}
+
+
+@pytest.mark.parametrize('per_suite', [False, True])
+def test_run_suites(challenges, tmp_path, per_suite):
+    suites = discover(str(challenges))
+    cache = ResultCache(str(tmp_path / 'cache.json'))
+    results = run_suites(suites, workers=2, cache=cache, timeout=60, per_suite=per_suite)
+    assert [(r.suite.test_file, r.status, r.tests, r.failures) for r in results] == [
+        ('test_A.py', 'passed', 1, 0), ('test_B.py', 'failed', 1, 1),
+        ('test_C.py', 'error', 0, 0)]
+    assert 'assert' in results[1].message
+    assert not any(r.cached for r in results)
+    # only the passed suite is cached, and a changed solution runs again
+    again = run_suites(suites, workers=2, cache=ResultCache(cache.fp), per_suite=per_suite)
+    assert [r.cached for r in again] == [True, False, False]
+    (challenges / '01_structures' / 'A_list.py').write_text('def total(x):\n    return 0\n')
+    changed = run_suites(discover(str(challenges)), cache=ResultCache(cache.fp),
+                         per_suite=per_suite)
+    assert (changed[0].status, changed[0].cached) == ('failed', False)
+    assert not any(name == '__pycache__'
+                   for name in os.listdir(str(challenges / '01_structures')))
+
+
+def test_syntax_errors_are_not_run(challenges):
+    (challenges / '01_structures' / 'A_list.py').write_text('def total(x)\n    return 1\n')
+    [a, b, c] = run_suites(discover(str(challenges)))
+    assert a.status == 'syntax' and 'A_list.py' in a.message
+    assert b.status == 'failed'
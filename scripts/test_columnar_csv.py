@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar_csv import ColumnSummary, make_roster, summarize
+
+ROSTER = '../data/01_roster.csv'
+
+
+@pytest.mark.parametrize('block_size', [7, 1000000])
+def test_summarize_matches_pandas(block_size):
+    expected = pd.read_csv(ROSTER)
+    summary = summarize(ROSTER, ['age', 'id'], ['department', 'level'], block_size=block_size)
+    assert summary.rows == len(expected)
+    for column in ['age', 'id']:
+        assert summary.total[column] == expected[column].sum()
+        assert summary.mean(column) == pytest.approx(expected[column].mean())
+        assert summary.min[column] == expected[column].min()
+        assert summary.max[column] == expected[column].max()
+    for column in ['department', 'level']:
+        assert summary.value_counts(column).to_dict() == expected[column].value_counts().to_dict()
+
+
+def test_integer_totals_do_not_overflow(tmp_path):
+    fp = str(tmp_path / 'big.csv')
+    pd.DataFrame({'x' : [2 ** 62] * 5}).to_csv(fp, index=False)
+    summary = summarize(fp, ['x'], block_size=3)
+    assert summary.total['x'] == 5 * 2 ** 62
+    assert summary.mean('x') == 2 ** 62
+
+
+def test_missing_values_are_left_out():
+    summary = ColumnSummary(['x'], ['c']).update({
+        'x' : np.array([1., np.nan, 3.]),
+        'c' : pd.Categorical(['a', None, 'a'])})
+    assert summary.count['x'] == 2 and summary.total['x'] == 4.
+    assert summary.value_counts('c').to_dict() == {'a' : 2}
+    assert np.isnan(ColumnSummary(['y']).mean('y'))
+
+
+def test_make_roster(tmp_path):
+    fp = str(tmp_path / 'roster.csv')
+    make_roster(fp, 1000)
+    roster = pd.read_csv(fp)
+    assert list(roster.columns) == list(pd.read_csv(ROSTER, nrows=0).columns)
+    assert len(roster) == 1000
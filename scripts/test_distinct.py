@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from distinct import (ExactCounter, HyperLogLog, count_distinct, dict_unique_values,
+                      encode)
+
+VALUES = [1, 1.0, True, 2, 2.5, 'a', b'a', '1', None, (1, 2), [1, 2], (1, (2,)),
+          {'a' : 1}, {'a' : 1.0}, {1, 2}, frozenset({2, 1}), ('ab', 'c'), ('a', 'bc')]
+
+
+def random_digests(n, seed):
+    return np.random.default_rng(seed).integers(0, np.iinfo(np.uint64).max, size=n,
+                                                dtype=np.uint64)
+
+
+def test_equal_values_encode_alike():
+    assert encode(1) == encode(1.0) == encode(True)
+    assert encode({1, 2}) == encode(frozenset({2, 1}))
+    assert encode({'a' : 1, 'b' : 2}) == encode({'b' : 2, 'a' : 1})
+    assert len({encode(v) for v in [1, '1', b'1', (1,), [1], 1.5]}) == 6
+    assert encode(('ab', 'c')) != encode(('a', 'bc'))
+
+
+def test_numpy_scalars_count_as_python_values():
+    assert encode(np.int64(1)) == encode(1)
+    assert encode(np.float32(2.5)) == encode(2.5)
+    assert encode(np.bool_(True)) == encode(1)
+    assert encode(np.str_('a')) == encode('a')
+    assert count_distinct([1, np.int64(1), np.float64(1.0), np.uint8(1)]) == 1
+
+
+def test_exact_count():
+    # 1, 2, 2.5, 'a', b'a', '1', None, two tuples, a list, two dicts equal
+    # to each other, two sets equal to each other and two pairs of strings
+    assert count_distinct(VALUES) == 14
+    hashable = [v for v in VALUES if not isinstance(v, (list, dict, set))]
+    assert count_distinct(hashable) == len(set(hashable))
+    assert count_distinct([]) == 0
+
+
+def test_exact_counters_merge():
+    values = list(range(1000)) + ['x{}'.format(i) for i in range(500)]
+    shards = [ExactCounter().update(values[i::3]) for i in range(3)]
+    merged = shards[0].merge(shards[1]).merge(shards[2])
+    assert merged.count() == 1500
+    assert merged.merge(ExactCounter().update(values)).count() == 1500
+
+
+def test_exact_counter_consolidates_pending_digests():
+    counter = ExactCounter()
+    for _ in range(5):
+        counter.update_digests(random_digests(1 << 19, 0))
+    assert counter.count() == len(np.unique(random_digests(1 << 19, 0)))
+    assert not counter._pending
+
+
+def test_dict_unique_values():
+    d = {'a' : 1, 'b' : 1, 'c' : [1], 'd' : [1], 'e' : 'x'}
+    assert dict_unique_values(d) == 3
+    assert dict_unique_values(d, error=.01) == 3
+
+
+@pytest.mark.parametrize('error, precision', [(.01, 14), (.05, 9), (.02, 12)])
+def test_precision_follows_error(error, precision):
+    sketch = HyperLogLog(error)
+    assert sketch.precision == precision and sketch.error <= error
+    assert sketch.nbytes == 1 << precision
+
+
+def test_precision_out_of_range():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=3)
+    with pytest.raises(ValueError):
+        HyperLogLog(.0001)
+
+
+@pytest.mark.parametrize('n', [0, 1, 10, 1000, 20000, 42000, 100000, 1000000])
+def test_estimate_within_error(n):
+    sketch = HyperLogLog(.01).update_digests(random_digests(n, n))
+    assert abs(sketch.count() - n) <= 3 * sketch.error * n
+
+
+@pytest.mark.parametrize('n', [5000, 42000, 80000])
+def test_estimate_is_unbiased_around_the_linear_counting_range(n):
+    # the raw HyperLogLog estimate is about 2% high at 42000 with 16384
+    # registers, just past where linear counting used to take over
+    errors = [HyperLogLog(.01).update_digests(random_digests(n, seed)).count() / n - 1
+              for seed in range(20)]
+    assert abs(np.mean(errors)) < .005
+
+
+def test_hyperloglogs_merge_like_the_union():
+    digests = random_digests(50000, 0)
+    whole = HyperLogLog(.02).update_digests(digests)
+    shards = [HyperLogLog(.02).update_digests(digests[i::4]) for i in range(4)]
+    merged = HyperLogLog(.02)
+    for shard in shards:
+        merged.merge(shard)
+    np.testing.assert_array_equal(merged.registers, whole.registers)
+    with pytest.raises(ValueError):
+        merged.merge(HyperLogLog(.01))
+
+
+def test_hyperloglog_round_trips_through_bytes():
+    sketch = HyperLogLog(.05).update(range(1000))
+    copy = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert copy.precision == sketch.precision and copy.count() == sketch.count()
+    copy.update(range(1000, 2000))
+    assert copy.count() > sketch.count()
+
+
+def test_hyperloglog_ranks():
+    sketch = HyperLogLog(precision=4)
+    # index 0; the first 1 bit of the remaining 60 is the 1st, the 60th,
+    # or there is none
+    sketch.update_digests([1 << 59, 1])
+    assert sketch.registers[0] == 60
+    sketch.update_digests([np.uint64(0)])
+    assert sketch.registers[0] == 61
+    sketch = HyperLogLog(precision=4).update_digests([(3 << 60) | (1 << 59)])
+    assert sketch.registers[3] == 1
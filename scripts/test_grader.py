@@ -0,0 +1,48 @@
+import pytest
+
+from grader import grade, sandbox
+
+
+@pytest.fixture
+def course(tmp_path):
+    challenges = tmp_path / 'challenges' / '01_structures'
+    challenges.mkdir(parents=True)
+    (challenges / 'A_list.py').write_text('def total(x):\n    pass\n')
+    (challenges / 'B_dict.py').write_text('def keys(d):\n    pass\n')
+    (challenges / 'test_A.py').write_text(
+        'import A_list as A\n\ndef test_total():\n    assert A.total([1, 2]) == 3\n')
+    (challenges / 'test_B.py').write_text(
+        'import B_dict as B\n\ndef test_keys():\n    assert B.keys({1 : 2}) == [1]\n')
+    data = tmp_path / 'data'
+    data.mkdir()
+    (data / 'shared.csv').write_text('a\n1\n')
+
+    submissions = tmp_path / 'submissions'
+    for student, a_list in [('ada', 'def total(x):\n    while True:\n        pass\n'),
+                            ('grace', 'def total(x):\n    return sum(x)\n')]:
+        folder = submissions / student / '01_structures'
+        folder.mkdir(parents=True)
+        (folder / 'A_list.py').write_text(a_list)
+        (folder / 'B_dict.py').write_text('def keys(d):\n    return list(d)\n')
+        # submitted tests are ignored
+        (folder / 'test_B.py').write_text('def test_nothing():\n    pass\n')
+    return str(submissions), str(tmp_path / 'challenges'), str(data)
+
+
+def test_a_hanging_suite_only_fails_itself(course):
+    submissions, challenges, data = course
+    table = grade(submissions, challenges, data, workers=2, timeout=3, cache=None)
+    statuses = {(row.student, row.suite) : row.status for row in table.itertuples()}
+    assert statuses == {('ada', 'test_A.py') : 'timeout',
+                        ('ada', 'test_B.py') : 'passed',
+                        ('grace', 'test_A.py') : 'passed',
+                        ('grace', 'test_B.py') : 'passed'}
+
+
+def test_sandbox_keeps_the_official_tests(course, tmp_path):
+    submissions, challenges, data = course
+    copied = sandbox(submissions + '/ada', challenges, data, str(tmp_path / 'box'))
+    with open(copied + '/01_structures/test_B.py') as f:
+        assert 'B.keys' in f.read()
+    with open(copied + '/01_structures/B_dict.py') as f:
+        assert 'list(d)' in f.read()
@@ -0,0 +1,92 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from group_tests import GroupSummary, anovas, correlations, ttests
+
+FEEDBACK = '../data/03_feedback.csv'
+OUTCOMES = ['interest', 'outside_barriers', 'inside_barriers', 'useful']
+
+
+@pytest.fixture(scope='module')
+def feedback():
+    return pd.read_csv(FEEDBACK)
+
+
+@pytest.fixture(scope='module')
+def shifted():
+    # a large common offset, which naive sums of squares lose precision on
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        'g' : rng.choice(['a', 'b', 'c', 'd'], 500),
+        'x' : 1e8 + rng.normal(0, 1, 500),
+        'y' : rng.normal(0, 1, 500),
+    })
+    data.loc[rng.choice(500, 40, replace=False), 'y'] = np.nan
+    return data
+
+
+def samples(data, by, outcome, group):
+    values = data.loc[data[by] == group, outcome]
+    return values.dropna().to_numpy()
+
+
+@pytest.mark.parametrize('equal_var', [True, False])
+def test_ttests_match_scipy(feedback, shifted, equal_var):
+    for data, by, outcomes in [(feedback, 'gender', OUTCOMES), (shifted, 'g', ['x', 'y'])]:
+        found = ttests(data, by, outcomes, equal_var=equal_var)
+        groups = data[by].dropna().unique()
+        assert len(found) == len(outcomes) * len(list(itertools.combinations(groups, 2)))
+        for row in found.itertuples():
+            expected = stats.ttest_ind(samples(data, by, row.outcome, row.a),
+                                       samples(data, by, row.outcome, row.b),
+                                       equal_var=equal_var)
+            np.testing.assert_allclose(row.statistic, expected.statistic, rtol=1e-6)
+            np.testing.assert_allclose(row.pvalue, expected.pvalue, rtol=1e-6)
+            # scipy reports df=1 for Welch's test with a group of one, where
+            # the statistic is nan anyway
+            if np.isfinite(row.statistic):
+                np.testing.assert_allclose(row.df, expected.df, rtol=1e-6)
+
+
+def test_ttests_of_chosen_pairs(feedback):
+    pairs = [('Male/Man', 'Female/Woman')]
+    found = GroupSummary(feedback, 'gender', OUTCOMES).ttests(pairs)
+    assert list(found.a) == ['Male/Man'] * len(OUTCOMES)
+    with pytest.raises(KeyError):
+        GroupSummary(feedback, 'gender', OUTCOMES).ttests([('Male/Man', 'nobody')])
+
+
+def test_anovas_match_scipy(feedback, shifted):
+    for data, by, outcomes in [(feedback, 'gender', OUTCOMES), (feedback, 'position', OUTCOMES),
+                               (shifted, 'g', ['x', 'y'])]:
+        found = anovas(data, by, outcomes).set_index('outcome')
+        for outcome in outcomes:
+            groups = [samples(data, by, outcome, group) for group in data[by].dropna().unique()]
+            expected = stats.f_oneway(*[group for group in groups if len(group)])
+            np.testing.assert_allclose(found.loc[outcome, 'statistic'], expected.statistic,
+                                       rtol=1e-6)
+            np.testing.assert_allclose(found.loc[outcome, 'pvalue'], expected.pvalue, rtol=1e-6)
+
+
+def test_correlations_match_scipy(feedback, shifted):
+    for data, columns in [(feedback, OUTCOMES), (shifted, ['x', 'y'])]:
+        found = correlations(data, columns)
+        assert len(found) == len(columns) ** 2
+        for row in found.itertuples():
+            if row.x == row.y:
+                assert row.r == pytest.approx(1) and row.pvalue == 0
+                continue
+            pair = data[[row.x, row.y]].dropna()
+            expected = stats.pearsonr(pair[row.x], pair[row.y])
+            assert row.n == len(pair)
+            np.testing.assert_allclose(row.r, expected.statistic, rtol=1e-6)
+            np.testing.assert_allclose(row.pvalue, expected.pvalue, rtol=1e-6)
+
+
+def test_correlations_between_two_sets(feedback):
+    found = correlations(feedback, ['interest'], ['useful', 'inside_barriers'])
+    assert list(zip(found.x, found.y)) == [('interest', 'useful'), ('interest', 'inside_barriers')]
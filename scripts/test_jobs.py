@@ -0,0 +1,62 @@
+import sys
+import time
+
+from jobs import Job, run_jobs
+
+
+def python(code, **kwargs):
+    return Job([sys.executable, '-c', code], **kwargs)
+
+
+def test_returncode_and_order():
+    results = run_jobs([python('import sys; sys.exit(3)'), python('pass')], workers=2)
+    assert [result.returncode for result in results] == [3, 0]
+    assert [result.ok for result in results] == [False, True]
+
+
+def test_streams_are_forwarded_line_by_line():
+    lines = []
+    code = "import sys; print('one'); print('two'); print('err', file=sys.stderr)"
+    [result] = run_jobs([python(code, name='job')],
+                        on_stdout=lambda job, line: lines.append(('out', job.name, line)),
+                        on_stderr=lambda job, line: lines.append(('err', job.name, line)))
+    assert result.ok
+    assert [line for line in lines if line[0] == 'out'] == [('out', 'job', 'one'),
+                                                             ('out', 'job', 'two')]
+    assert ('err', 'job', 'err') in lines
+
+
+def test_long_lines_do_not_break_the_batch():
+    lengths = []
+    jobs = [python("print('x' * 200000); print('y')"), python("print('ok')")]
+    results = run_jobs(jobs, workers=1,
+                       on_stdout=lambda job, line: lengths.append(len(line)))
+    assert all(result.ok for result in results)
+    assert lengths == [200000, 1, 2]
+
+
+def test_timeout_kills_the_job():
+    start = time.perf_counter()
+    [slow, fast] = run_jobs([python('import time; time.sleep(30)', timeout=.5),
+                             python('pass')], workers=2)
+    assert slow.timed_out and not slow.ok
+    assert slow.returncode is not None
+    assert fast.ok
+    assert time.perf_counter() - start < 10
+
+
+def test_failing_callback_fails_only_its_job():
+    def callback(job, line):
+        if job.name == 'bad':
+            raise RuntimeError('callback failed')
+
+    results = run_jobs([python("print('x')", name='bad'), python("print('x')", name='good')],
+                       on_stdout=callback)
+    assert isinstance(results[0].error, RuntimeError) and not results[0].ok
+    assert results[0].returncode is not None
+    assert results[1].ok
+
+
+def test_missing_program():
+    [result] = run_jobs([Job(['/nonexistent/program'])])
+    assert isinstance(result.error, OSError) and not result.ok
@@ -0,0 +1,45 @@
+import pytest
+
+from key_index import CaseFoldedDict, dict_key_check
+
+
+def test_lookups_ignore_case_and_prefer_exact_keys():
+    f = CaseFoldedDict({'Fl' : 1, 'fl' : 2, 'CA' : 3})
+    assert f['FL'] == 2 and f['Fl'] == 1 and f['ca'] == 3
+    assert f.get('tx') is None and 'Tx' not in f
+
+
+def test_index_follows_changes():
+    f = CaseFoldedDict()
+    f['Straße'] = 1
+    assert 'STRASSE' in f
+    del f['Straße']
+    assert 'strasse' not in f and not f._index
+    f['A'] = 1
+    f['a'] = 2
+    del f['a']
+    assert f['a'] == 1
+
+
+@pytest.mark.parametrize('k, expected', [('fl', True), ('FL', True), ('tx', False)])
+def test_dict_key_check(k, expected):
+    assert dict_key_check(k, {'fl' : 1, 'ca' : 1}) is expected
+    assert dict_key_check(k, CaseFoldedDict({'Fl' : 1, 'CA' : 1})) is expected
+
+
+def test_plain_dicts_are_not_copied_or_wrapped(monkeypatch):
+    monkeypatch.setattr(CaseFoldedDict, '__init__', None)
+    assert dict_key_check('CA', {'ca' : 1})
+
+
+def test_keys_that_are_not_strings_match_exactly():
+    f = CaseFoldedDict({1 : 'one', ('A', 2) : 'pair', None : 'none', 'B' : 'b'})
+    assert f[1] == 'one' and f[('A', 2)] == 'pair' and f[None] == 'none'
+    assert ('a', 2) not in f and 2 not in f and f['b'] == 'b'
+    f[2.5] = 'float'
+    del f[1]
+    assert 1 not in f and f[2.5] == 'float' and not any(
+        not isinstance(key, str) for key in f._index)
+    assert dict_key_check(1, {1 : 'one'}) and not dict_key_check(2, {1 : 'one'})
+    assert dict_key_check(('A', 2), {('A', 2) : 'pair'})
+    assert dict_key_check(1, CaseFoldedDict({1 : 'one'}))
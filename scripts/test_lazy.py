@@ -0,0 +1,71 @@
+import doctest
+import sys
+
+import pytest
+
+import lazy
+from lazy import LazyModule, lazy_import, parse_importtime
+
+
+@pytest.fixture
+def slow_module(tmp_path, monkeypatch):
+    (tmp_path / 'slow_module.py').write_text('answer = 42\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'slow_module', raising=False)
+    yield 'slow_module'
+    sys.modules.pop('slow_module', None)
+
+
+def test_import_is_deferred_to_first_use(slow_module):
+    module = lazy_import(slow_module)
+    assert isinstance(module, LazyModule)
+    assert slow_module not in sys.modules and not module.loaded
+    assert 'not loaded' in repr(module)
+    assert module.answer == 42
+    assert module.loaded and module._module is sys.modules[slow_module]
+
+
+def test_imported_modules_are_returned_as_they_are(slow_module):
+    __import__(slow_module)
+    assert lazy_import(slow_module) is sys.modules[slow_module]
+
+
+def test_setting_an_attribute_imports(slow_module):
+    module = lazy_import(slow_module)
+    module.answer = 0
+    assert sys.modules[slow_module].answer == 0
+
+
+def test_missing_module_raises_on_first_use():
+    module = lazy_import('no_such_module_here')
+    assert not hasattr(module, '__wrapped__')
+    with pytest.raises(ModuleNotFoundError):
+        module.anything
+    assert not module.loaded
+
+
+def test_dunders_do_not_import(slow_module):
+    module = lazy_import(slow_module)
+    assert not hasattr(module, '__wrapped__')
+    assert slow_module not in sys.modules
+    module.answer
+    assert module.__name__ == slow_module
+
+
+def test_doctest_does_not_import_the_proxies():
+    lazy_proxies = [m for m in (lazy.nltk, lazy.textblob, lazy.gensim)
+                    if isinstance(m, LazyModule) and not m.loaded]
+    doctest.DocTestFinder().find(lazy)
+    assert not any(m.loaded for m in lazy_proxies)
+
+
+def test_parse_importtime():
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 | zipimport',
+        'import time:       300 |        300 |   _codecs',
+        'import time:       200 |        500 | codecs',
+        'something else on stderr',
+    ])
+    # nested imports count towards the import that made them
+    assert parse_importtime(stderr) == [('codecs', 500), ('zipimport', 100)]
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import line_index
+from line_index import LineIndex, SUFFIX, scan
+
+CONTENTS = [
+    b'',
+    b'one line',
+    b'a\nb\n',
+    b'\n\nlast line without a newline',
+    'café\nnaïve\n☃'.encode('utf-8'),
+    b'a\r\nb\r\n\r\nc',
+]
+
+
+def write(tmp_path, content, name='text.txt'):
+    fp = tmp_path / name
+    fp.write_bytes(content)
+    return str(fp)
+
+
+@pytest.mark.parametrize('content', CONTENTS)
+@pytest.mark.parametrize('persist', [True, False])
+def test_lines_match_text_mode_split(tmp_path, content, persist):
+    fp = write(tmp_path, content)
+    with open(fp, 'r', encoding='utf-8') as f:
+        expected = f.read().split('\n')
+    with LineIndex(fp, persist=persist) as lines:
+        assert len(lines) == len(expected)
+        assert list(lines) == expected
+        assert lines[:] == expected
+        assert lines[1::2] == expected[1::2]
+        assert lines[-1] == expected[-1]
+
+
+def test_index_errors(tmp_path):
+    with LineIndex(write(tmp_path, b'a\nb'), persist=False) as lines:
+        assert lines[-2] == 'a'
+        with pytest.raises(IndexError):
+            lines[2]
+        with pytest.raises(IndexError):
+            lines[-3]
+
+
+def test_scan_across_blocks(tmp_path):
+    content = b'\n'.join(b'x' * i for i in range(100))
+    expected = np.flatnonzero(np.frombuffer(content, dtype=np.uint8) == ord('\n'))
+    np.testing.assert_array_equal(scan(write(tmp_path, content), block_size=7), expected)
+
+
+def test_saved_index_is_reused_through_a_memory_map(tmp_path, monkeypatch):
+    fp = write(tmp_path, b'a\nb\nc\n')
+    LineIndex(fp).close()
+    assert (tmp_path / ('text.txt' + SUFFIX)).exists()
+    monkeypatch.setattr(line_index, 'scan', None)
+    with LineIndex(fp) as lines:
+        assert isinstance(lines.newlines, np.memmap)
+        assert lines[:] == ['a', 'b', 'c', '']
+
+
+def test_saved_index_is_rebuilt_when_the_file_changes(tmp_path):
+    fp = write(tmp_path, b'a\nb\n')
+    LineIndex(fp).close()
+    write(tmp_path, b'a\nb\nc\nd\n')
+    with LineIndex(fp) as lines:
+        assert lines[:] == ['a', 'b', 'c', 'd', '']
+
+
+def test_unwritable_directory_keeps_the_index_in_memory(tmp_path, monkeypatch):
+    def save(*args, **kwargs):
+        raise PermissionError('read-only directory')
+    monkeypatch.setattr(line_index.np, 'save', save)
+    with LineIndex(write(tmp_path, b'a\nb\n')) as lines:
+        assert lines[:] == ['a', 'b', '']
+    assert not (tmp_path / ('text.txt' + SUFFIX)).exists()
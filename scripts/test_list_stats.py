@@ -0,0 +1,76 @@
+import array
+import math
+
+import numpy as np
+import pytest
+
+from list_stats import ListStats, block_sum, count_equal, count_less, mean, summarize
+
+VALUES = np.random.default_rng(0).integers(-5, 10, 10000).tolist()
+
+
+def plain(values, value=1, threshold=3):
+    return (len(values), values.count(value), len([x for x in values if x < threshold]),
+            sum(values))
+
+
+def found(stats):
+    return stats.n, stats.equal, stats.less, stats.total
+
+
+@pytest.mark.parametrize('convert', [list, tuple, np.array, lambda v: array.array('q', v),
+                                     lambda v: (x for x in v)])
+@pytest.mark.parametrize('block_size', [1, 999, 1 << 16])
+def test_matches_the_plain_expressions(convert, block_size):
+    stats = summarize(convert(VALUES), block_size=block_size)
+    assert found(stats) == plain(VALUES)
+    assert stats.mean == sum(VALUES) / len(VALUES)
+
+
+def test_floats_and_other_thresholds():
+    values = np.random.default_rng(1).normal(0, 1, 5000)
+    stats = summarize(values, value=values[3], threshold=.5, block_size=700)
+    assert stats.equal == 1 and stats.less == int((values < .5).sum())
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    gen = summarize((x for x in values.tolist()), value=values[3], threshold=.5)
+    assert (gen.equal, gen.less) == (stats.equal, stats.less)
+
+
+def test_functions():
+    assert count_equal(VALUES) == VALUES.count(1)
+    assert count_less(VALUES, 0) == len([x for x in VALUES if x < 0])
+    assert mean(iter(VALUES)) == sum(VALUES) / len(VALUES)
+
+
+@pytest.mark.parametrize('values', [[], (), np.array([], dtype=np.int64),
+                                    array.array('d'), iter([])])
+def test_empty_input(values):
+    stats = summarize(values)
+    assert found(stats) == (0, 0, 0, 0)
+    assert math.isnan(stats.mean)
+    assert 'n=0' in repr(stats)
+
+
+def test_int64_blocks_that_would_overflow():
+    values = np.full(10, 2 ** 62, dtype=np.int64)
+    assert block_sum(values) == 10 * 2 ** 62
+    assert summarize(values, block_size=4).total == 10 * 2 ** 62
+    assert block_sum(np.full(3, -2 ** 62, dtype=np.int64)) == -3 * 2 ** 62
+    assert block_sum(np.full(3, 2 ** 63, dtype=np.uint64)) == 3 * 2 ** 63
+    # small blocks stay on the fast path and are still exact
+    assert block_sum(np.arange(100, dtype=np.int64)) == 4950
+
+
+def test_python_ints_beyond_int64():
+    values = [2 ** 70, 1, -2 ** 70, 2 ** 64, 1]
+    for data in [values, (x for x in values)]:
+        stats = summarize(data, block_size=2)
+        assert found(stats) == plain(values)
+    assert mean(values) == (2 ** 64 + 2) / 5
+
+
+def test_merge():
+    halves = [summarize(VALUES[:3000]), summarize(iter(VALUES[3000:]))]
+    merged = halves[0].merge(halves[1])
+    assert found(merged) == plain(VALUES)
+    assert found(ListStats().update(np.array([], dtype=np.int64))) == (0, 0, 0, 0)
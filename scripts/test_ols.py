@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.formula.api as smf
+
+from ols import MomentOLS, fit_formulas, levels_of, ols_csv
+
+FEEDBACK = '../data/03_feedback.csv'
+FORMULAS = ['inside_barriers ~ outside_barriers',
+            'inside_barriers ~ outside_barriers + gender',
+            'inside_barriers ~ outside_barriers * gender']
+
+
+@pytest.fixture(scope='module')
+def feedback():
+    return pd.read_csv(FEEDBACK)
+
+
+def assert_same_fit(result, expected, rtol=1e-6):
+    assert result.nobs == expected.nobs
+    # patsy puts categorical terms first; the names are the same
+    names = list(expected.params.index)
+    assert sorted(result.params.index) == sorted(names)
+    np.testing.assert_allclose(result.params[names], expected.params, rtol=rtol)
+    np.testing.assert_allclose(result.bse[names], expected.bse, rtol=rtol)
+    np.testing.assert_allclose(result.ssr, expected.ssr, rtol=rtol)
+    np.testing.assert_allclose(result.rsquared, expected.rsquared, rtol=rtol)
+    assert result.df_model == expected.df_model
+    assert result.df_resid == expected.df_resid
+
+
+@pytest.mark.parametrize('method', ['normal', 'qr'])
+@pytest.mark.parametrize('formula', FORMULAS)
+def test_single_formula_matches_statsmodels(feedback, formula, method):
+    engine = MomentOLS([formula], levels_of(feedback, [formula]), method=method)
+    for start in range(0, len(feedback), 100):
+        engine.update(feedback.iloc[start:start + 100])
+    assert_same_fit(engine.fit(formula), smf.ols(formula, feedback).fit())
+
+
+def test_qr_is_accurate_when_the_normal_equations_are_not():
+    rng = np.random.default_rng(0)
+    x = 1e4 + rng.uniform(-1700, 1700, 100)
+    data = pd.DataFrame({'x' : x, 'y' : 1e4 * x + rng.normal(0, .03, 100)})
+    engine = MomentOLS(['y ~ x'], method='qr')
+    for start in range(0, len(data), 30):
+        engine.update(data.iloc[start:start + 30])
+    assert_same_fit(engine.fit('y ~ x'), smf.ols('y ~ x', data).fit(), rtol=1e-5)
+
+
+@pytest.mark.parametrize('method', ['normal', 'qr'])
+def test_each_formula_uses_its_own_complete_rows(feedback, method):
+    engine = MomentOLS(FORMULAS, levels_of(feedback, FORMULAS), method=method)
+    engine.update(feedback)
+    for formula in FORMULAS:
+        assert_same_fit(engine.fit(formula), smf.ols(formula, feedback).fit())
+
+
+def test_merged_engines_match_one_pass(feedback):
+    levels = levels_of(feedback, FORMULAS)
+    halves = [MomentOLS(FORMULAS, levels, method='qr').update(part)
+              for part in [feedback.iloc[:400], feedback.iloc[400:]]]
+    merged = halves[0].merge(halves[1])
+    for formula in FORMULAS:
+        assert_same_fit(merged.fit(formula), smf.ols(formula, feedback).fit())
+
+
+@pytest.mark.parametrize('cov_type', ['HC0', 'HC1'])
+def test_robust_covariances_match_statsmodels(feedback, cov_type):
+    results = fit_formulas(feedback, FORMULAS, cov_type=cov_type, chunksize=300)
+    csv_results = ols_csv(FEEDBACK, FORMULAS, cov_type=cov_type, chunksize=250)
+    for formula in FORMULAS:
+        expected = smf.ols(formula, feedback).fit(cov_type=cov_type)
+        names = list(expected.params.index)
+        np.testing.assert_allclose(results[formula].bse[names], expected.bse, rtol=1e-6)
+        np.testing.assert_allclose(csv_results[formula].bse[names], expected.bse, rtol=1e-6)
+
+
+def test_robust_covariances_need_the_second_pass(feedback):
+    engine = MomentOLS(FORMULAS, levels_of(feedback, FORMULAS)).update(feedback)
+    with pytest.raises(ValueError):
+        engine.fit(FORMULAS[0], cov_type='HC1')
+    engine.update_meat(feedback)
+    k = len(engine.design.models[FORMULAS[2]][1])
+    assert engine.meats[FORMULAS[2]].shape == (k, k)
+    # the coefficients the residuals came from must not change
+    with pytest.raises(ValueError):
+        engine.update(feedback)
+    with pytest.raises(ValueError):
+        engine.merge(MomentOLS(FORMULAS, levels_of(feedback, FORMULAS)))
+
+
+def test_ols_csv_matches_statsmodels(feedback):
+    results = ols_csv(FEEDBACK, FORMULAS, chunksize=250)
+    for formula in FORMULAS:
+        assert_same_fit(results[formula], smf.ols(formula, feedback).fit())
@@ -0,0 +1,52 @@
+import pytest
+
+import challenge_runner
+import precheck
+
+
+def test_syntax_error_location():
+    problem = precheck.check_source('def f()\n    pass\n', 'f.py')
+    assert (problem.lineno, problem.offset, problem.message) == (1, 8, "expected ':'")
+
+
+def test_valid_source():
+    assert precheck.check_source('x = 1\n') is None
+
+
+@pytest.mark.parametrize('source', [
+    'x = ' + '-' * 100000 + '1\n',
+    'x = ' + 'not ' * 100000 + '1\n',
+])
+def test_parser_exhaustion_is_a_problem(source):
+    problem = precheck.check_source(source, 'B_dict.py')
+    assert problem is not None
+    assert 'B_dict.py' in str(problem)
+
+
+def test_cache_by_contents(tmp_path):
+    fp = tmp_path / 'A.py'
+    fp.write_text('def f(:\n')
+    cache = precheck.SyntaxCache(str(tmp_path / 'cache.json'))
+    first = precheck.precheck([str(fp)], cache=cache)[str(fp)]
+    assert first.lineno == 1
+
+    # the same contents under another name come from the cache
+    other = tmp_path / 'B.py'
+    other.write_text('def f(:\n')
+    reloaded = precheck.SyntaxCache(str(tmp_path / 'cache.json'))
+    assert precheck.digest(other.read_bytes()) in reloaded
+    second = precheck.precheck([str(other)], cache=reloaded)[str(other)]
+    assert (second.fp, second.lineno, second.message) == (str(other), 1, first.message)
+
+
+def test_pathological_solution_does_not_stop_the_batch(tmp_path):
+    challenge = tmp_path / '01_structures'
+    challenge.mkdir()
+    (challenge / 'B_dict.py').write_text('x = ' + '-' * 100000 + '1\n')
+    (challenge / 'test_B.py').write_text('import B_dict\n\ndef test_x():\n    assert B_dict.x\n')
+    (challenge / 'A_list.py').write_text('x = 1\n')
+    (challenge / 'test_A.py').write_text('import A_list\n\ndef test_x():\n    assert A_list.x == 1\n')
+
+    results = challenge_runner.run_suites(challenge_runner.discover(str(tmp_path)))
+    statuses = {result.suite.test_file : result.status for result in results}
+    assert statuses == {'test_A.py' : 'passed', 'test_B.py' : 'syntax'}
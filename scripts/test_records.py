@@ -0,0 +1,85 @@
+import array
+
+import pytest
+
+from records import RecordStore, RecordView, Schema, memory_report
+
+RECORDS = [
+    {'zero' : 0, 'one' : 1.5, 'flag' : True, 'name' : 'a', 'two' : {'deep' : 2, 'none' : None}},
+    {'zero' : 1, 'one' : 2, 'flag' : False, 'name' : 'b', 'two' : {'deep' : 2 ** 70, 'none' : None}},
+    {'zero' : -(1 << 63), 'one' : 3.5, 'flag' : True, 'name' : 'c', 'two' : {'deep' : 4, 'none' : 1}},
+]
+
+
+def test_records_round_trip():
+    store = RecordStore(RECORDS)
+    assert len(store) == len(RECORDS)
+    for record, view in zip(RECORDS, store):
+        assert isinstance(view, RecordView)
+        assert view.to_dict() == record
+        assert view == record
+    # the types come back as they went in
+    assert [type(view['one']) for view in store] == [float, int, float]
+    assert [view['flag'] for view in store] == [True, False, True]
+    assert store[1]['two']['deep'] == 2 ** 70
+    assert store[-1]['name'] == 'c' and repr(store[0]) == repr(RECORDS[0])
+
+
+def test_numbers_stay_in_arrays_until_they_cannot():
+    store = RecordStore(RECORDS)
+    zero = store.schema.tree['zero']
+    assert isinstance(store.columns[zero], array.array)
+    for key in ['one', 'flag', 'name']:
+        assert isinstance(store.columns[store.schema.tree[key]], list)
+    assert isinstance(store.columns[store.schema.tree['two']['deep']], list)
+    store.append(dict(RECORDS[0], zero=1 << 63))
+    assert isinstance(store.columns[zero], list) and store[-1]['zero'] == 1 << 63
+
+
+def test_schema_paths_and_views():
+    schema = Schema.from_record(RECORDS[0])
+    assert schema.paths[-2:] == [('two', 'deep'), ('two', 'none')]
+    view = RecordStore(RECORDS, schema)[0]
+    assert list(view) == list(RECORDS[0]) and len(view['two']) == 2
+    with pytest.raises(KeyError):
+        view['missing']
+
+
+@pytest.mark.parametrize('record', [
+    {'zero' : 0},
+    dict(RECORDS[0], extra=1),
+    dict(RECORDS[0], two=2),
+    dict(RECORDS[0], zero={'a' : 1}),
+    dict(RECORDS[0], two={'deep' : 2, 'other' : None}),
+])
+def test_records_that_do_not_match_the_schema(record):
+    store = RecordStore(RECORDS[:1])
+    with pytest.raises(ValueError):
+        store.append(record)
+    assert len(store) == 1
+
+
+def test_schemas_without_leaves_count_their_records():
+    store = RecordStore([{}, {}])
+    assert len(store) == 2 and store[1].to_dict() == {}
+    store = RecordStore([{'empty' : {}}] * 3)
+    assert len(store) == 3 and store[2].to_dict() == {'empty' : {}}
+    assert store.nbytes == 0
+
+
+def test_empty_store():
+    store = RecordStore()
+    assert len(store) == 0 and list(store) == [] and store.nbytes == 0
+    with pytest.raises(IndexError):
+        store[0]
+    store.extend(RECORDS)
+    assert [view.to_dict() for view in store] == RECORDS
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_memory_report():
+    records = [{'zero' : 0, 'one' : 1, 'two' : {'deep' : i + .5}} for i in range(1000)]
+    report = memory_report(records)
+    assert report['store'] < report['dict'] / 5
+    assert memory_report([]) == {'dict' : 0, 'store' : 0}
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from resampling import bootstrap, mean, mean_difference, permutation_test
+
+FEEDBACK = '../data/03_feedback.csv'
+
+
+@pytest.fixture(scope='module')
+def barriers():
+    data = pd.read_csv(FEEDBACK)
+    return data['inside_barriers'].to_numpy(), data['outside_barriers'].to_numpy()
+
+
+@pytest.mark.parametrize('test', [bootstrap, permutation_test])
+def test_pool_draws_the_same_resamples_as_serial(barriers, test):
+    # 1000 resamples in batches of 150 make seven batches of seeds
+    kwargs = dict(n_resamples=1000, batch_size=150, seed=1234)
+    serial = test(barriers, mean_difference, **kwargs)
+    pooled = test(barriers, mean_difference, processes=2, **kwargs)
+    distribution = 'distribution' if test is bootstrap else 'null_distribution'
+    assert len(getattr(serial, distribution)) == 1000
+    assert len(np.unique(getattr(serial, distribution))) > 100
+    np.testing.assert_array_equal(getattr(serial, distribution), getattr(pooled, distribution))
+
+
+def test_seed_decides_the_draws(barriers):
+    first = bootstrap(barriers[0], mean, n_resamples=500, seed=0)
+    assert np.array_equal(first.distribution,
+                          bootstrap(barriers[0], mean, n_resamples=500, seed=0).distribution)
+    assert not np.array_equal(first.distribution,
+                              bootstrap(barriers[0], mean, n_resamples=500, seed=1).distribution)
+
+
+@pytest.mark.parametrize('alternative', ['greater', 'less'])
+def test_permutation_pvalue_matches_scipy(alternative):
+    # small enough for scipy to go through every arrangement exactly
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(.5, 1, 7), rng.normal(0, 1, 6)
+
+    def statistic(x, y, axis=-1):
+        return x.mean(axis=axis) - y.mean(axis=axis)
+
+    expected = stats.permutation_test((a, b), statistic, n_resamples=np.inf,
+                                      alternative=alternative).pvalue
+    found = permutation_test((a, b), mean_difference, n_resamples=20000,
+                             alternative=alternative, seed=0)
+    assert found.statistic == pytest.approx(a.mean() - b.mean())
+    # Monte Carlo error of 20000 resamples is at most .0035
+    assert abs(found.pvalue - expected) < .015
+
+
+def test_two_sided_pvalue_of_a_symmetric_null():
+    # with equal sizes the null of a mean difference is symmetric, so both
+    # ways of counting two-sided p-values agree
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(.8, 1, 6), rng.normal(0, 1, 6)
+
+    def statistic(x, y, axis=-1):
+        return x.mean(axis=axis) - y.mean(axis=axis)
+
+    expected = stats.permutation_test((a, b), statistic, n_resamples=np.inf).pvalue
+    found = permutation_test((a, b), mean_difference, n_resamples=20000, seed=0).pvalue
+    assert abs(found - expected) < .015
+
+
+def test_bootstrap_interval_matches_scipy(barriers):
+    a = barriers[0][~np.isnan(barriers[0])]
+    expected = stats.bootstrap((a,), np.mean, n_resamples=20000, method='percentile',
+                               random_state=0).confidence_interval
+    found = bootstrap(a, mean, n_resamples=20000, seed=0)
+    assert found.statistic == pytest.approx(a.mean())
+    np.testing.assert_allclose(found.confidence_interval, expected, atol=.02)
+    assert found.standard_error == pytest.approx(a.std(ddof=1) / np.sqrt(len(a)), rel=.05)
+
+
+def test_bad_arguments(barriers):
+    with pytest.raises(ValueError):
+        permutation_test(barriers, alternative='sideways')
+    with pytest.raises(ValueError):
+        bootstrap(([np.nan, np.nan],))
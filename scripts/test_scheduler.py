@@ -0,0 +1,170 @@
+from concurrent.futures import Future
+import datetime
+import os
+import pwd
+
+import pytest
+
+from scheduler import (CronSchedule, FakeClock, ImmediateExecutor, Scheduler,
+                       cron_environment, parse_crontab, run_command)
+
+
+def at(*args):
+    return datetime.datetime(*args)
+
+
+class ManualExecutor(object):
+    """Holds submitted work until `finish` is called"""
+
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        self.pending.append((future, func, args, kwargs))
+        return future
+
+    def finish(self):
+        future, func, args, kwargs = self.pending.pop(0)
+        future.set_result(func(*args, **kwargs))
+
+    def shutdown(self, wait=True):
+        pass
+
+
+@pytest.mark.parametrize('expression, after, expected', [
+    ('@hourly', at(2016, 6, 1, 12, 30), at(2016, 6, 1, 13, 0)),
+    ('00 08 * * 1', at(2016, 6, 6, 8, 0), at(2016, 6, 13, 8, 0)),
+    ('*/15 * * * *', at(2016, 6, 1, 12, 31), at(2016, 6, 1, 12, 45)),
+    ('0 9-17/4 * * mon-fri', at(2016, 6, 3, 17, 1), at(2016, 6, 6, 9, 0)),
+    ('0 0 * jan,jul *', at(2016, 2, 1), at(2016, 7, 1)),
+    ('0 0 29 2 *', at(2017, 1, 1), at(2020, 2, 29)),
+    ('0 0 * * 7', at(2016, 6, 1), at(2016, 6, 5)),
+    # both day fields restricted: either one matches
+    ('0 0 13 * 5', at(2016, 6, 1), at(2016, 6, 3)),
+    # a stepped '*' is unrestricted, as in vixie cron: both must match
+    ('0 0 */2 * 5', at(2016, 6, 3), at(2016, 6, 17)),
+    ('0 0 13 * */2', at(2016, 6, 1), at(2016, 8, 13)),
+])
+def test_next_after(expression, after, expected):
+    assert CronSchedule(expression).next_after(after) == expected
+
+
+@pytest.mark.parametrize('expression', ['* * * *', '60 * * * *', '* * 0 * *',
+                                        '5-1 * * * *', '*/0 * * * *', '0 0 31 2 *'])
+def test_invalid_schedules(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression).next_after(at(2016, 1, 1))
+
+
+def test_parse_system_crontab():
+    text = open('../etc/crond_example').read()
+    [(schedule, user, command)], env = parse_crontab(text, system=True)
+    assert schedule.expression == '@hourly'
+    assert user == 'dillon'
+    assert command == 'cd ~/scripts; python simple.py'
+    assert env['PATH'].startswith('/home/dillon/')
+
+
+def test_due_jobs_run_once():
+    clock = FakeClock(at(2016, 6, 6, 7, 59, 30))
+    scheduler = Scheduler(clock=clock, executor=ImmediateExecutor())
+    runs = []
+    job = scheduler.add('report', '00 08 * * *', runs.append, 'ran')
+    assert scheduler.run_pending() == 0
+    clock.advance(30)
+    assert scheduler.run_pending() == 1
+    assert scheduler.run_pending() == 0
+    assert runs == ['ran'] and job.history[-1].ok
+    assert scheduler.next_due() == at(2016, 6, 7, 8, 0)
+
+
+def test_missed_runs_are_coalesced():
+    clock = FakeClock(at(2016, 6, 6, 12, 0, 30))
+    scheduler = Scheduler(clock=clock, executor=ImmediateExecutor())
+    job = scheduler.add('tick', '* * * * *', lambda: None)
+    clock.advance(24 * 60 * 60)
+    assert scheduler.run_pending() == 1
+    assert job.history[-1].scheduled == at(2016, 6, 6, 12, 1)
+    assert job.history[-1].latency == 24 * 60 * 60 - 30
+    assert scheduler.next_due() == at(2016, 6, 7, 12, 1)
+
+
+def test_late_dispatch_within_the_minute_keeps_the_next_run():
+    clock = FakeClock(at(2016, 6, 6, 12, 0, 30))
+    scheduler = Scheduler(clock=clock, executor=ImmediateExecutor())
+    scheduler.add('tick', '* * * * *', lambda: None)
+    clock.advance(50)
+    assert scheduler.run_pending() == 1
+    assert scheduler.next_due() == at(2016, 6, 6, 12, 2)
+
+
+@pytest.mark.parametrize('overlap, started, runs, skipped', [
+    ('skip', 1, 1, 1),
+    ('allow', 2, 2, 0),
+    ('queue', 1, 2, 0),
+])
+def test_overlap_policies(overlap, started, runs, skipped):
+    clock = FakeClock(at(2016, 6, 6, 12, 0, 30))
+    executor = ManualExecutor()
+    scheduler = Scheduler(clock=clock, executor=executor)
+    job = scheduler.add('slow', '* * * * *', lambda: None, overlap=overlap)
+    clock.advance(60)
+    scheduler.run_pending()
+    clock.advance(60)
+    scheduler.run_pending()
+    assert len(executor.pending) == started
+    # a queued run starts when the running one finishes
+    executor.finish()
+    assert (job.runs, job.skipped) == (runs, skipped)
+    while executor.pending:
+        executor.finish()
+    assert job.running == 0
+
+
+def test_failures_are_recorded():
+    clock = FakeClock(at(2016, 6, 6, 12, 0, 30))
+    scheduler = Scheduler(clock=clock, executor=ImmediateExecutor())
+    scheduler.add('broken', '* * * * *', lambda: 1 / 0)
+    clock.advance(60)
+    scheduler.run_pending()
+    report = scheduler.metrics()['broken']
+    assert (report['runs'], report['failures']) == (1, 1)
+    assert 'ZeroDivisionError' in report['last_error']
+
+
+def test_jitter_delays_runs():
+    clock = FakeClock(at(2016, 6, 6, 12, 0, 30))
+    scheduler = Scheduler(clock=clock, executor=ImmediateExecutor(), seed=0)
+    scheduler.add('spread', '* * * * *', lambda: None, jitter=20)
+    due = scheduler.next_due()
+    assert at(2016, 6, 6, 12, 1) < due < at(2016, 6, 6, 12, 1, 20)
+
+
+def test_jitter_longer_than_the_period_skips_no_runs():
+    clock = FakeClock(at(2016, 6, 6, 12, 0, 30))
+    scheduler = Scheduler(clock=clock, executor=ImmediateExecutor(), seed=0)
+    job = scheduler.add('spread', '* * * * *', lambda: None, jitter=600)
+    for _ in range(60 * 60):
+        clock.advance(1)
+        scheduler.run_pending()
+        assert scheduler.next_due() < clock.now() + datetime.timedelta(minutes=2)
+    # one run for each minute from 12:01 to 12:59, and maybe the one at 13:00
+    assert job.runs in (59, 60) and job.skipped == 0
+
+
+def test_crontab_jobs_get_a_cron_environment(monkeypatch):
+    monkeypatch.setenv('KEPT', 'yes')
+    me = pwd.getpwuid(os.getuid())
+    env = cron_environment({'PATH' : '/bin:/usr/bin'}, me.pw_name)
+    assert env['HOME'] == me.pw_dir and env['LOGNAME'] == me.pw_name
+    assert env['PATH'] == '/bin:/usr/bin' and env['KEPT'] == 'yes'
+    with pytest.raises(ValueError):
+        cron_environment({}, 'no-such-user-here')
+
+    scheduler = Scheduler(clock=FakeClock(), executor=ImmediateExecutor())
+    [job] = scheduler.add_crontab('PATH=/bin:/usr/bin\n@hourly {} cd ~ && pwd\n'.format(
+        me.pw_name), system=True)
+    assert job.kwargs['user'] == me.pw_name
+    output = run_command(job.args[0], **job.kwargs).stdout.decode().strip()
+    assert os.path.realpath(output) == os.path.realpath(me.pw_dir)
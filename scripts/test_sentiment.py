@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from sentiment import SentimentScorer
+
+LEXICON = {'good' : (.7, 1., False), 'bad' : (-.7, 1., False),
+           'very' : (.2, 1.3, True), 'really' : (.2, 2., True)}
+SENTENCES = ['good', 'not good', 'this is not a good movie', 'very good', 'not very good',
+             'never bad', "it isn't good", 'good!', 'really not good', 'Good. Bad, terrible!',
+             'no words here', '', 'not so very bad', "don't be bad", 'very, very good!']
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return SentimentScorer(LEXICON)
+
+
+@pytest.mark.parametrize('sentence, expected', [
+    ('good', .7),
+    ('not good', -.35),
+    ('not a good', -.35),
+    ('not an good', .7),
+    ('very good', .91),
+    ('good!', .875),
+    ('good bad', 0.),
+    ('nothing to see', 0.),
+])
+def test_negations_and_modifiers(scorer, sentence, expected):
+    assert scorer.score_one(sentence) == pytest.approx(expected)
+
+
+def test_plain_polarities_are_means():
+    scorer = SentimentScorer({'good' : .5, 'bad' : -1.})
+    np.testing.assert_allclose(scorer.score(['good bad good', 'not good', 'bad']),
+                               [0., -.25, -1.])
+
+
+def test_cache_and_batches_agree(scorer):
+    one_by_one = [scorer.score_one(sentence) for sentence in SENTENCES]
+    scorer.cache.clear()
+    np.testing.assert_allclose(scorer.score(SENTENCES * 2), one_by_one * 2)
+    hits = scorer.hits
+    np.testing.assert_allclose(scorer.score(SENTENCES), one_by_one)
+    assert scorer.hits == hits + len(SENTENCES)
+
+
+def test_agrees_with_textblob():
+    textblob = pytest.importorskip('textblob')
+    scorer = SentimentScorer()
+    expected = [textblob.TextBlob(sentence).sentiment.polarity for sentence in SENTENCES]
+    np.testing.assert_allclose(scorer.score(SENTENCES), expected)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from streaming_stats import ColumnStats, describe_csv
+
+FEEDBACK = '../data/03_feedback.csv'
+
+
+@pytest.mark.parametrize('chunksize', [37, 1000000])
+def test_describe_csv_matches_describe(chunksize):
+    expected = pd.read_csv(FEEDBACK).describe()
+    found = describe_csv(FEEDBACK, chunksize=chunksize, k=10000)
+    assert list(found.columns) == list(expected.columns)
+    for statistic in ['count', 'mean', 'std', 'min', 'max']:
+        np.testing.assert_allclose(found.loc[statistic], expected.loc[statistic])
+
+
+@pytest.mark.parametrize('chunksize', [37, 1000000])
+def test_describe_csv_matches_skew_and_kurtosis(chunksize):
+    data = pd.read_csv(FEEDBACK).select_dtypes('number')
+    found = describe_csv(FEEDBACK, chunksize=chunksize)
+    np.testing.assert_allclose(found.loc['skew'], data.skew())
+    np.testing.assert_allclose(found.loc['kurtosis'], data.kurtosis())
+
+
+def test_quantiles_within_the_sketch_error(tmp_path):
+    fp = str(tmp_path / 'numbers.csv')
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'x' : rng.lognormal(size=100000),
+                         'y' : rng.integers(0, 1000, size=100000)})
+    data.to_csv(fp, index=False)
+    k = 200
+    found = describe_csv(fp, chunksize=7919, k=k)
+    # a KLL sketch misplaces ranks by about 1.7 / k; allow three times that
+    # so that the test does not fail on an unlucky draw
+    bound = 3 * 1.7 / k
+    for column in data.columns:
+        for q in [.25, .5, .75]:
+            estimate = found.loc['{:g}%'.format(100 * q), column]
+            low, high = data[column].quantile([q - bound, q + bound])
+            assert low <= estimate <= high
+
+
+def test_text_in_a_later_chunk(tmp_path):
+    fp = str(tmp_path / 'mixed.csv')
+    pd.DataFrame({'x' : ['1', '2', '', '4', '5'],
+                  'y' : ['', '', '', 'text', '']}).to_csv(fp, index=False)
+    found = describe_csv(fp, chunksize=2)
+    assert list(found.columns) == ['x']
+    assert found.loc['count', 'x'] == 4
+    # asked for explicitly, text is left out
+    found = describe_csv(fp, columns=['y'], chunksize=2)
+    assert found.loc['count', 'y'] == 0
+
+
+def test_column_stats_counts_text_apart_from_missing():
+    stats = ColumnStats().update_column(pd.Series(['1', None, 'a', 3.5]))
+    assert (stats.moments.n, stats.missing, stats.text) == (2, 1, 1)
+    assert stats.describe()['max'] == 3.5
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tables import DimensionTable, height_above_sea, lookup_join, melt_csv, pivot_parquet
+
+
+@pytest.fixture
+def people():
+    return pd.DataFrame({'name' : ['a', 'b', 'c', 'd', 'e'],
+                         'city' : ['Denver', 'Paris', 'Berkeley', None, 'Denver'],
+                         'height' : [1.5, 1.6, 1.7, 1.8, 1.9]})
+
+
+@pytest.fixture
+def cities():
+    return pd.DataFrame({'city' : ['Berkeley', 'Denver', 'Reno'],
+                         'height' : [52., 1730., 1373.]})
+
+
+def expected(people, cities, how):
+    out = people.merge(cities, on='city', how=how)
+    if how == 'outer':
+        out = out.sort_values('city', kind='stable', ignore_index=True)
+    return out
+
+
+@pytest.mark.parametrize('how', ['inner', 'left', 'outer'])
+def test_join_matches_merge(people, cities, how):
+    joined = DimensionTable(cities, on='city').join(people, how=how)
+    pd.testing.assert_frame_equal(joined, expected(people, cities, how),
+                                  check_dtype=False)
+
+
+@pytest.mark.parametrize('how', ['inner', 'left'])
+def test_join_with_categorical_keys(people, cities, how):
+    people = people.astype({'city' : 'category'})
+    joined = DimensionTable(cities, on='city').join(people, how=how)
+    merged = people.merge(cities, on='city', how=how)
+    assert list(joined['name']) == list(merged['name'])
+    assert list(joined['city'].astype(object)) == list(merged['city'].astype(object))
+    np.testing.assert_array_equal(joined['height_y'], merged['height_y'])
+
+
+def test_lookup_join_falls_back_to_merge(people, cities):
+    cities = pd.concat([cities, cities.iloc[:1]], ignore_index=True)
+    pd.testing.assert_frame_equal(lookup_join(people, cities, on='city', how='left'),
+                                  people.merge(cities, on='city', how='left'))
+
+
+def test_keys_must_be_unique(cities):
+    with pytest.raises(ValueError):
+        DimensionTable(pd.concat([cities, cities]), on='city')
+
+
+def test_height_above_sea_keeps_unknown_cities(tmp_path, people):
+    fp_people, fp_cities, fp_out = (str(tmp_path / name) for name in
+                                    ['people.csv', 'cities.csv', 'out.csv'])
+    people.to_csv(fp_people, index=False)
+    pd.DataFrame({'name' : ['Berkeley', 'Denver'], 'height' : [52., 1730.]}).to_csv(
+        fp_cities, index=False)
+    height_above_sea(fp_people, fp_cities, fp_out, chunksize=2)
+    out = pd.read_csv(fp_out)
+    assert list(out['name']) == list(people['name'])
+    assert list(out['city'].fillna('')) == ['Denver', 'Paris', 'Berkeley', '', 'Denver']
+    np.testing.assert_allclose(out['height_above_sea'],
+                               [1731.5, np.nan, 53.7, np.nan, 1731.9], rtol=1e-6)
+
+
+def melted(tmp_path, wide, **kwargs):
+    fp_in, fp_out = str(tmp_path / 'wide.csv'), str(tmp_path / 'long.parquet')
+    wide.to_csv(fp_in, index=False)
+    n = melt_csv(fp_in, fp_out, **kwargs)
+    out = pd.read_parquet(fp_out)
+    assert n == len(out)
+    return out
+
+
+def test_melt_csv_matches_melt(tmp_path):
+    wide = pd.DataFrame({'name' : list('pqrst'), 'a' : [1, 2, None, 4, 5],
+                         'b' : [.5, 1., 1.5, 2., 2.5]})
+    out = melted(tmp_path, wide, id_vars=['name'], blocksize=2)
+    expected = pd.concat([pd.melt(wide[i:i + 2], id_vars=['name'])
+                          for i in range(0, len(wide), 2)], ignore_index=True)
+    pd.testing.assert_frame_equal(out, expected, check_dtype=False)
+
+
+def test_melt_csv_takes_a_single_id_var(tmp_path):
+    wide = pd.DataFrame({'name' : ['p', 'q'], 'a' : [1, 2], 'b' : [3, 4]})
+    out = melted(tmp_path, wide, id_vars='name')
+    assert list(out['variable']) == ['a', 'a', 'b', 'b']
+
+
+def test_melt_csv_values_that_turn_into_text(tmp_path):
+    wide = pd.DataFrame({'name' : ['p', 'q', 'r'], 'a' : ['1', '2', 'q']})
+    with pytest.raises(ValueError, match='value_dtype=str'):
+        melted(tmp_path, wide, id_vars='name', blocksize=2)
+    out = melted(tmp_path, wide, id_vars='name', blocksize=2, value_dtype=str)
+    assert list(out['value']) == ['1', '2', 'q']
+
+
+def test_pivot_parquet_undoes_melt_csv(tmp_path):
+    wide = pd.DataFrame({'name' : list('pqrst'), 'a' : [1., 2, 3, 4, 5],
+                         'b' : [.5, 1., 1.5, 2., 2.5]})
+    melted(tmp_path, wide, id_vars='name', blocksize=2)
+    fp_wide = str(tmp_path / 'wide.parquet')
+    pivot_parquet(str(tmp_path / 'long.parquet'), fp_wide, index='name')
+    pd.testing.assert_frame_equal(pd.read_parquet(fp_wide), wide)
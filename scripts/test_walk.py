@@ -0,0 +1,81 @@
+import os
+import queue
+import threading
+import types
+
+import pytest
+
+import walk
+from walk import count, scan
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for directory in ['a/b/c', 'a/d', 'e', '.hidden/f', 'skip/g']:
+        os.makedirs(str(tmp_path / directory))
+    for fp in ['top.txt', 'a/one.py', 'a/b/two.txt', 'a/b/c/three.py', 'a/d/.dot.txt',
+               'e/four.csv', '.hidden/f/five.txt', 'skip/g/six.txt']:
+        (tmp_path / fp).write_text(fp)
+    for i in range(50):
+        (tmp_path / 'e' / 'many{}.txt'.format(i)).write_text('x' * i)
+    os.symlink(str(tmp_path / 'a'), str(tmp_path / 'link_to_a'))
+    os.symlink(str(tmp_path / 'top.txt'), str(tmp_path / 'link_to_top.txt'))
+    os.symlink(str(tmp_path / 'missing'), str(tmp_path / 'broken_link'))
+    return str(tmp_path)
+
+
+def walked(root):
+    files, directories = set(), set()
+    for path, dirnames, filenames in os.walk(root):
+        files.update(os.path.join(path, name) for name in filenames)
+        directories.update(os.path.join(path, name) for name in dirnames)
+    return files, directories
+
+
+def test_files_match_os_walk(tree):
+    files, directories = walked(tree)
+    assert {entry.path for entry in scan(tree, threads=4)} == files
+    found = {entry.path for entry in scan(tree, threads=4, directories=True)}
+    assert found == files | directories
+
+
+def test_filters(tree):
+    files, _ = walked(tree)
+    found = {entry.path for entry in scan(tree, include=['*.py', '*.csv'])}
+    assert found == {fp for fp in files if fp.endswith(('.py', '.csv'))}
+    found = {entry.path for entry in scan(tree, exclude='skip')}
+    assert found == {fp for fp in files if os.sep + 'skip' + os.sep not in fp}
+    found = {entry.path for entry in scan(tree, hidden=False)}
+    assert found == {fp for fp in files if os.sep + '.' not in fp[len(tree):]}
+
+
+def test_follow_symlinks(tree):
+    files = set()
+    for path, _, filenames in os.walk(tree, followlinks=True):
+        files.update(os.path.join(path, name) for name in filenames)
+    assert {entry.path for entry in scan(tree, follow_symlinks=True)} == files
+
+
+def test_count(tree):
+    files, _ = walked(tree)
+    sizes = sum(os.lstat(fp).st_size for fp in files)
+    assert count(tree) == (len(files), sizes)
+
+
+def test_missing_root_yields_nothing(tmp_path):
+    assert list(scan(str(tmp_path / 'missing'))) == []
+
+
+def test_closing_early_stops_the_threads(tree, monkeypatch):
+    # a tiny queue keeps the readers blocked on a consumer that has left
+    monkeypatch.setattr(walk, 'queue', types.SimpleNamespace(
+        Queue=lambda maxsize: queue.Queue(2), Full=queue.Full))
+    before = threading.active_count()
+    entries = scan(tree, threads=4)
+    first = next(entries)
+    assert os.path.exists(first.path)
+    entries.close()
+    assert threading.active_count() == before
+    # and a fresh walk still sees everything
+    monkeypatch.undo()
+    assert len(list(scan(tree))) == len(walked(tree)[0])
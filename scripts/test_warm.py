@@ -0,0 +1,89 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from warm import submit
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('warm') / 'warm.sock')
+    process = subprocess.Popen([sys.executable, 'warm.py', '--socket', path, 'serve'],
+                               stdout=subprocess.PIPE)
+    process.stdout.readline()
+    yield path
+    process.terminate()
+    process.wait(10)
+
+
+@pytest.fixture
+def script(tmp_path):
+    def write(code):
+        fp = tmp_path / 'job.py'
+        fp.write_text(code)
+        return str(fp)
+    return write
+
+
+def test_output_and_exit_code(server, script):
+    fp = script("import os, sys\nprint(os.getcwd(), sys.argv[1:])\n"
+                "print('oops', file=sys.stderr)\nsys.exit(3)\n")
+    result = submit(fp, ['a', 'b'], cwd='/', path=server)
+    assert result['returncode'] == 3 and not result['timed_out']
+    assert result['stdout'] == "/ ['a', 'b']\n"
+    assert result['stderr'] == 'oops\n'
+
+
+def test_timeout_cannot_be_caught(server, script):
+    fp = script("import time\nwhile True:\n    try:\n        time.sleep(10)\n"
+                "    except BaseException:\n        pass\n")
+    start = time.perf_counter()
+    result = submit(fp, timeout=.5, path=server)
+    assert time.perf_counter() - start < 5
+    assert result['timed_out'] and result['returncode'] < 0
+
+
+def test_timeout_kills_what_the_job_started(server, script, tmp_path):
+    pid_fp = tmp_path / 'pid'
+    fp = script("import subprocess\np = subprocess.Popen(['sleep', '30'])\n"
+                "open({!r}, 'w').write(str(p.pid))\np.wait()\n".format(str(pid_fp)))
+    result = submit(fp, timeout=.5, path=server)
+    assert result['timed_out']
+    pid = int(pid_fp.read_text())
+    for _ in range(50):
+        # the sleep was killed; it may linger as a zombie until init reaps it
+        try:
+            with open('/proc/{}/stat'.format(pid)) as f:
+                if f.read().split(')')[-1].split()[0] == 'Z':
+                    break
+        except FileNotFoundError:
+            break
+        time.sleep(.1)
+    else:
+        os.kill(pid, 9)
+        pytest.fail('the job\'s child survived the timeout')
+
+
+def plain(path, line):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    client.sendall(line.encode('utf-8') + b'\n')
+    chunks = []
+    while True:
+        chunk = client.recv(65536)
+        if not chunk:
+            client.close()
+            return b''.join(chunks).decode('utf-8')
+        chunks.append(chunk)
+
+
+def test_plain_line_protocol(server, script):
+    fp = script("import os, sys\nprint(os.path.basename(os.getcwd()) == "
+                "os.path.basename(os.path.dirname(__file__)), sys.argv[1:])\n")
+    assert plain(server, "{} 'two words'".format(fp)) == "True ['two words']\n"
+    fp = script("raise SystemExit('bad')\n")
+    assert plain(server, fp) == 'bad\n[warm: exit status 1]\n'
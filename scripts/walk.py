@@ -0,0 +1,148 @@
+#!/bin/env python
+
+# A concurrent replacement for `glob('*')` and `os.listdir` loops over very
+# large directory trees.
+#
+# Directories are read with `os.scandir` by a pool of threads, one task per
+# directory, and entries are handed to the caller through a queue as soon
+# as they are found. The `DirEntry` objects carry the type (and on Windows,
+# the stat) information the operating system returned with the listing,
+# so `entry.is_dir()` and friends do not need another system call.
+
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+import os
+import queue
+import threading
+
+_DONE = object()
+
+
+def _matches(name, patterns):
+    return any(fnmatch(name, pattern) for pattern in patterns)
+
+
+def scan(root, include=None, exclude=None, threads=16, hidden=True,
+         follow_symlinks=False, directories=False):
+    """Yield the `os.DirEntry` of every file below `root`, in no particular
+    order, while the walk is still running
+
+    Parameters
+    ----------
+    root : str
+        directory to walk
+    include : list of str, optional
+        shell-style patterns; only files whose name matches one are yielded
+    exclude : list of str, optional
+        shell-style patterns; matching files are skipped and matching
+        directories are not descended into
+    threads : int
+        number of directories read at once
+    hidden : bool
+        whether to include names starting with a dot, which `glob` skips
+    follow_symlinks : bool
+        whether to descend into symlinks to directories; beware of cycles
+    directories : bool
+        also yield the entries of directories
+
+    >>> sorted(entry.name for entry in scan('../data', include=['*.csv']))[0]
+    '01_roster.csv'
+    """
+    include = [include] if isinstance(include, str) else include
+    exclude = [exclude] if isinstance(exclude, str) else (exclude or [])
+    found = queue.Queue(maxsize=10000)
+    stop = threading.Event()
+    lock = threading.Lock()
+    pending = [1]
+
+    def put(item):
+        # a bounded queue keeps a slow consumer from buffering the whole tree
+        while not stop.is_set():
+            try:
+                found.put(item, timeout=.1)
+                return
+            except queue.Full:
+                pass
+
+    def visit(path):
+        try:
+            if stop.is_set():
+                return
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if stop.is_set():
+                        return
+                    name = entry.name
+                    if (not hidden and name.startswith('.')) or _matches(name, exclude):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                        descend = is_dir and (follow_symlinks or not entry.is_symlink())
+                    except OSError:
+                        continue
+                    if descend:
+                        with lock:
+                            pending[0] += 1
+                        try:
+                            pool.submit(visit, entry.path)
+                        except RuntimeError:
+                            # the consumer stopped and the pool is shutting down
+                            return
+                    if is_dir:
+                        if directories:
+                            put(entry)
+                    elif include is None or _matches(name, include):
+                        put(entry)
+        except OSError:
+            # unreadable or vanished directories are skipped, like os.walk
+            pass
+        finally:
+            with lock:
+                pending[0] -= 1
+                if not pending[0]:
+                    put(_DONE)
+
+    pool = ThreadPoolExecutor(threads)
+    pool.submit(visit, root)
+    try:
+        while True:
+            item = found.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=True)
+
+
+def count(root, **kwargs):
+    """Number and total size of the files below `root`"""
+    files, size = 0, 0
+    for entry in scan(root, **kwargs):
+        files += 1
+        try:
+            size += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            pass
+    return files, size
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('root', nargs='?', default='.')
+    parser.add_argument('--include', nargs='+')
+    parser.add_argument('--exclude', nargs='+')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--count', action='store_true',
+                        help='only print the number and total size of the files')
+    args = parser.parse_args()
+
+    if args.count:
+        files, size = count(args.root, include=args.include, exclude=args.exclude,
+                            threads=args.threads)
+        print("{} files, {} bytes".format(files, size))
+    else:
+        for entry in scan(args.root, include=args.include, exclude=args.exclude,
+                          threads=args.threads):
+            print(entry.path)
@@ -0,0 +1,257 @@
+#!/bin/env python
+
+# A resident fork server that keeps a Python interpreter warm.
+#
+# Every cron job that runs `python simple.py` pays for interpreter startup
+# and for its imports before doing any work. Instead, start this once:
+#
+#     python warm.py serve --preload numpy pandas
+#
+# and submit scripts to it over a Unix socket. Starting a Python client
+# would cost most of what the server saves, so the socket also takes a
+# plain line with the script and its arguments, and answers with the
+# script's output, which any Unix socket client can send:
+#
+#     echo /home/dillon/scripts/simple.py | nc -U /tmp/warm-1000.sock
+#     echo /home/dillon/scripts/simple.py | socat - UNIX-CONNECT:/tmp/warm-1000.sock
+#
+# The script runs in its own directory, and a line saying so is added to
+# the output when it fails. From Python, `submit()` (or `python warm.py run
+# simple.py`) sends a JSON request and gets back the exit code and output.
+#
+# The server forks a child for every request, which forks again to run the
+# script with `runpy`. Both inherit the already-imported modules, so each
+# job starts in milliseconds. The first child watches the second, and
+# kills it, with everything it started, when it runs out of time. Unix only.
+
+import importlib
+import json
+import os
+import runpy
+import shlex
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+
+SOCKET = os.path.join(tempfile.gettempdir(), 'warm-{}.sock'.format(os.getuid()))
+
+
+def _read_all(connection):
+    chunks = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+def _read_line(connection):
+    chunks = []
+    while True:
+        chunk = connection.recv(1)
+        if not chunk or chunk == b'\n':
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+def _text_request(line):
+    """The request for a plain 'script arg ...' line, run in the script's
+    directory"""
+    words = shlex.split(line)
+    if not words:
+        raise ValueError('no script given')
+    script = os.path.abspath(os.path.expanduser(words[0]))
+    return {'script' : script, 'args' : words[1:], 'cwd' : os.path.dirname(script)}
+
+
+def _text_response(response):
+    text = response['stdout'] + response['stderr']
+    if response['returncode']:
+        text += '[warm: exit status {}]\n'.format(response['returncode'])
+    return text.encode('utf-8')
+
+
+def _run_script(request, captured):
+    """Run a script in this (forked) process and return its exit code"""
+    # redirect the file descriptors, so output from C extensions and
+    # child processes is captured as well
+    os.dup2(captured[0].fileno(), 1)
+    os.dup2(captured[1].fileno(), 2)
+    returncode = 0
+    try:
+        if request.get('cwd'):
+            os.chdir(request['cwd'])
+        sys.argv = [request['script']] + list(request.get('args', []))
+        sys.path[0] = os.path.dirname(os.path.abspath(request['script']))
+        runpy.run_path(request['script'], run_name='__main__')
+    except SystemExit as e:
+        if e.code is None:
+            returncode = 0
+        elif isinstance(e.code, int):
+            returncode = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            returncode = 1
+    except BaseException:
+        traceback.print_exc()
+        returncode = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return returncode
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError
+
+
+def _run_request(request):
+    """Run a script in a child of this (forked) process, kill it if it
+    takes longer than the request's timeout, and describe the outcome"""
+    captured = [tempfile.TemporaryFile(), tempfile.TemporaryFile()]
+    timeout = request.get('timeout')
+    start = time.perf_counter()
+    pid = os.fork()
+    if not pid:
+        # a process group of its own, so the kill reaches its children too
+        os.setpgid(0, 0)
+        signal.signal(signal.SIGALRM, signal.SIG_DFL)
+        os._exit(_run_script(request, captured) & 0xff)
+    status = None
+    timed_out = False
+    # the script can't catch the alarm or the kill: they happen out here
+    signal.signal(signal.SIGALRM, _on_alarm)
+    try:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        _, status = os.waitpid(pid, 0)
+    except TimeoutError:
+        pass
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    if status is None:
+        timed_out = True
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        _, status = os.waitpid(pid, 0)
+    wall = time.perf_counter() - start
+    output = []
+    for f in captured:
+        f.seek(0)
+        output.append(f.read().decode('utf-8', errors='replace'))
+    if timed_out:
+        output[1] += 'killed after {:g}s\n'.format(timeout)
+    return {'returncode' : os.waitstatus_to_exitcode(status), 'stdout' : output[0],
+            'stderr' : output[1], 'wall' : wall, 'timed_out' : timed_out}
+
+
+def _on_term(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(path=SOCKET, preload=(), timeout=None):
+    """Import `preload`, then fork a child for every request on `path`
+
+    `timeout` applies to requests that don't set one, like plain lines.
+    """
+    for name in preload:
+        importlib.import_module(name)
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen(128)
+    # children are reaped by the kernel; results travel over the socket
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _on_term)
+    print("Serving on {} with {} preloaded".format(path, ', '.join(preload) or 'nothing'))
+    sys.stdout.flush()
+    try:
+        while True:
+            connection, _ = server.accept()
+            pid = os.fork()
+            if pid:
+                connection.close()
+                continue
+            server.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            text = True
+            try:
+                line = _read_line(connection).decode('utf-8')
+                text = not line.lstrip().startswith('{')
+                request = _text_request(line) if text else json.loads(line)
+                if request.get('timeout') is None:
+                    request['timeout'] = timeout
+                response = _run_request(request)
+            except BaseException:
+                response = {'returncode' : 1, 'stdout' : '', 'wall' : 0.0,
+                            'stderr' : traceback.format_exc(), 'timed_out' : False}
+            try:
+                connection.sendall(_text_response(response) if text
+                                   else json.dumps(response).encode('utf-8'))
+                connection.close()
+            finally:
+                os._exit(0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def submit(script, args=(), cwd=None, timeout=None, path=SOCKET):
+    """Run `script` on the warm server at `path`
+
+    Returns
+    -------
+    dict
+        returncode (negative if killed by a signal), stdout, stderr,
+        wall (seconds spent running it) and timed_out
+    """
+    request = {'script' : script, 'args' : list(args),
+               'cwd' : os.path.abspath(cwd or os.getcwd()), 'timeout' : timeout}
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        client.shutdown(socket.SHUT_WR)
+        return json.loads(_read_all(client).decode('utf-8'))
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket', default=SOCKET)
+    commands = parser.add_subparsers(dest='command')
+    serve_parser = commands.add_parser('serve', help='start the warm server')
+    serve_parser.add_argument('--preload', nargs='*', default=[])
+    serve_parser.add_argument('--timeout', type=float,
+                              help='seconds before jobs that set no timeout are killed')
+    run_parser = commands.add_parser('run', help='run a script on the warm server')
+    run_parser.add_argument('script')
+    run_parser.add_argument('args', nargs=argparse.REMAINDER)
+    run_parser.add_argument('--timeout', type=float)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.socket, args.preload, args.timeout)
+    elif args.command == 'run':
+        result = submit(args.script, args.args, timeout=args.timeout, path=args.socket)
+        sys.stdout.write(result['stdout'])
+        sys.stderr.write(result['stderr'])
+        sys.exit(result['returncode'])
+    else:
+        parser.print_help()